@@ -5,7 +5,7 @@ from app.api.dependencies.auth_dependencies import get_current_user
 from app.models.db.user_model import User
 import logging
 from app.services.chat_service import save_user_message, save_gpt_response
-from app.prompt.chat_prompt import build_chat_prompt
+from app.prompt.chat_prompt import abuild_chat_prompt
 from app.models.schemas.chat_schema import MessageInput
 from app.models.schemas.chat_schema import TurnInput
 from fastapi import HTTPException
@@ -15,12 +15,18 @@ from fastapi import Request
 from app.services.session_create import get_or_create_session_id
 import logging
 from app.models.db.chat_message_model import ChatMessage
-from datetime import datetime
+from datetime import datetime, date
+from typing import Optional
+from fastapi import Query
+from app.repositories.chat_activity_repository import ChatActivityRepository
 from app.api.dependencies.auth_dependencies import get_current_user
 from app.utils.time_utils import get_kst_now
 from app.services.diary_service import DiaryService
 import json
-import redis
+from app.services.notification_publisher import apublish
+from app.core.db_offload import run_db
+import asyncio
+from contextlib import aclosing
 from app.config.settings import settings
 
 
@@ -77,18 +83,29 @@ async def stream_response(
             f"✅ /chat/response_stream start - user_id={current_user.id}, turn={turn}, session_id={session_id}"
         )
 
-        # 프롬프트 구성
-        prompt = build_chat_prompt(db, current_user.id, turn, session_id=session_id)
+        # 프롬프트 구성 (DB 조회는 run_db 슬롯, 하이브리드 검색은 별도 스레드 → 둘 다 이벤트 루프 밖에서)
+        prompt = await abuild_chat_prompt(db, current_user.id, turn, session_id=session_id)
         logger.debug(f"Prompt built: {prompt}")
 
         async def event_generator():
             accumulated = ""
             try:
-                # 스트리밍 청크 전송
-                async for chunk in stream_gpt_response(prompt):
-                    accumulated += chunk
-                    yield chunk
-
+                # 스트리밍 청크 전송 (async 클라이언트 - 이벤트 루프 비차단)
+                # aclosing: 중간에 빠져나가면 upstream OpenAI 스트림까지 즉시 닫힘
+                async with aclosing(stream_gpt_response(prompt)) as gpt_stream:
+                    async for chunk in gpt_stream:
+                        if await request.is_disconnected():
+                            logger.info(
+                                f"🔌 클라이언트 연결 종료 - GPT 스트리밍 취소: user_id={current_user.id}, turn={turn}"
+                            )
+                            return
+                        accumulated += chunk
+                        yield chunk
+
+            except asyncio.CancelledError:
+                # 서버 측 취소(연결 끊김 감지 등) - 부분 응답은 저장하지 않음
+                logger.info(f"🔌 GPT 스트리밍 태스크 취소: user_id={current_user.id}, turn={turn}")
+                raise
             except Exception as stream_err:
                 # 스트리밍 중 오류 발생
                 logger.error(
@@ -103,7 +120,8 @@ async def stream_response(
                 logger.info(
                     f"✅ Streaming complete (total_len={len(accumulated)}). Saving to DB."
                 )
-                save_gpt_response(
+                await run_db(
+                    save_gpt_response,
                     db, current_user.id, accumulated, turn, session_id=session_id
                 )
                 
@@ -128,12 +146,6 @@ async def stream_response(
                 if condition_result["available"]:
                     logger.info("🔍 available: true, Redis 발행 시작")
                     # Redis 발행 (websocket_service.py와 동일한 형태)
-                    redis_client = redis.Redis(
-                        host=settings.redis_host,
-                        port=settings.redis_port,
-                        db=settings.redis_db
-                    )
-                    
                     message = {
                         "type": "diary_available",
                         "target": "blink-study-overlay-monitor",
@@ -144,7 +156,7 @@ async def stream_response(
                     message_json = json.dumps(message)
                     
                     logger.info(f"🔍 Redis 발행 시도: channel={channel}, message={message_json}")
-                    result = redis_client.publish(channel, message_json)
+                    result = await apublish(channel, message_json)
                     logger.info(f"✅ response streaml   Redis 발행 성공: channel={channel}, result={result}")
                 else:
                     logger.info(f"🔍 available: false, Redis 발행 건너뜀")
@@ -203,27 +215,23 @@ def get_chat_history(req: DateRequest,
 
 
 # 채팅 목록 조회 (날짜별 그룹화)
+# - 일별 활동 집계(daily_chat_activity) PK 범위 조회 → 비용은 메시지 수가 아니라 날짜 수에 비례
+# - limit 지정 시 커서 페이징: 응답의 next_before를 다음 요청의 before로 (없으면 마지막 페이지)
 @router.get("/chat/list")
 def get_chat_list(
+    limit: Optional[int] = Query(None, ge=1, le=366),
+    before: Optional[date] = Query(None, description="이 날짜 이전(미포함)부터, YYYY-MM-DD"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
-        # 현재 유저의 모든 채팅 메시지 조회
-        records = db.query(ChatMessage).filter(
-            ChatMessage.user_id == current_user.id
-        ).order_by(ChatMessage.timestamp.desc()).all()
-        
-        # timestamp에서 날짜 추출하여 그룹화
-        chat_dates = set()
-        for record in records:
-            date_str = record.timestamp.strftime("%Y-%m-%d")
-            chat_dates.add(date_str)
+        days = ChatActivityRepository(db).list_active_dates(current_user.id, limit=limit, before=before)
         
-        # 날짜순으로 정렬 (최신순)
-        sorted_dates = sorted(list(chat_dates), reverse=True)
+        # 날짜순 (최신순) 문자열
+        sorted_dates = [d.strftime("%Y-%m-%d") for d in days]
+        next_before = sorted_dates[-1] if limit is not None and len(sorted_dates) == limit else None
         
-        return {"chat_dates": sorted_dates}
+        return {"chat_dates": sorted_dates, "next_before": next_before}
         
     except Exception as e:
         print("❌ /chat/list 에러:", str(e))
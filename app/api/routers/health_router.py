@@ -0,0 +1,50 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.clients.embedding_batcher import embedding_batcher_stats
+from app.clients.embedding_cache import get_embedding_cache
+from app.core.db_offload import db_offload_stats
+from app.services.retrieval_runtime import retrieval_runtime
+from app.services.notification_publisher import publish_metrics
+from app.services.notification_hub import notification_hub
+from app.services.websocket_service import websocket_service
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def liveness():
+    return {"status": "ok"}
+
+
+# 검색 스택(임베딩 모델 + 인덱스) 워밍업 완료 여부
+@router.get("/ready")
+async def readiness():
+    status = retrieval_runtime.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+
+# 알림 파이프라인: Redis 발행 → 허브 분배 → 연결별 송신 큐
+@router.get("/notifications")
+async def notifications():
+    return {
+        "publish": publish_metrics(),
+        "hub": notification_hub.status(),
+        "websocket": websocket_service.status(),
+    }
+
+
+# 임베딩: 마이크로 배처(배치 크기/대기/forward 지연) + 캐시 적중률
+@router.get("/embeddings")
+async def embeddings():
+    return {
+        "batchers": embedding_batcher_stats(),
+        "cache": get_embedding_cache().stats(),
+    }
+
+
+# async 경로의 DB 오프로드: 동시 실행 수/대기/실행 시간/느린 호출 수
+@router.get("/db")
+async def db():
+    return db_offload_stats()
@@ -11,7 +11,8 @@ from app.core.connection import get_db
 
 from datetime import datetime, date
 from sqlalchemy import func
-import redis
+from app.services.notification_publisher import apublish
+from app.core.db_offload import run_db
 import json
 from app.config.settings import settings
 
@@ -27,16 +28,14 @@ async def generate_diary_stream(
         # Repository 직접 호출
         chat_repository = TodayChatMessageRepository()
         
-        # 오늘 AI 생성 여부 확인 (source_type='ai')
-        today_ai_diary = chat_repository.check_today_diary_by_source(current_user.id, 'ai')
+        # 오늘 AI 생성 여부(source_type='ai') + 오늘 사용자 채팅 토큰수 - SQL 1회
+        today_ai_diary, total_tokens = await run_db(chat_repository.get_diary_eligibility, current_user.id, 'ai')
         if today_ai_diary:
             raise HTTPException(
                 status_code=400, 
                 detail="오늘 이미 AI로 생성한 일기가 있습니다."
             )
         
-        # 오늘 사용자 채팅 토큰수 확인
-        formatted_chats, total_tokens = chat_repository.diary_get_today_user_chat_and_tokens(current_user.id)
         min_tokens = 55  # 최소 토큰수 설정
         if total_tokens < min_tokens:
             raise HTTPException(
@@ -116,20 +115,20 @@ async def save_user_diary(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        # Repository 직접 호출
-        chat_repository = TodayChatMessageRepository()
-        
-        # 오늘 사용자 직접 작성 여부 확인 (source_type='user')
-        today_user_diary = chat_repository.check_today_diary_by_source(current_user.id, 'user')
-        if today_user_diary:
-            raise HTTPException(
-                status_code=400, 
-                detail="오늘 이미 직접 작성한 일기가 있습니다."
-            )
-        
-        # DB에 직접 저장
+        # 조건 확인 + 저장을 세션 1개로 (Repository에 세션 주입)
         db = next(get_db())
         try:
+            chat_repository = TodayChatMessageRepository(db)
+            
+            # 오늘 사용자 직접 작성 여부 확인 (source_type='user')
+            today_user_diary = await run_db(chat_repository.check_today_diary_by_source, current_user.id, 'user')
+            if today_user_diary:
+                raise HTTPException(
+                    status_code=400, 
+                    detail="오늘 이미 직접 작성한 일기가 있습니다."
+                )
+            
+            # DB에 직접 저장
             diary_report = DiaryReport(
                 user_id=current_user.id,
                 content=diary_data.get('content'),
@@ -137,10 +136,12 @@ async def save_user_diary(
                 timestamp=datetime.now()  # 시스템 로컬 시간 사용 (KST)
             )
             db.add(diary_report)
-            db.commit()
+            await run_db(db.commit)
             
             return {"message": "일기가 성공적으로 저장되었습니다."}
             
+        except HTTPException:
+            raise
         except Exception as e:
             db.rollback()
             raise HTTPException(status_code=500, detail=f"일기 저장 실패: {str(e)}")
@@ -163,16 +164,14 @@ async def check_diary_condition(
         # Repository 직접 호출
         chat_repository = TodayChatMessageRepository()
         
-        # 오늘 AI 생성 여부 확인 (source_type='ai')
-        today_ai_diary = chat_repository.check_today_diary_by_source(current_user.id, 'ai')
+        # 오늘 AI 생성 여부(source_type='ai') + 오늘 사용자 채팅 토큰수 - SQL 1회
+        today_ai_diary, total_tokens = await run_db(chat_repository.get_diary_eligibility, current_user.id, 'ai')
         if today_ai_diary:
             return {
                 "available": False,
                 "reason": "오늘 이미 AI로 생성한 일기가 있습니다."
             }
         
-        # 오늘 사용자 채팅 토큰수 확인
-        formatted_chats, total_tokens = chat_repository.diary_get_today_user_chat_and_tokens(current_user.id)
         min_tokens = 55  # 최소 토큰수 설정
         if total_tokens < min_tokens:
             return {
@@ -236,7 +235,7 @@ async def get_diary_list(
         chat_repository = TodayChatMessageRepository()
         
         # 사용자의 모든 일기 조회 (최신순)
-        diaries = chat_repository.get_user_diaries(current_user.id)
+        diaries = await run_db(chat_repository.get_user_diaries, current_user.id)
         
         # JS에서 기대하는 형태로 변환
         diary_list = []
@@ -346,12 +345,6 @@ async def get_today_encouragement(
             
             # Redis에 encourage_unavailable 메시지 발행
             try:
-                redis_client = redis.Redis(
-                    host=settings.redis_host,
-                    port=settings.redis_port,
-                    db=settings.redis_db
-                )
-                
                 message = {
                     "type": "encourage_unavailable",
                     "target": "letter-overlay-glow",
@@ -362,7 +355,7 @@ async def get_today_encouragement(
                 message_json = json.dumps(message)
                 
                 print(f"📤 [DEBUG] Redis 발행 시도: channel={channel}, message={message_json}")
-                result = redis_client.publish(channel, message_json)
+                result = await apublish(channel, message_json)
                 print(f"✅ [DEBUG] Redis 발행 성공: channel={channel}, result={result} (구독자 수)")
                 
             except Exception as e:
@@ -29,8 +29,8 @@ async def websocket_endpoint(
             
     except WebSocketDisconnect:
         # 연결 해제
-        await websocket_service.disconnect(user_id)
+        await websocket_service.disconnect(user_id, websocket)
         print(f"❌ WebSocket 연결 해제: user_id={user_id}")
     except Exception as e:
         print(f"❌ WebSocket 에러: {e}")
-        await websocket_service.disconnect(user_id) 
\ No newline at end of file
+        await websocket_service.disconnect(user_id, websocket) 
\ No newline at end of file
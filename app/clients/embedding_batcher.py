@@ -0,0 +1,248 @@
+# app/clients/embedding_batcher.py
+"""
+임베딩 마이크로 배처 (프로세스 내 전용 스레드 1개)
+- 동시에 들어온 embed 요청을 최대 max_wait 동안 모아 (저부하 시에는 대기 없이 즉시) 모델 forward 1번으로 처리 → 요청별 Future로 분배
+  · 채팅 턴마다 스레드별 1건짜리 인코딩이 코어를 두고 경쟁하던 것을 배치 1회로 합침
+  · 모델 호출은 이 스레드에서만 → torch/onnxruntime 내부 스레드 풀만 코어를 사용
+- 모델 + 백엔드별로 배처 1개 공유 (get_embedding_batcher) → 같은 모델을 프로세스 안에서 한 번만 로드
+- 캐시(CachedEmbeddings)는 배처 바깥: 캐시 hit는 대기 없이 반환, miss만 배치에 합류
+
+설정: EMBED_BATCH_MAX (배치당 최대 텍스트 수), EMBED_BATCH_WAIT_MS (첫 요청 이후 최대 대기)
+
+부하 테스트 (동시 요청 수별 처리량, 배처 유무):
+    python -m app.clients.embedding_batcher --concurrency 1 8 32
+"""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueued_at")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingBatcher(Embeddings):
+    """LangChain Embeddings 인터페이스 그대로 (CachedEmbeddings 안쪽, 원본 모델 바깥)"""
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        *,
+        max_batch: int = BATCH_MAX,
+        max_wait_ms: float = BATCH_WAIT_MS,
+        name: str = "embed",
+        window: int = 1024,
+    ):
+        self.inner = inner
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._q: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._closed = False
+        self._last_requests = 0
+        self._wait_ms: Deque[float] = deque(maxlen=window)
+        self._forward_ms: Deque[float] = deque(maxlen=window)
+        self._batch_sizes: Deque[int] = deque(maxlen=window)
+        self.counters = {"requests": 0, "texts": 0, "batches": 0, "errors": 0}
+        self._start()
+
+    def _start(self) -> None:
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name=f"embed-batcher-{self.name}", daemon=True)
+        self._thread.start()
+
+    # ---------- Embeddings ----------
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit([text]).result()[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.submit(list(texts)).result()
+
+    def submit(self, texts: List[str]) -> Future:
+        if self._closed:
+            raise RuntimeError("EmbeddingBatcher is closed")
+        if self._pid != os.getpid():
+            # fork(Celery prefork 등)된 자식에는 스레드가 없음 → 새 큐/스레드로 재시작
+            self._q = queue.Queue()
+            self._start()
+        req = _Request(texts)
+        self._q.put(req)
+        return req.future
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join(timeout)
+
+    # ---------- 백그라운드 ----------
+    def _run(self) -> None:
+        while True:
+            req = self._q.get()
+            if req is None:
+                return
+            batch = [req]
+            n = len(req.texts)
+            # 저부하(직전 배치가 요청 1건 + 대기열 비어 있음)면 기다리지 않고 바로 실행
+            wait = self.max_wait if (self._last_requests > 1 or not self._q.empty()) else 0.0
+            deadline = time.perf_counter() + wait
+            stop = False
+            while n < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    nxt = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+                n += len(nxt.texts)
+            self._last_requests = len(batch)
+            self._forward(batch)
+            if stop:
+                return
+
+    def _forward(self, batch: List[_Request]) -> None:
+        # 요청 간 중복 텍스트는 1번만 인코딩
+        unique = list(dict.fromkeys(t for req in batch for t in req.texts))
+        t0 = time.perf_counter()
+        try:
+            vecs = self.inner.embed_documents(unique)
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.exception("embedding batch 실패 (size=%d)", len(unique))
+            for req in batch:
+                req.future.set_exception(e)
+            return
+        t1 = time.perf_counter()
+        by_text = dict(zip(unique, vecs))
+        for req in batch:
+            self._wait_ms.append((t0 - req.enqueued_at) * 1000)
+            req.future.set_result([by_text[t] for t in req.texts])
+        self._forward_ms.append((t1 - t0) * 1000)
+        self._batch_sizes.append(len(unique))
+        self.counters["requests"] += len(batch)
+        self.counters["texts"] += len(unique)
+        self.counters["batches"] += 1
+
+    # ---------- 상태 ----------
+    @staticmethod
+    def _pct(values, q: float) -> float:
+        if not values:
+            return 0.0
+        s = sorted(values)
+        return round(s[min(len(s) - 1, int(q * len(s)))], 3)
+
+    def stats(self) -> Dict[str, Any]:
+        wait, fwd, sizes = list(self._wait_ms), list(self._forward_ms), list(self._batch_sizes)
+        return {
+            "name": self.name,
+            "max_batch": self.max_batch,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "queue": self._q.qsize(),
+            **self.counters,
+            "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "queue_wait_p50_ms": self._pct(wait, 0.5),
+            "queue_wait_p99_ms": self._pct(wait, 0.99),
+            "forward_p50_ms": self._pct(fwd, 0.5),
+            "forward_p99_ms": self._pct(fwd, 0.99),
+        }
+
+
+# ---------- 프로세스 공유 배처 (모델 + 백엔드별 1개) ----------
+_batchers: Dict[Tuple[str, str], EmbeddingBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_embedding_batcher(model_name: str, backend: str, factory: Callable[[], Embeddings]) -> EmbeddingBatcher:
+    """없으면 factory()로 모델을 만들어 배처 생성 (이후 같은 키는 모델 재로딩 없음)"""
+    key = (model_name, backend)
+    with _batchers_lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = _batchers[key] = EmbeddingBatcher(factory(), name=f"{model_name}@{backend}")
+        return batcher
+
+
+def embedding_batcher_stats() -> List[Dict[str, Any]]:
+    with _batchers_lock:
+        return [b.stats() for b in _batchers.values()]
+
+
+if __name__ == "__main__":
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor
+
+    class _CpuModel(Embeddings):
+        """배치 고정비 + 텍스트당 비용을 흉내 내는 가짜 모델 (GIL 밖에서 대기하는 forward)"""
+
+        def __init__(self, fixed_ms: float, per_text_ms: float):
+            self.fixed = fixed_ms / 1000
+            self.per_text = per_text_ms / 1000
+            self._lock = threading.Lock()  # 실제 모델처럼 forward는 한 번에 하나가 코어를 씀
+
+        def embed_documents(self, texts):
+            with self._lock:
+                time.sleep(self.fixed + self.per_text * len(texts))
+            return [[float(len(t))] for t in texts]
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    def run(emb: Embeddings, concurrency: int, requests: int) -> Dict[str, float]:
+        lat: List[float] = []
+
+        def one(i: int):
+            t0 = time.perf_counter()
+            emb.embed_query(f"질문 {i}")
+            lat.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - t0
+        lat.sort()
+        return {
+            "req_per_s": round(requests / elapsed, 1),
+            "p50_ms": round(lat[len(lat) // 2], 2),
+            "p99_ms": round(lat[min(len(lat) - 1, int(0.99 * len(lat)))], 2),
+        }
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--fixed-ms", type=float, default=8.0, help="forward 1회 고정비")
+    parser.add_argument("--per-text-ms", type=float, default=0.5, help="텍스트당 추가 비용")
+    args = parser.parse_args()
+
+    for c in args.concurrency:
+        model = _CpuModel(args.fixed_ms, args.per_text_ms)
+        direct = run(model, c, args.requests)
+        batcher = EmbeddingBatcher(model, name="bench")
+        batched = run(batcher, c, args.requests)
+        stats = batcher.stats()
+        batcher.close()
+        print({"concurrency": c, "direct": direct, "batched": batched, "avg_batch_size": stats["avg_batch_size"]})
@@ -0,0 +1,213 @@
+# app/clients/embedding_cache.py
+from __future__ import annotations
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 정규화: NFKC + 공백 정리 (의미가 바뀌는 변형은 하지 않음)"""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+class EmbeddingCache:
+    """
+    임베딩 캐시 (모델명 + 정규화 텍스트 → 벡터)
+    - 1차: 메모리 LRU (max_items) + TTL
+    - 2차(선택): sqlite 디스크 티어 (float32 BLOB) - 프로세스 재시작/다른 워커와 공유
+      · 상한 disk_max_items행: 쓰기 후 purge_interval초마다 만료 행 + 오래된 순 초과분 삭제
+    - hit/miss 카운터 노출
+    - 락 2개: _lock은 메모리 LRU만, _disk_lock은 sqlite만 → 디스크 I/O(commit/fsync) 중에도 메모리 hit는 대기 없음
+    - 저장/반환 모두 복사본 → 호출 측이 벡터를 수정해도 캐시는 그대로
+    """
+
+    def __init__(
+        self,
+        max_items: int = 4096,
+        ttl_sec: Optional[float] = 86400.0,
+        disk_path: Optional[str] = None,
+        disk_max_items: int = 100_000,
+        purge_interval: float = 60.0,
+    ):
+        self.max_items = max_items
+        self.disk_max_items = disk_max_items
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self.ttl_sec = ttl_sec if ttl_sec and ttl_sec > 0 else None
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._mem: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "disk_purged": 0}
+
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL;")
+            self._disk.execute("PRAGMA busy_timeout=2000;")
+            self._disk.execute("""
+            CREATE TABLE IF NOT EXISTS emb_cache (
+                model TEXT NOT NULL,
+                text_key TEXT NOT NULL,
+                created REAL NOT NULL,
+                vec BLOB NOT NULL,
+                PRIMARY KEY (model, text_key)
+            );
+            """)
+            self._disk.execute("CREATE INDEX IF NOT EXISTS ix_emb_cache_created ON emb_cache (created);")
+            self._disk.commit()
+
+    # ---------- lookup ----------
+    def get(self, model: str, text_key: str) -> Optional[List[float]]:
+        key = (model, text_key)
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                created, vec = item
+                if self.ttl_sec is None or now - created <= self.ttl_sec:
+                    self._mem.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return list(vec)
+                del self._mem[key]
+                self._stats["expired"] += 1
+
+        if self._disk is not None:
+            with self._disk_lock:
+                row = self._disk.execute(
+                    "SELECT created, vec FROM emb_cache WHERE model=? AND text_key=?", key
+                ).fetchone()
+            if row and (self.ttl_sec is None or now - row[0] <= self.ttl_sec):
+                vec = array("f", row[1]).tolist()
+                with self._lock:
+                    self._put_mem(key, row[0], vec)
+                    self._stats["disk_hits"] += 1
+                return list(vec)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, model: str, text_key: str, vec: List[float]) -> None:
+        self.put_many(model, [(text_key, vec)])
+
+    def put_many(self, model: str, items: List[Tuple[str, List[float]]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for text_key, vec in items:
+                self._put_mem((model, text_key), now, list(vec))
+        purged = 0
+        if self._disk is not None:
+            rows = [(model, k, now, array("f", v).tobytes()) for k, v in items]
+            with self._disk_lock:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO emb_cache (model, text_key, created, vec) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._disk.commit()
+                if now - self._last_purge >= self.purge_interval:
+                    self._last_purge = now
+                    purged = self._purge_disk(now)
+            if purged:
+                with self._lock:
+                    self._stats["disk_purged"] += purged
+
+    def _purge_disk(self, now: float) -> int:
+        """(_disk_lock 보유) 만료 행 + 상한 초과분(오래된 순) 삭제 → 삭제 행 수"""
+        purged = 0
+        if self.ttl_sec is not None:
+            purged += self._disk.execute(
+                "DELETE FROM emb_cache WHERE created < ?", (now - self.ttl_sec,)
+            ).rowcount
+        excess = self._disk.execute("SELECT count(*) FROM emb_cache").fetchone()[0] - self.disk_max_items
+        if excess > 0:
+            purged += self._disk.execute(
+                "DELETE FROM emb_cache WHERE rowid IN "
+                "(SELECT rowid FROM emb_cache ORDER BY created LIMIT ?)",
+                (excess,),
+            ).rowcount
+        self._disk.commit()
+        return purged
+
+    def _put_mem(self, key: Tuple[str, str], created: float, vec: List[float]) -> None:
+        # 호출 측에서 락 보유
+        self._mem[key] = (created, vec)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    # ---------- utils ----------
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hit_rate = (self._stats["hits"] + self._stats["disk_hits"]) / total if total else 0.0
+            return {**self._stats, "size": len(self._mem), "hit_rate": round(hit_rate, 4)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM emb_cache")
+                self._disk.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings 래퍼 - 쿼리(embed_query)만 캐시
+    - 문서 색인(embed_documents)은 캐시를 거치지 않음: 한 번 색인하면 다시 임베딩할 일이 거의 없고,
+      넣으면 반복 쿼리 엔트리를 LRU/디스크 상한에서 밀어냄 (배치 내 중복만 1번 계산)
+    """
+
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache, model_name: str):
+        self.inner = inner
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_text(text)
+        vec = self.cache.get(self.model_name, key)
+        if vec is not None:
+            return vec
+        vec = self.inner.embed_query(key)
+        self.cache.put(self.model_name, key, vec)
+        return vec
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [normalize_text(t) for t in texts]
+        # 동일 배치 내 중복 텍스트는 1번만 계산
+        unique = list(dict.fromkeys(keys))
+        if not unique:
+            return []
+        computed = dict(zip(unique, self.inner.embed_documents(unique)))
+        return [list(computed[k]) for k in keys]
+
+
+# ---------- 프로세스 공유 캐시 ----------
+_shared_cache: Optional[EmbeddingCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = EmbeddingCache(
+                max_items=int(os.getenv("EMBED_CACHE_SIZE", "4096")),
+                ttl_sec=float(os.getenv("EMBED_CACHE_TTL", "86400")),
+                disk_path=os.getenv("EMBED_CACHE_PATH") or None,
+                disk_max_items=int(os.getenv("EMBED_CACHE_DISK_MAX", "100000")),
+            )
+        return _shared_cache
@@ -0,0 +1,162 @@
+"""
+로컬 가짜 OpenAI 서버 (Chat Completions 호환, 스트리밍 지원)
+
+- 실제 API 비용/레이트리밋 없이 스트리밍 경로 부하를 재기 위한 용도
+- OPENAI_BASE_URL=http://127.0.0.1:8765/v1 로 지정하면 앱이 이쪽으로 붙음
+- 단독 실행 시 서버를 띄우고 동시 스트림 수를 늘려 가며
+  워커 1개(이벤트 루프 1개)가 감당하는 처리량/지연/루프 지연(lag)을 측정함
+
+    python -m app.clients.fake_openai_server --streams 1,10,50,200
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from typing import List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_TOKENS = int(os.getenv("FAKE_OPENAI_TOKENS", "40"))             # 응답당 청크 수
+FAKE_DELAY_MS = float(os.getenv("FAKE_OPENAI_DELAY_MS", "25"))       # 청크 간격
+FAKE_TTFT_MS = float(os.getenv("FAKE_OPENAI_TTFT_MS", "300"))        # 첫 청크까지 지연
+
+app = FastAPI()
+
+
+def _chunk(cid: str, model: str, content: str = None, finish: str = None) -> str:
+    delta = {"content": content} if content is not None else {}
+    body = {
+        "id": cid,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+    }
+    return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    words = [f"토큰{i} " for i in range(FAKE_TOKENS)]
+
+    if not body.get("stream"):
+        await asyncio.sleep((FAKE_TTFT_MS + FAKE_DELAY_MS * FAKE_TOKENS) / 1000)
+        return JSONResponse({
+            "id": cid,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(words)},
+                "finish_reason": "stop",
+            }],
+        })
+
+    async def gen():
+        await asyncio.sleep(FAKE_TTFT_MS / 1000)
+        for w in words:
+            yield _chunk(cid, model, w)
+            await asyncio.sleep(FAKE_DELAY_MS / 1000)
+        yield _chunk(cid, model, finish="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
+# ---------- 부하 측정 ----------
+def _serve_in_thread(port: int) -> None:
+    import uvicorn
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+async def _loop_lag_probe(stop: asyncio.Event, samples: List[float], interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - t0 - interval) * 1000)
+
+
+async def _run_level(n_streams: int) -> dict:
+    from app.clients.gpt_api import stream_gpt_response
+
+    ttfts: List[float] = []
+    totals: List[float] = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        t0 = time.perf_counter()
+        first = None
+        async for piece in stream_gpt_response([{"role": "user", "content": "안녕"}]):
+            if piece.startswith("❌"):
+                errors += 1
+                return
+            if first is None:
+                first = time.perf_counter() - t0
+        ttfts.append(first or 0.0)
+        totals.append(time.perf_counter() - t0)
+
+    stop = asyncio.Event()
+    lag: List[float] = []
+    probe = asyncio.create_task(_loop_lag_probe(stop, lag))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n_streams)))
+    wall = time.perf_counter() - t0
+    stop.set()
+    await probe
+
+    def pct(xs: List[float], p: float) -> float:
+        if not xs:
+            return 0.0
+        xs = sorted(xs)
+        return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+    return {
+        "streams": n_streams,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "ttft_p50_ms": round(pct(ttfts, 0.5) * 1000, 1),
+        "ttft_p99_ms": round(pct(ttfts, 0.99) * 1000, 1),
+        "total_p99_ms": round(pct(totals, 0.99) * 1000, 1),
+        "loop_lag_max_ms": round(max(lag) if lag else 0.0, 1),
+    }
+
+
+async def _bench(levels: List[int]) -> None:
+    from app.clients.gpt_api import aclose_async_client
+    try:
+        for n in levels:
+            print(await _run_level(n))
+    finally:
+        await aclose_async_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--streams", default="1,10,50,100,200")
+    parser.add_argument("--serve-only", action="store_true")
+    args = parser.parse_args()
+
+    if args.serve_only:
+        import uvicorn
+        uvicorn.run(app, host="127.0.0.1", port=args.port)
+    else:
+        # gpt_api 임포트 전에 base_url 지정
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+        _serve_in_thread(args.port)
+        asyncio.run(_bench([int(x) for x in args.streams.split(",") if x.strip()]))
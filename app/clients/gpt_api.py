@@ -1,4 +1,8 @@
-from openai import OpenAI
+import asyncio
+import os
+from typing import Optional
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from fastapi.responses import StreamingResponse
 from app.config.settings import settings
 
@@ -11,14 +15,97 @@ if not settings.openai_api_key:
 else:
     print(f"✅ OpenAI API 키 설정됨: {settings.openai_api_key[:20]}...")
 
-# settings에서 API 키 가져오기
-client = OpenAI(api_key=settings.openai_api_key)
+# 로컬 가짜 서버(app/clients/fake_openai_server.py) 등으로 돌릴 때 OPENAI_BASE_URL 지정
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+GPT_MODEL = "gpt-4-1106-preview"
+
+# 호출별 타임아웃 기본값 (초) - read는 "청크 사이" 대기 한도
+GPT_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+GPT_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", "30"))
+GPT_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+
+# settings에서 API 키 가져오기 (동기 클라이언트: Celery 등 sync 경로 전용)
+client = OpenAI(api_key=settings.openai_api_key, base_url=OPENAI_BASE_URL)
+
+
+# ---------- 공유 async 클라이언트 (워커당 1개) ----------
+# httpx 커넥션 풀 + keep-alive 재사용 → 요청마다 TLS 핸드셰이크 안 함
+_async_client: Optional[AsyncOpenAI] = None
+
+
+def _make_timeout(timeout: Optional[float] = None) -> httpx.Timeout:
+    read = timeout if timeout is not None else GPT_READ_TIMEOUT
+    return httpx.Timeout(read, connect=GPT_CONNECT_TIMEOUT)
+
+
+def get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=GPT_MAX_CONNECTIONS,
+                max_keepalive_connections=GPT_MAX_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+            timeout=_make_timeout(),
+        )
+        _async_client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=OPENAI_BASE_URL,
+            http_client=http_client,
+        )
+    return _async_client
+
+
+async def aclose_async_client() -> None:
+    """shutdown 시 커넥션 풀 정리"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+def _stream_error_message(error_msg: str) -> str:
+    if "401" in error_msg:
+        return "❌ API 키 인증 실패. 관리자에게 문의하세요."
+    if "429" in error_msg:
+        return "❌ 서비스 일시적 과부하. 잠시 후 다시 시도하세요."
+    return "❌ GPT 응답 중 오류 발생"
+
+
+async def _astream_chat(messages: list, timeout: Optional[float] = None):
+    """
+    논블로킹 스트리밍 본체
+    - 청크 읽기가 이벤트 루프를 막지 않음
+    - 소비 측이 취소/중단(브라우저 disconnect 등)하면 finally에서 upstream 스트림을 즉시 닫음
+    """
+    stream = None
+    try:
+        stream = await get_async_client().chat.completions.create(
+            model=GPT_MODEL,
+            messages=messages,
+            stream=True,
+            timeout=_make_timeout(timeout),
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except asyncio.CancelledError:
+        print("🔌 GPT 스트리밍 취소됨 (클라이언트 연결 종료)")
+        raise
+    except Exception as e:
+        error_msg = str(e)
+        yield _stream_error_message(error_msg)
+        print("❌ GPT 스트리밍 실패:", error_msg)
+    finally:
+        if stream is not None:
+            await stream.close()
 
 # 응답오는 방식 한번에 완성된 문장 보낼수 있는 api
 def call_gpt(prompt: list) -> str:
     try:
         response = client.chat.completions.create(
-            model="gpt-4-1106-preview",
+            model=GPT_MODEL,
             messages=prompt
         )
         return response.choices[0].message.content
@@ -33,25 +120,9 @@ def call_gpt(prompt: list) -> str:
         raise
 
 # 스트리밍 방식으로 gpt 의 api 호출
-async def stream_gpt_response(messages: list):
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4-1106-preview",
-            messages=messages,
-            stream=True
-        )
-        for chunk in response:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
-    except Exception as e:
-        error_msg = str(e)
-        if "401" in error_msg:
-            yield "❌ API 키 인증 실패. 관리자에게 문의하세요."
-        elif "429" in error_msg:
-            yield "❌ 서비스 일시적 과부하. 잠시 후 다시 시도하세요."
-        else:
-            yield "❌ GPT 응답 중 오류 발생"
-        print("❌ GPT 스트리밍 실패:", error_msg)
+async def stream_gpt_response(messages: list, timeout: Optional[float] = None):
+    async for piece in _astream_chat(messages, timeout=timeout):
+        yield piece
 
 
 
@@ -60,14 +131,16 @@ async def stream_gpt_response(messages: list):
 # 클래스 버전 (일기 생성용)
 class GPTClient:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        # 워커 공유 async 클라이언트 사용 (인스턴스마다 커넥션 풀을 만들지 않음)
+        self.client = get_async_client()
 
     # 응답오는 방식 한번에 완성된 문장 보낼수 있는 api
-    async def call_gpt(self, prompt: str) -> str:
+    async def call_gpt(self, prompt: str, timeout: Optional[float] = None) -> str:
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-1106-preview",
-                messages=[{"role": "user", "content": prompt}]
+            response = await self.client.chat.completions.create(
+                model=GPT_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=_make_timeout(timeout),
             )
             return response.choices[0].message.content
         except Exception as e:
@@ -81,22 +154,6 @@ class GPTClient:
             raise
 
     # 스트리밍 방식으로 gpt 의 api 호출
-    async def stream_gpt_response(self, prompt: str):
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-1106-preview",
-                messages=[{"role": "user", "content": prompt}],
-                stream=True
-            )
-            for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
-        except Exception as e:
-            error_msg = str(e)
-            if "401" in error_msg:
-                yield "❌ API 키 인증 실패. 관리자에게 문의하세요."
-            elif "429" in error_msg:
-                yield "❌ 서비스 일시적 과부하. 잠시 후 다시 시도하세요."
-            else:
-                yield "❌ GPT 응답 중 오류 발생"
-            print("❌ GPT 스트리밍 실패:", error_msg) 
\ No newline at end of file
+    async def stream_gpt_response(self, prompt: str, timeout: Optional[float] = None):
+        async for piece in _astream_chat([{"role": "user", "content": prompt}], timeout=timeout):
+            yield piece
@@ -1,19 +1,39 @@
 import os
 import time
-from typing import List
+from typing import Dict, List
 from langchain_huggingface import HuggingFaceEmbeddings
+from app.clients.embedding_batcher import get_embedding_batcher
+from app.clients.embedding_cache import CachedEmbeddings, get_embedding_cache
 
 os.environ["HF_HOME"] = "D:/huggingface_cache"
 
+# torch: HuggingFaceEmbeddings(PyTorch fp32) / onnx: ONNX Runtime (기본 int8 동적 양자화)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+
+
 class HuggingFaceClient:
-    def __init__(self, model_name: str = "jhgan/ko-sroberta-multitask"):
+    def __init__(self, model_name: str = "jhgan/ko-sroberta-multitask", backend: str = EMBED_BACKEND):
         self.model_name = model_name
-        self.emb = HuggingFaceEmbeddings(
-            model_name=model_name,
-            model_kwargs={},  # CPU
-            encode_kwargs={"normalize_embeddings": True}
-        )
-        print(f"[Embed] model={self.model_name} (CPU)")
+        self.backend = backend
+        if backend == "onnx":
+            from app.clients.onnx_embeddings import ONNX_QUANT, OnnxEmbeddings
+            factory = lambda: OnnxEmbeddings(model_name)
+            # 백엔드별 벡터가 미세하게 달라 캐시 키를 분리
+            cache_model = f"{model_name}@onnx-{ONNX_QUANT}"
+        elif backend == "torch":
+            factory = lambda: HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs={},  # CPU
+                encode_kwargs={"normalize_embeddings": True}
+            )
+            cache_model = model_name
+        else:
+            raise ValueError(f"EMBED_BACKEND는 torch/onnx만 지원합니다: {backend}")
+        # 모델은 프로세스당 1개, 동시 요청은 배처가 모아 한 번에 forward
+        self.batcher = get_embedding_batcher(model_name, backend, factory)
+        # 반복 쿼리(인사/단답 등)는 CPU 인코딩 생략 - Chroma도 이 래퍼를 통해 임베딩
+        self.emb = CachedEmbeddings(self.batcher, get_embedding_cache(), cache_model)
+        print(f"[Embed] model={self.model_name} backend={self.backend} (CPU, cached)")
 
     def embed(self, text: str) -> List[float]:
         return self.emb.embed_query(text)
@@ -21,6 +41,12 @@ class HuggingFaceClient:
     def embed_many(self, texts: List[str]) -> List[List[float]]:
         return self.emb.embed_documents(texts)
 
+    def cache_stats(self) -> Dict[str, float]:
+        return self.emb.cache.stats()
+
+    def batcher_stats(self) -> Dict[str, float]:
+        return self.batcher.stats()
+
 if __name__ == "__main__":
     # ✅ 데모/테스트 코드는 전부 여기 안으로
     client = HuggingFaceClient()
@@ -28,6 +54,9 @@ if __name__ == "__main__":
     emb = client.embed("하이 매번 계속수정수정 반복임.")
     print(emb[:10])
     print(f"처리 시간: {time.time() - start:.2f}초")
+    start = time.time()
+    client.embed("하이 매번 계속수정수정 반복임.")
+    print(f"캐시 재조회 시간: {(time.time() - start) * 1000:.3f}ms  stats={client.cache_stats()}")
 
     import numpy as np
     def cos(a, b):
@@ -0,0 +1,281 @@
+# app/clients/onnx_embeddings.py
+"""
+ONNX Runtime 임베딩 백엔드 (EMBED_BACKEND=onnx)
+- ko-sroberta(BERT 계열)를 ONNX로 내보낸 뒤 동적 int8 양자화(가중치 QInt8, 활성값은 실행 시 양자화)
+- sentence-transformers와 같은 후처리: attention mask 가중 mean pooling + L2 정규화
+- 스레드 수(EMBED_ONNX_THREADS), 배치 크기(EMBED_ONNX_BATCH), 기동 시 warm-up
+- 모델 파일이 없으면 최초 1회 export (torch/transformers 필요, 이후 추론은 onnxruntime만 사용)
+  · 여러 워커가 동시에 기동해도 파일 락({모델 디렉터리}.lock) 안에서 1번만 export,
+    임시 디렉터리에 만든 뒤 os.replace로 옮기고 최종 모델 파일을 맨 마지막에 놓음 → 반쯤 쓴 파일을 로드하지 않음
+    {EMBED_ONNX_DIR}/{model 이름}/model.onnx        : fp32 export
+    {EMBED_ONNX_DIR}/{model 이름}/model.int8.onnx   : 동적 양자화 결과
+    {EMBED_ONNX_DIR}/{model 이름}/tokenizer*        : 토크나이저
+
+사용:
+    python -m app.clients.onnx_embeddings export
+    python -m app.clients.onnx_embeddings parity   # PyTorch 백엔드 대비 코사인 일치도 (미달 시 exit 1)
+    python -m app.clients.onnx_embeddings bench    # 1/8/64개 텍스트 지연/처리량 (torch vs onnx)
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.utils.file_lock import FileLock
+
+ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "D:/huggingface_cache/onnx")
+ONNX_QUANT = os.getenv("EMBED_ONNX_QUANT", "int8").lower()  # int8 | fp32
+ONNX_THREADS = int(os.getenv("EMBED_ONNX_THREADS", "0"))  # 0 = onnxruntime 기본(물리 코어 수)
+ONNX_BATCH = int(os.getenv("EMBED_ONNX_BATCH", "32"))
+MAX_LENGTH = 128  # ko-sroberta-multitask max_seq_length
+
+_WARMUP_TEXTS = ["안녕하세요", "오늘 하루는 어땠나요? 회사에서 있었던 일을 이야기해 주세요."]
+
+
+def model_dir(model_name: str, root: str = ONNX_DIR) -> str:
+    return os.path.join(root, model_name.replace("/", "__"))
+
+
+def export_onnx(model_name: str, out_dir: str, *, quantize: bool = True, opset: int = 14) -> str:
+    """
+    transformers 모델 → model.onnx (+ model.int8.onnx). 반환: 사용할 모델 경로
+    - out_dir 옆 임시 디렉터리에서 만든 뒤 토크나이저 → model.onnx → model.int8.onnx 순서로 os.replace
+    - 호출 측이 락을 잡지 않으면 직접 호출하지 말 것 (ensure_onnx_model / export 명령 사용)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".export_", dir=out_dir)
+    try:
+        built = _export_to(model_name, tmp_dir, quantize=quantize, opset=opset)
+        # 최종 모델 파일(ensure_onnx_model이 존재 여부를 보는 파일)은 맨 마지막에 교체
+        for name in sorted(os.listdir(tmp_dir), key=lambda n: built.index(n) + 1 if n in built else 0):
+            os.replace(os.path.join(tmp_dir, name), os.path.join(out_dir, name))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return os.path.join(out_dir, built[-1])
+
+
+def _export_to(model_name: str, out_dir: str, *, quantize: bool, opset: int) -> List[str]:
+    """out_dir에 토크나이저/모델 파일 생성. 반환: 모델 파일 이름 (마지막이 사용할 모델)"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    sample = tokenizer(_WARMUP_TEXTS, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="pt")
+    inputs = tuple(sample[k] for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample)
+    names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    axes = {k: {0: "batch", 1: "seq"} for k in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            inputs,
+            fp32_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False,
+        )
+    print(f"[ONNX] export 완료: {fp32_path}")
+    if not quantize:
+        return ["model.onnx"]
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"[ONNX] int8 동적 양자화 완료: {int8_path}")
+    return ["model.onnx", "model.int8.onnx"]
+
+
+def ensure_onnx_model(model_name: str, root: str = ONNX_DIR, quant: str = ONNX_QUANT) -> str:
+    """
+    양자화 모드에 맞는 모델 경로 (없으면 export)
+    - 파일 락 안에서 다시 확인 → 동시에 뜬 워커 중 1개만 export, 나머지는 끝날 때까지 대기 후 그대로 사용
+    """
+    out_dir = model_dir(model_name, root)
+    path = os.path.join(out_dir, "model.int8.onnx" if quant == "int8" else "model.onnx")
+    if os.path.exists(path):
+        return path
+    with FileLock(out_dir + ".lock"):
+        if not os.path.exists(path):
+            print(f"[ONNX] 모델 없음 → export 시작: {model_name}")
+            export_onnx(model_name, out_dir, quantize=(quant == "int8"))
+    return path
+
+
+class OnnxEmbeddings(Embeddings):
+    """HuggingFaceEmbeddings(normalize_embeddings=True) 대체 (CachedEmbeddings 안쪽에 들어감)"""
+
+    def __init__(
+        self,
+        model_name: str = "jhgan/ko-sroberta-multitask",
+        *,
+        root: str = ONNX_DIR,
+        quant: str = ONNX_QUANT,
+        threads: int = ONNX_THREADS,
+        batch_size: int = ONNX_BATCH,
+        warmup: bool = True,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if quant not in ("int8", "fp32"):
+            raise ValueError(f"EMBED_ONNX_QUANT는 int8/fp32만 지원합니다: {quant}")
+        self.model_name = model_name
+        self.quant = quant
+        self.batch_size = max(1, batch_size)
+        self.model_path = ensure_onnx_model(model_name, root, quant)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self.model_path, opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        # fast tokenizer(tokenizer.json)만 사용 → 추론 시 transformers/torch import 없음
+        self.tokenizer = Tokenizer.from_file(os.path.join(os.path.dirname(self.model_path), "tokenizer.json"))
+        self.tokenizer.enable_truncation(MAX_LENGTH)
+        # RoBERTa 계열은 pad id로 position id를 계산하므로 실제 pad 토큰으로 패딩
+        pad = next((t for t in ("[PAD]", "<pad>") if self.tokenizer.token_to_id(t) is not None), None)
+        if pad is not None:
+            self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad), pad_token=pad)
+        else:
+            self.tokenizer.enable_padding()
+
+        self.stats: Dict[str, float] = {"calls": 0, "texts": 0, "warmup_ms": 0.0}
+        if warmup:
+            self.warmup()
+
+    def warmup(self) -> None:
+        """첫 호출의 그래프 초기화/메모리 할당 비용을 기동 시점으로 당김"""
+        t0 = time.perf_counter()
+        self._encode(_WARMUP_TEXTS)
+        self.stats["warmup_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encs = self.tokenizer.encode_batch(texts)
+        ids = np.asarray([e.ids for e in encs], dtype=np.int64)
+        mask = np.asarray([e.attention_mask for e in encs], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encs], dtype=np.int64)
+        hidden = self.session.run(None, feeds)[0]  # (batch, seq, dim)
+        m = mask[..., None].astype(np.float32)
+        pooled = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # 길이순 정렬 후 배치 → 패딩 낭비 최소화 (결과는 원래 순서로)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        for s in range(0, len(order), self.batch_size):
+            idx = order[s:s + self.batch_size]
+            vecs = self._encode([texts[i] for i in idx])
+            for i, v in zip(idx, vecs):
+                out[i] = v.tolist()
+        self.stats["calls"] += 1
+        self.stats["texts"] += len(texts)
+        return out  # type: ignore[return-value]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+if __name__ == "__main__":
+    import argparse
+    import statistics
+    import sys
+
+    SAMPLES = [
+        "오늘 회사에서 팀장님이랑 의견 충돌이 있었어.",
+        "보온병", "텀블러", "머그컵", "비행기", "동료갈등", "직장갈등",
+        "주말에 친구들이랑 한강에서 자전거 탔는데 날씨가 너무 좋았다.",
+        "요즘 잠을 잘 못 자서 하루 종일 피곤하고 집중이 안 돼.",
+        "엄마가 보내준 반찬으로 저녁을 해결했다",
+        "시험 결과가 생각보다 잘 나와서 기분이 좋아!",
+        "하이 매번 계속수정수정 반복임.",
+        "강아지 산책", "불안", "승진", "야근", "다이어트 실패", "이사 준비",
+        "내일 발표가 있는데 너무 긴장돼서 아무것도 손에 안 잡힌다. 준비는 다 했는데도 계속 불안해.",
+    ]
+
+    def _torch_embeddings(model_name: str):
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name, model_kwargs={}, encode_kwargs={"normalize_embeddings": True})
+
+    def parity(model_name: str, quant: str, threshold: float) -> int:
+        ref = np.asarray(_torch_embeddings(model_name).embed_documents(SAMPLES))
+        onnx = np.asarray(OnnxEmbeddings(model_name, quant=quant).embed_documents(SAMPLES))
+        cos = (ref * onnx).sum(axis=1)
+        # 검색 순위 보존 여부: 쌍별 유사도 행렬의 차이
+        sim_diff = np.abs(ref @ ref.T - onnx @ onnx.T).max()
+        report = {
+            "quant": quant,
+            "texts": len(SAMPLES),
+            "cos_min": round(float(cos.min()), 5),
+            "cos_mean": round(float(cos.mean()), 5),
+            "pairwise_sim_max_abs_diff": round(float(sim_diff), 5),
+            "threshold": threshold,
+        }
+        print(report)
+        return 0 if cos.min() >= threshold else 1
+
+    def bench(model_name: str, quant: str, threads: int, repeats: int) -> None:
+        backends = {"onnx_" + quant: OnnxEmbeddings(model_name, quant=quant, threads=threads)}
+        try:
+            backends["torch"] = _torch_embeddings(model_name)
+        except ImportError:
+            print("torch 백엔드 미설치 - onnx만 측정")
+        texts = (SAMPLES * 4)[:64]
+        report: Dict[str, Dict[str, float]] = {}
+        for name, emb in backends.items():
+            emb.embed_documents(texts[:8])  # warm-up
+            for n in (1, 8, 64):
+                lat = []
+                for r in range(repeats):
+                    batch = texts[:n] if n > 1 else [texts[r % len(texts)]]
+                    t0 = time.perf_counter()
+                    emb.embed_documents(batch)
+                    lat.append((time.perf_counter() - t0) * 1000)
+                p50 = statistics.median(lat)
+                report[f"{name}@{n}"] = {
+                    "p50_ms": round(p50, 2),
+                    "p99_ms": round(sorted(lat)[min(len(lat) - 1, int(0.99 * len(lat)))], 2),
+                    "texts_per_s": round(n / p50 * 1000, 1),
+                }
+        for k, v in report.items():
+            print(k, v)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cmd", choices=["export", "parity", "bench"])
+    parser.add_argument("--model", default="jhgan/ko-sroberta-multitask")
+    parser.add_argument("--quant", default=ONNX_QUANT, choices=["int8", "fp32"])
+    parser.add_argument("--threads", type=int, default=ONNX_THREADS)
+    parser.add_argument("--threshold", type=float, default=0.98)
+    parser.add_argument("--repeats", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        out = model_dir(args.model)
+        with FileLock(out + ".lock"):
+            print(export_onnx(args.model, out, quantize=True))
+    elif args.cmd == "parity":
+        sys.exit(parity(args.model, args.quant, args.threshold))
+    else:
+        bench(args.model, args.quant, args.threads, args.repeats)
@@ -0,0 +1,163 @@
+# app/core/db_offload.py
+"""
+동기 SQLAlchemy 호출을 이벤트 루프 밖(스레드)에서 실행
+- async 엔드포인트/스트림 안에서 DB 조회를 바로 호출하면 느린 쿼리 1개가 같은 워커의
+  모든 스트림/WebSocket 전송을 멈춤 → run_db(fn, ...)로 스레드에서 실행하고 await
+- 동시 실행 수는 DB_OFFLOAD_THREADS로 제한 (커넥션 풀보다 많이 열지 않도록)
+  · Starlette 기본 스레드풀(sync 엔드포인트/의존성용)과 별도 limiter → 서로 잠식하지 않음
+- 느린 호출(DB_SLOW_MS 이상)은 경고 로그, 대기/실행 시간은 db_offload_stats()로 노출
+
+주의: 같은 Session을 두 스레드에서 "동시에" 쓰면 안 됨 (순서대로 await하는 것은 괜찮음)
+
+부하 테스트 (느린 쿼리 1개가 다른 스트림 틱을 얼마나 늦추는지, 인라인 vs run_db):
+    python -m app.core.db_offload --streams 50 --slow-ms 800
+"""
+import functools
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+import anyio
+import anyio.to_thread
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DB_OFFLOAD_THREADS = int(os.getenv("DB_OFFLOAD_THREADS", "10"))
+DB_SLOW_MS = float(os.getenv("DB_SLOW_MS", "200"))
+
+_limiter: Optional[anyio.CapacityLimiter] = None
+_wait_ms: Deque[float] = deque(maxlen=1024)
+_run_ms: Deque[float] = deque(maxlen=1024)
+_stats = {"calls": 0, "errors": 0, "slow": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def _get_limiter() -> anyio.CapacityLimiter:
+    # CapacityLimiter는 실행 중인 이벤트 루프 안에서 만들어야 함 → 첫 호출 시 생성
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(DB_OFFLOAD_THREADS)
+    return _limiter
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """fn(*args, **kwargs)를 DB 전용 스레드 슬롯에서 실행"""
+    call = functools.partial(fn, *args, **kwargs)
+    name = getattr(fn, "__qualname__", repr(fn))
+    enqueued = time.perf_counter()
+
+    def _run():
+        started = time.perf_counter()
+        _wait_ms.append((started - enqueued) * 1000)
+        try:
+            return call()
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            _run_ms.append(elapsed)
+            if elapsed >= DB_SLOW_MS:
+                _stats["slow"] += 1
+                logger.warning(f"DB_SLOW fn={name} ms={elapsed:.1f}")
+
+    _stats["calls"] += 1
+    _stats["in_flight"] += 1
+    _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+    try:
+        return await anyio.to_thread.run_sync(_run, limiter=_get_limiter())
+    except Exception:
+        _stats["errors"] += 1
+        raise
+    finally:
+        _stats["in_flight"] -= 1
+
+
+def _pct(values, q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return round(s[min(len(s) - 1, int(q * len(s)))], 3)
+
+
+def db_offload_stats() -> Dict[str, Any]:
+    wait, run = list(_wait_ms), list(_run_ms)
+    return {
+        "threads": DB_OFFLOAD_THREADS,
+        **_stats,
+        "wait_p50_ms": _pct(wait, 0.5),
+        "wait_p99_ms": _pct(wait, 0.99),
+        "run_p50_ms": _pct(run, 0.5),
+        "run_p99_ms": _pct(run, 0.99),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import statistics
+    import tempfile
+
+    from sqlalchemy import create_engine, text
+
+    def _slow_query(engine, slow_ms: float) -> int:
+        """CPU를 쓰는 재귀 CTE로 slow_ms 정도 걸리는 쿼리 (sqlite는 실행 중 GIL을 놓음)"""
+        with engine.connect() as conn:
+            n = conn.execute(
+                text(
+                    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) "
+                    "SELECT count(*) FROM c"
+                ),
+                {"n": int(slow_ms * 2400)},
+            ).scalar()
+        return n
+
+    async def scenario(engine, streams: int, slow_ms: float, offload: bool) -> Dict[str, float]:
+        """
+        streams개 스트림이 20ms마다 청크를 보냄(틱) + 한 유저 턴이 느린 쿼리 실행
+        지표: 틱 지연(예정 시각 대비 늦어진 정도) - 루프가 막히면 모든 스트림이 같이 늦어짐
+        """
+        tick = 0.02
+        lateness: list = []
+        stop = asyncio.Event()
+
+        async def stream():
+            nxt = time.perf_counter() + tick
+            while not stop.is_set():
+                await asyncio.sleep(max(0.0, nxt - time.perf_counter()))
+                lateness.append((time.perf_counter() - nxt) * 1000)
+                nxt += tick
+
+        async def slow_turn():
+            await asyncio.sleep(0.2)
+            t0 = time.perf_counter()
+            if offload:
+                await run_db(_slow_query, engine, slow_ms)
+            else:
+                _slow_query(engine, slow_ms)  # 기존 방식: async 함수 안에서 바로 호출
+            took = (time.perf_counter() - t0) * 1000
+            await asyncio.sleep(0.2)
+            stop.set()
+            return took
+
+        tasks = [asyncio.create_task(stream()) for _ in range(streams)]
+        took = await slow_turn()
+        await asyncio.gather(*tasks)
+        lateness.sort()
+        return {
+            "slow_query_ms": round(took, 1),
+            "tick_late_p50_ms": round(statistics.median(lateness), 2),
+            "tick_late_p99_ms": round(lateness[int(0.99 * (len(lateness) - 1))], 2),
+            "tick_late_max_ms": round(lateness[-1], 2),
+        }
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--slow-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="db_offload_")
+    engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+    for mode, offload in (("inline", False), ("run_db", True)):
+        print(mode, asyncio.run(scenario(engine, args.streams, args.slow_ms, offload)))
+    print("stats", db_offload_stats())
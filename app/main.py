@@ -1,11 +1,17 @@
 from fastapi import FastAPI
 from app.api.routers.html_router import router as html_router
 from app.api.routers.auth_router import router as register_router
-from app.core.connection import Base, engine
+from app.core.connection import Base, engine, SessionLocal
 from app.api.routers.chat_message_router import router as chat_router
 from app.api.routers.chat_event_router import router as chat_event_router
 from app.api.routers.websocket_router import router as websocket_router
 from app.api.routers.study_router import router as study_router
+from app.api.routers.health_router import router as health_router
+from app.services.retrieval_runtime import retrieval_runtime
+from app.clients.gpt_api import aclose_async_client
+from app.services.notification_publisher import aclose_pools
+from app.services.notification_hub import notification_hub
+from app.services.websocket_service import websocket_service
 import asyncio
 from app.tasks.session_task_runner import session_checker_all_users_loop
 import logging
@@ -13,6 +19,9 @@ from app.models.db.user_model import User  # ✅ 반드시 추가
 from app.models.db.session_log import SessionLog 
 from app.models.db.session_summary import SessionSummary
 from app.models.db.study_model import DiaryAnalysisReport
+from app.models.db.chat_activity_model import DailyChatActivity
+from app.repositories.chat_activity_repository import ChatActivityRepository
+from app.models.db.chat_message_indexes import ensure_chat_message_indexes  # ChatMessage 복합 인덱스 등록
 from transformers import AutoTokenizer , AutoModelForCausalLM
 import torch
 import os
@@ -46,6 +55,20 @@ logging.getLogger("uvicorn.access").setLevel(logging.DEBUG)
 
 
 Base.metadata.create_all(bind=engine) # 클래스 정의생성해서 테이블 만들기
+ensure_chat_message_indexes(engine)  # 기존 DB: ChatMessage 복합 인덱스 중 없는 것만 생성
+
+# 기존 DB: 일별 활동 집계가 비어 있으면 ChatMessage로부터 1회 백필 (조건 체크/채팅 목록이 이 테이블만 읽음)
+_db = SessionLocal()
+try:
+    _n = ChatActivityRepository(_db).backfill_if_empty()
+    if _n:
+        print(f"✅ daily_chat_activity 자동 백필 완료: {_n} rows")
+except Exception as e:
+    # 여러 워커가 동시에 백필하면 한쪽은 PK 충돌로 실패할 수 있음 (다른 워커가 채움)
+    _db.rollback()
+    print(f"⚠️ daily_chat_activity 자동 백필 건너뜀: {e}")
+finally:
+    _db.close()
 
 
 app = FastAPI()
@@ -64,17 +87,33 @@ app.include_router(chat_router)
 app.include_router(chat_event_router)
 app.include_router(websocket_router)
 app.include_router(study_router)
+app.include_router(health_router)
 
 
 @app.on_event("startup")
 async def startup_event():
-    # 모델 로딩 제거 ✅
+    # 검색 스택(임베딩 모델 + 인덱스) 워커당 1회 로딩 + 워밍업
+    # 모델 로딩이 이벤트 루프를 막지 않도록 스레드에서 실행
+    # 실패해도 워커는 계속 뜸 → /health/ready가 503 + last_error로 보고, 첫 검색 요청에서 다시 생성 시도
+    try:
+        await asyncio.to_thread(retrieval_runtime.start)
+    except Exception as e:
+        print(f"❌ 검색 스택 초기화 실패 (ready=false): {e}")
 
     # 세션 체크 백그라운드 실행
     print("🌀 전체 세션 체크 백그라운드 시작")
     asyncio.create_task(session_checker_all_users_loop())
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    retrieval_runtime.shutdown()
+    await aclose_async_client()
+    await websocket_service.close_all()
+    await notification_hub.stop()
+    await aclose_pools()
+
+
 
 # main.py 하단
 for route in app.routes:
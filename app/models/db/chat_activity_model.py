@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Date, DateTime
+from app.core.connection import Base
+
+
+class DailyChatActivity(Base):
+    """
+    (user_id, 날짜)별 채팅 활동 집계 - save_user_message와 같은 트랜잭션에서 갱신
+    - message_count / token_count: user role 메시지 기준 (token = 공백 단위 단어 수)
+    - 조건 체크(일기/격려)는 이 행 하나만 읽음
+    - 행 존재 = 그 날 대화가 있었음 (/chat/list 달력), assistant 메시지만 있는 날은 카운트 0 행
+    """
+    __tablename__ = "daily_chat_activity"
+
+    user_id = Column(Integer, primary_key=True)
+    activity_date = Column(Date, primary_key=True)
+    message_count = Column(Integer, nullable=False, default=0)
+    token_count = Column(Integer, nullable=False, default=0)
+    last_message_at = Column(DateTime, nullable=True)
@@ -0,0 +1,194 @@
+# app/models/db/chat_message_indexes.py
+"""
+ChatMessage 핫 쿼리용 복합 인덱스 + 마이그레이션 + 쿼리 플랜 회귀 체크
+- 이 모듈을 import하면 Index가 ChatMessage.__table__에 붙음 → 새 DB는 create_all로 같이 생성
+- 기존 DB는 ensure_chat_message_indexes(engine) (앱 시작 시 호출, 있으면 건너뜀)
+
+접근 경로 → 인덱스
+- build_chat_prompt (user_id, session_id, turn, role) / save_user_message (user_id, session_id) ORDER BY turn DESC
+  / 세션 요약 (user_id, session_id, role) ORDER BY turn            → (user_id, session_id, turn, role)
+- 오늘 role별 채팅 (user_id, role, timestamp >= today)             → (user_id, role, timestamp)
+- /chat/history, 오늘 전체 채팅 (user_id, timestamp 범위)          → (user_id, timestamp)
+
+플랜 회귀 체크 (sqlite 임시 DB에 데이터를 늘려가며 EXPLAIN QUERY PLAN, 풀스캔/관리 인덱스 미사용이면 exit 1):
+    python -m app.models.db.chat_message_indexes check --rows 1000 50000
+기존 DB에 인덱스 생성:
+    python -m app.models.db.chat_message_indexes migrate
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Index, case, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from app.models.db.chat_message_model import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+_T = ChatMessage.__tablename__
+
+CHAT_MESSAGE_INDEXES: List[Index] = [
+    Index(f"ix_{_T}_user_session_turn", ChatMessage.user_id, ChatMessage.session_id, ChatMessage.turn, ChatMessage.role),
+    Index(f"ix_{_T}_user_role_ts", ChatMessage.user_id, ChatMessage.role, ChatMessage.timestamp),
+    Index(f"ix_{_T}_user_ts", ChatMessage.user_id, ChatMessage.timestamp),
+]
+
+
+def ensure_chat_message_indexes(engine: Engine) -> List[str]:
+    """없는 인덱스만 생성 (checkfirst) → 생성한 인덱스 이름 목록"""
+    insp = inspect(engine)
+    existing = {ix["name"] for ix in insp.get_indexes(_T)} if insp.has_table(_T) else set()
+    created = []
+    for index in CHAT_MESSAGE_INDEXES:
+        if index.name in existing:
+            continue
+        index.create(bind=engine, checkfirst=True)
+        created.append(index.name)
+        logger.info(f"✅ 인덱스 생성: {index.name}")
+    return created
+
+
+# ---------- 핫 쿼리 (라우터/서비스/레포지토리와 같은 필터·정렬) ----------
+def hot_queries(user_id: int, session_id: str, turn: int, today: date) -> Dict[str, object]:
+    day_start = datetime.combine(today, datetime.min.time())
+    day_end = datetime.combine(today, datetime.max.time())
+    return {
+        "build_chat_prompt.user_message": select(ChatMessage).where(
+            ChatMessage.user_id == user_id,
+            ChatMessage.session_id == session_id,
+            ChatMessage.turn == turn,
+            ChatMessage.role == "user",
+        ).limit(1),
+        "build_chat_prompt.session_log": select(ChatMessage).where(
+            ChatMessage.user_id == user_id,
+            ChatMessage.session_id == session_id,
+            ChatMessage.turn < turn,
+        ).order_by(
+            ChatMessage.turn.asc(),
+            case((ChatMessage.role == "user", 0), else_=1),
+            ChatMessage.timestamp.asc(),
+            ChatMessage.id.asc(),
+        ),
+        "save_user_message.latest_turn": select(ChatMessage).where(
+            ChatMessage.user_id == user_id,
+            ChatMessage.session_id == session_id,
+        ).order_by(ChatMessage.turn.desc()).limit(1),
+        "today_repo.by_role": select(ChatMessage).where(
+            ChatMessage.user_id == user_id,
+            ChatMessage.role == "user",
+            ChatMessage.timestamp >= today,
+        ).order_by(ChatMessage.timestamp.asc()),
+        "today_repo.all": select(ChatMessage).where(
+            ChatMessage.user_id == user_id,
+            ChatMessage.timestamp >= today,
+        ).order_by(ChatMessage.timestamp.asc()),
+        "today_repo.session_user_chats": select(ChatMessage).where(
+            ChatMessage.user_id == user_id,
+            ChatMessage.session_id == session_id,
+            ChatMessage.role == "user",
+        ).order_by(ChatMessage.turn.asc()),
+        "chat_history.day": select(ChatMessage).where(
+            ChatMessage.user_id == user_id,
+            ChatMessage.timestamp >= day_start,
+            ChatMessage.timestamp <= day_end,
+        ).order_by(ChatMessage.timestamp.asc()),
+    }
+
+
+def explain_plans(engine: Engine, queries: Dict[str, object]) -> Dict[str, List[str]]:
+    """sqlite EXPLAIN QUERY PLAN의 detail 줄 목록 (쿼리 이름별)"""
+    plans = {}
+    with engine.connect() as conn:
+        for name, stmt in queries.items():
+            compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+            rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+            plans[name] = [row[-1] for row in rows]
+    return plans
+
+
+def plan_regressions(plans: Dict[str, List[str]]) -> List[Tuple[str, str]]:
+    """
+    - ChatMessage 풀스캔 ("SCAN <table>" 뒤에 USING ... INDEX가 없는 것)
+    - 관리 인덱스를 쓰지 않는 쿼리 (user_id 단일 인덱스만 타면 유저 히스토리 전체를 훑음 → 데이터가 늘수록 느려짐)
+    """
+    managed = {index.name for index in CHAT_MESSAGE_INDEXES}
+    bad = []
+    for name, details in plans.items():
+        for detail in details:
+            words = detail.split()
+            if words[:2] == ["SCAN", _T] and "INDEX" not in words:
+                bad.append((name, detail))
+        if not any(word in managed for detail in details for word in detail.split()):
+            bad.append((name, "관리 인덱스 미사용: " + " | ".join(details)))
+    return bad
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import random
+    import sys
+    import tempfile
+
+    from sqlalchemy import create_engine, insert
+
+    def seed(engine: Engine, rows: int, users: int = 50) -> Tuple[int, str, int]:
+        """users명 × 세션(하루 몇 개) × 턴(user/assistant 2행) 형태의 가짜 대화"""
+        rng = random.Random(0)
+        now = datetime.now().replace(microsecond=0)
+        batch, sample = [], None
+        per_user = max(2, rows // users)
+        for uid in range(1, users + 1):
+            n, day = 0, 0
+            while n < per_user:
+                sid = f"s{uid}-{day}"
+                base = now - timedelta(days=day, minutes=rng.randint(0, 600))
+                for t in range(1, rng.randint(3, 12)):
+                    for role in ("user", "assistant"):
+                        batch.append({
+                            "user_id": uid, "session_id": sid, "role": role, "turn": t,
+                            "message": f"메시지 {uid}-{day}-{t}", "timestamp": base + timedelta(seconds=t * 30),
+                        })
+                        n += 1
+                if sample is None:
+                    sample = (uid, sid, 2)
+                day += 1
+        with engine.begin() as conn:
+            conn.execute(insert(ChatMessage.__table__), batch)
+            conn.execute(text("ANALYZE"))
+        return sample
+
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("check", help="임시 sqlite DB에 데이터를 채워 핫 쿼리 플랜 확인")
+    c.add_argument("--rows", type=int, nargs="+", default=[1000, 50000])
+    c.add_argument("--no-index", action="store_true", help="인덱스 없이 (비교용)")
+    sub.add_parser("migrate", help="설정된 DB에 누락된 인덱스 생성")
+    args = parser.parse_args()
+
+    if args.cmd == "migrate":
+        from app.core.connection import engine as app_engine
+        print({"created": ensure_chat_message_indexes(app_engine)})
+        sys.exit(0)
+
+    failed = False
+    for rows in args.rows:
+        path = os.path.join(tempfile.mkdtemp(prefix="chat_idx_"), "plan.db")
+        engine = create_engine(f"sqlite:///{path}")
+        ChatMessage.__table__.create(engine)  # 모듈 import로 붙은 인덱스까지 생성됨
+        if args.no_index:
+            with engine.begin() as conn:
+                for index in CHAT_MESSAGE_INDEXES:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        uid, sid, turn = seed(engine, rows)
+        plans = explain_plans(engine, hot_queries(uid, sid, turn, date.today()))
+        bad = plan_regressions(plans)
+        print(f"== rows={rows} regressions={len(bad)}")
+        for name, details in plans.items():
+            print(f"  {name}: {' | '.join(details)}")
+        for name, detail in bad:
+            print(f"  ❌ {name}: {detail}")
+        failed = failed or bool(bad)
+        engine.dispose()
+    sys.exit(1 if failed else 0)
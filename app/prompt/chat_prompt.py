@@ -8,7 +8,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.models.db.chat_message_model import ChatMessage
 from app.models.db.session_summary import GPTSessionSummary
-from app.services.hybrid_memory_service import HybridMemoryService
+from app.services.retrieval_runtime import get_hybrid_memory_service
+from app.core.db_offload import run_db
 from sqlalchemy import and_, or_
 from app.models.db.chat_message_model import ChatMessage
 from app.models.db.session_summary import GPTSessionSummary
@@ -95,51 +96,66 @@ def _select_sessions_by_bucket(rows: List[Dict[str, Any]], need: int = 4) -> Dic
     return {"high": high_fin, "middle": mid_fin, "low": low_fin, "picked": picked}
 
 # -------------------- 프롬프트 빌더 --------------------
-def build_chat_prompt(
-    db: Session,
-    user_id: int,
-    turn: int,
-    session_id: str
-):
-    yymmdd = session_id.split('_')[0]
-
-    # 1) 최근 유저 메시지(원문/전처리)
+# DB 조회(_load_*)와 하이브리드 검색을 분리 → async 경로는 DB 조회만 run_db 슬롯에서,
+# 검색(임베딩 + 검색 스레드풀)은 ahybrid_retrieve로 따로 실행 (DB limiter를 검색 시간 동안 잡지 않음)
+def _load_user_query(db: Session, user_id: int, turn: int, session_id: str) -> str:
+    """1) 최근 유저 메시지 원문"""
     user_message = db.query(ChatMessage).filter(
         ChatMessage.user_id == user_id,
         ChatMessage.session_id == session_id,
         ChatMessage.turn == turn,
         ChatMessage.role == "user"
     ).first()
+    return user_message.message if user_message else ""
 
-    user_query_raw = user_message.message if user_message else ""
-    user_query = _preprocess_query(user_query_raw)  # 검색용
-
-    # 2) 하이브리드 검색
-    hybrid = HybridMemoryService()
-    retrieved = hybrid.hybrid_retrieve(
-        user_query=user_query,
-        user_id=user_id,
-        yymmdd=yymmdd,
-        top_k=12,
-    )
-
-    # 3) 버킷 규칙으로 최종 4개 선정
-    chosen = _select_sessions_by_bucket(retrieved, need=4)
-    picked = chosen["picked"]
 
-    # 4) 선정된 세션들의 summary DB 조회
-    session_ids = [r["session_id"] for r in picked]
+def _load_prompt_context(
+    db: Session,
+    user_id: int,
+    turn: int,
+    session_id: str,
+    picked_session_ids: List[str],
+):
+    """4) 선정된 세션 summary + 5.5) 현재 활성 세션 대화 로그 → (summaries, session_msgs)"""
     summaries: Dict[str, str] = {}
-    if session_ids:
+    if picked_session_ids:
         rows = db.query(GPTSessionSummary).filter(
             and_(
                 GPTSessionSummary.user_id == user_id,
-                GPTSessionSummary.session_id.in_(session_ids)
+                GPTSessionSummary.session_id.in_(picked_session_ids)
             )
         ).all()
         for row in rows:
             summaries[row.session_id] = row.summary
 
+    # - 중복 방지: 현재 turn 이전까지의 메시지만 넣음
+    today_chats = (
+        db.query(ChatMessage)
+        .filter(
+            ChatMessage.user_id == user_id,
+            ChatMessage.session_id == session_id,
+            ChatMessage.turn < turn,         # 현재 턴 중복 방지 (원하면 제거)
+        )
+        .order_by(
+            ChatMessage.turn.asc(),
+            case((ChatMessage.role == "user", 0), else_=1),  # user 먼저
+            ChatMessage.timestamp.asc(),                     # 타이브레이커
+            ChatMessage.id.asc(),                            # 최종 안정화
+        )
+        .all()
+    )
+    session_msgs = [{"role": chat.role, "content": chat.message} for chat in today_chats]
+    return summaries, session_msgs
+
+
+def _assemble_prompt(
+    session_id: str,
+    yymmdd: str,
+    user_query_raw: str,
+    chosen: Dict[str, List[Dict[str, Any]]],
+    summaries: Dict[str, str],
+    active_session_msgs: List[Dict[str, str]],
+):
     # 5) 컨텍스트 블록 구성
     def _fmt_block(tag: str, sess_id: str, text: str) -> str:
         return f"[가능성_{tag}] (session={sess_id}) {text}"
@@ -164,24 +180,6 @@ def build_chat_prompt(
 
     context_str = "\n".join(blocks)
 
-    # 5.5) 현재 활성 세션의 대화 로그(시간순) 추가
-    # - 중복 방지: 현재 turn 이전까지의 메시지만 넣음
-    today_chats = (
-        db.query(ChatMessage)
-        .filter(
-            ChatMessage.user_id == user_id,
-            ChatMessage.session_id == session_id,
-            ChatMessage.turn < turn,         # 현재 턴 중복 방지 (원하면 제거)
-        )
-        .order_by(
-            ChatMessage.turn.asc(),
-            case((ChatMessage.role == "user", 0), else_=1),  # user 먼저
-            ChatMessage.timestamp.asc(),                     # 타이브레이커
-            ChatMessage.id.asc(),                            # 최종 안정화
-        )
-        .all()
-    )
-
     active_session_header = {
         "role": "system",
         "content": (
@@ -190,7 +188,6 @@ def build_chat_prompt(
             f"- 아래는 시간순 대화입니다(가장 과거 → 최신)."
         )
     }
-    active_session_msgs = [{"role": chat.role, "content": chat.message} for chat in today_chats]
 
     # 6) 최종 프롬프트 조립
     prompt_messages = [
@@ -212,4 +209,63 @@ def build_chat_prompt(
     ]
 
     print(f"✔️ gpt_기억으로 하는prompt 구성 : {prompt_messages}")
-    return prompt_messages
\ No newline at end of file
+    return prompt_messages
+
+
+def build_chat_prompt(
+    db: Session,
+    user_id: int,
+    turn: int,
+    session_id: str
+):
+    """동기 경로 (스레드/Celery 등). async 엔드포인트는 abuild_chat_prompt 사용"""
+    yymmdd = session_id.split('_')[0]
+
+    user_query_raw = _load_user_query(db, user_id, turn, session_id)
+    user_query = _preprocess_query(user_query_raw)  # 검색용
+
+    # 2) 하이브리드 검색 (워커 공유 인스턴스 - 매 턴 모델 재로딩 방지)
+    hybrid = get_hybrid_memory_service()
+    retrieved = hybrid.hybrid_retrieve(
+        user_query=user_query,
+        user_id=user_id,
+        yymmdd=yymmdd,
+        top_k=12,
+    )
+
+    # 3) 버킷 규칙으로 최종 4개 선정
+    chosen = _select_sessions_by_bucket(retrieved, need=4)
+    summaries, session_msgs = _load_prompt_context(
+        db, user_id, turn, session_id, [r["session_id"] for r in chosen["picked"]]
+    )
+    return _assemble_prompt(session_id, yymmdd, user_query_raw, chosen, summaries, session_msgs)
+
+
+async def abuild_chat_prompt(
+    db: Session,
+    user_id: int,
+    turn: int,
+    session_id: str
+):
+    """
+    async 경로: DB 조회 2번만 run_db(DB 전용 슬롯), 하이브리드 검색은 ahybrid_retrieve(별도 스레드)
+    - 같은 Session을 순서대로만 사용 (동시 사용 없음)
+    """
+    yymmdd = session_id.split('_')[0]
+
+    user_query_raw = await run_db(_load_user_query, db, user_id, turn, session_id)
+    user_query = _preprocess_query(user_query_raw)
+
+    hybrid = get_hybrid_memory_service()
+    retrieved = await hybrid.ahybrid_retrieve(
+        user_query=user_query,
+        user_id=user_id,
+        yymmdd=yymmdd,
+        top_k=12,
+    )
+
+    chosen = _select_sessions_by_bucket(retrieved, need=4)
+    summaries, session_msgs = await run_db(
+        _load_prompt_context, db, user_id, turn, session_id, [r["session_id"] for r in chosen["picked"]]
+    )
+    return _assemble_prompt(session_id, yymmdd, user_query_raw, chosen, summaries, session_msgs)
@@ -0,0 +1,189 @@
+import argparse
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.db.chat_activity_model import DailyChatActivity
+from app.models.db.chat_message_model import ChatMessage
+
+
+def count_message_tokens(message: str) -> int:
+    """토큰 수 계산 (기존과 동일하게 간단히 단어 수로 계산)"""
+    return len((message or "").split())
+
+
+class ChatActivityRepository:
+    """
+    [데이터접근] 일별 채팅 활동 집계(DailyChatActivity)
+    - record_user_message: 메시지 INSERT와 같은 트랜잭션에서 원자적 증가 (commit은 호출 측)
+    - touch_day: assistant 메시지 등 집계에 안 잡히는 메시지도 그 날짜 행은 있도록 (없을 때만 0으로 생성)
+    - get_day / get_today_token_total: PK 단건 조회 O(1)
+    - list_active_dates: 유저의 대화 날짜 목록 (/chat/list) - PK 범위 조회, 비용은 날짜 수에 비례
+    - rebuild: ChatMessage로부터 재계산 (백필/보정용)
+    - backfill_if_empty: 집계 테이블이 비어 있고 메시지는 있으면 전체 rebuild (앱 시작 시 자동 백필)
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_user_message(self, user_id: int, message: str, timestamp: datetime) -> None:
+        tokens = count_message_tokens(message)
+        values = {
+            "user_id": user_id,
+            "activity_date": timestamp.date(),
+            "message_count": 1,
+            "token_count": tokens,
+            "last_message_at": timestamp,
+        }
+        table = DailyChatActivity.__table__
+        dialect = self.db.get_bind().dialect.name
+
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.activity_date],
+                set_={
+                    "message_count": table.c.message_count + 1,
+                    "token_count": table.c.token_count + tokens,
+                    "last_message_at": stmt.excluded.last_message_at,
+                },
+            )
+            self.db.execute(stmt)
+            return
+
+        # 그 외 DB: 행 잠금 후 갱신
+        row = (
+            self.db.query(DailyChatActivity)
+            .filter(
+                DailyChatActivity.user_id == user_id,
+                DailyChatActivity.activity_date == values["activity_date"],
+            )
+            .with_for_update()
+            .first()
+        )
+        if row:
+            row.message_count += 1
+            row.token_count += tokens
+            row.last_message_at = timestamp
+        else:
+            self.db.add(DailyChatActivity(**values))
+
+    def touch_day(self, user_id: int, timestamp: datetime) -> None:
+        """(user_id, 날짜) 행이 없으면 카운트 0으로 생성, 있으면 그대로 (commit은 호출 측)"""
+        values = {
+            "user_id": user_id,
+            "activity_date": timestamp.date(),
+            "message_count": 0,
+            "token_count": 0,
+        }
+        table = DailyChatActivity.__table__
+        dialect = self.db.get_bind().dialect.name
+
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(**values).on_conflict_do_nothing(
+                index_elements=[table.c.user_id, table.c.activity_date]
+            )
+            self.db.execute(stmt)
+            return
+
+        if self.db.get(DailyChatActivity, (user_id, values["activity_date"])) is None:
+            self.db.add(DailyChatActivity(**values))
+
+    def get_day(self, user_id: int, day: date) -> Optional[DailyChatActivity]:
+        return self.db.get(DailyChatActivity, (user_id, day))
+
+    def get_token_total(self, user_id: int, day: date) -> int:
+        row = self.get_day(user_id, day)
+        return row.token_count if row else 0
+
+    def list_active_dates(self, user_id: int, limit: Optional[int] = None, before: Optional[date] = None) -> List[date]:
+        """대화가 있는 날짜 (최신순) - before(미포함) 이전부터 limit개, 커서 페이징용"""
+        q = self.db.query(DailyChatActivity.activity_date).filter(DailyChatActivity.user_id == user_id)
+        if before is not None:
+            q = q.filter(DailyChatActivity.activity_date < before)
+        q = q.order_by(DailyChatActivity.activity_date.desc())
+        if limit is not None:
+            q = q.limit(limit)
+        return [row[0] for row in q.all()]
+
+    def backfill_if_empty(self) -> int:
+        """
+        기존 DB에 집계 테이블만 새로 생긴 경우 → 조건 체크가 0 토큰, /chat/list가 빈 목록이 되지 않도록 1회 백필
+        반환: 기록한 행 수 (이미 채워져 있거나 메시지가 없으면 0)
+        """
+        if self.db.query(DailyChatActivity.user_id).first() is not None:
+            return 0
+        if self.db.query(ChatMessage.id).first() is None:
+            return 0
+        return self.rebuild()
+
+    def rebuild(self, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        """
+        ChatMessage로부터 [start, end] 구간 집계를 다시 만든다 (None이면 전체)
+        - 카운트/토큰은 user role만, assistant 메시지만 있는 날짜도 행(카운트 0)은 생성 (/chat/list용)
+        - 운영 중 실행 시 실행 도중 들어온 메시지는 다음 rebuild 또는 증가분으로 반영됨
+        - 반환: 기록한 (user, 날짜) 행 수
+        """
+        q = self.db.query(ChatMessage.user_id, ChatMessage.timestamp, ChatMessage.message, ChatMessage.role)
+        if start is not None:
+            q = q.filter(ChatMessage.timestamp >= datetime.combine(start, datetime.min.time()))
+        if end is not None:
+            q = q.filter(ChatMessage.timestamp < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+        agg: Dict[Tuple[int, date], list] = defaultdict(lambda: [0, 0, None])
+        for user_id, ts, message, role in q.yield_per(5000):
+            cur = agg[(user_id, ts.date())]
+            if role != "user":
+                continue
+            cur[0] += 1
+            cur[1] += count_message_tokens(message)
+            if cur[2] is None or ts > cur[2]:
+                cur[2] = ts
+
+        d = self.db.query(DailyChatActivity)
+        if start is not None:
+            d = d.filter(DailyChatActivity.activity_date >= start)
+        if end is not None:
+            d = d.filter(DailyChatActivity.activity_date <= end)
+        d.delete(synchronize_session=False)
+
+        self.db.bulk_insert_mappings(DailyChatActivity, [
+            {
+                "user_id": user_id,
+                "activity_date": day,
+                "message_count": cnt,
+                "token_count": tokens,
+                "last_message_at": last_at,
+            }
+            for (user_id, day), (cnt, tokens, last_at) in agg.items()
+        ])
+        self.db.commit()
+        return len(agg)
+
+
+if __name__ == "__main__":
+    # 백필: python -m app.repositories.chat_activity_repository [--start 2025-01-01] [--end 2025-01-31]
+    from app.core.connection import Base, engine, SessionLocal
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start", type=date.fromisoformat, default=None)
+    parser.add_argument("--end", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[DailyChatActivity.__table__])
+    db = SessionLocal()
+    try:
+        n = ChatActivityRepository(db).rebuild(args.start, args.end)
+        print(f"✅ daily_chat_activity 재계산 완료: {n} rows")
+    finally:
+        db.close()
@@ -1,29 +1,95 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
 from app.models.db.chat_message_model import ChatMessage
 from app.models.db.study_model import DiaryReport
-from sqlalchemy import func
+from app.models.db.chat_activity_model import DailyChatActivity
+from sqlalchemy import func, select, exists
+from sqlalchemy.orm import Session
 from datetime import datetime, date
-from app.core.connection import get_db
+from app.core.connection import SessionLocal
 from app.utils.time_utils import get_kst_now
+from app.repositories.chat_activity_repository import ChatActivityRepository
 
 class TodayChatMessageRepository:
+    """
+    [데이터접근] 오늘 채팅/일기 조회
+    - TodayChatMessageRepository(db): 호출 측 세션 사용 (요청/태스크 단위, close·commit은 호출 측)
+    - TodayChatMessageRepository(): with repo.scope(): 블록 안의 호출은 세션 1개 공유,
+      블록 밖 단독 호출은 기존처럼 메서드마다 세션을 열고 닫음
+    - get_diary_eligibility: 일기 존재 여부 + 오늘 토큰 합계를 SQL 1회로 조회
+    """
+
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+        self._scoped: Optional[Session] = None
+
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        if self.db is not None:
+            yield self.db
+            return
+        if self._scoped is not None:
+            yield self._scoped
+            return
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def scope(self) -> Iterator["TodayChatMessageRepository"]:
+        """블록 안의 메서드 호출이 세션 1개를 공유 (주입된 세션이 있으면 그대로 사용)"""
+        if self.db is not None or self._scoped is not None:
+            yield self
+            return
+        self._scoped = SessionLocal()
+        try:
+            yield self
+        finally:
+            self._scoped.close()
+            self._scoped = None
+
+    def get_diary_eligibility(self, user_id: int, source_type: str = 'ai') -> Tuple[bool, int]:
+        """
+        (오늘 source_type 일기 존재 여부, 오늘 user 채팅 토큰 합계) - 스칼라 서브쿼리 2개를 SELECT 1번으로
+        check_today_diary_by_source + get_today_user_token_total 조합과 같은 결과
+        """
+        with self._session() as db:
+            today = get_kst_now().date()
+            diary_exists = exists().where(
+                DiaryReport.user_id == user_id,
+                DiaryReport.source_type == source_type,
+                func.date(DiaryReport.timestamp) == today,
+            )
+            token_total = (
+                select(DailyChatActivity.token_count)
+                .where(
+                    DailyChatActivity.user_id == user_id,
+                    DailyChatActivity.activity_date == today,
+                )
+                .scalar_subquery()
+            )
+            row = db.execute(
+                select(diary_exists.label("diary_exists"), func.coalesce(token_total, 0).label("token_total"))
+            ).one()
+            return bool(row.diary_exists), int(row.token_total or 0)
+
     def get_today_chats(self, user_id: int):
         """오늘 날짜의 채팅 데이터를 role 구분하여 조회"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             today = get_kst_now().date()
             chats = db.query(ChatMessage).filter(
                 ChatMessage.user_id == user_id,
                 ChatMessage.timestamp >= today
             ).order_by(ChatMessage.timestamp.asc()).all()
             return chats
-        finally:
-            db.close()
 
 
     def diary_get_today_user_chat_and_tokens(self, user_id: int):
         """오늘의 user 채팅만 가져와서 포맷팅하고 토큰 수 계산"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             today = get_kst_now().date()
             # user role만 조회
             user_chats = db.query(ChatMessage).filter(
@@ -40,14 +106,18 @@ class TodayChatMessageRepository:
             total_tokens = sum(len(chat.message.split()) for chat in user_chats)
             
             return formatted_chats, total_tokens
-        finally:
-            db.close()
+
+
+    def get_today_user_token_total(self, user_id: int) -> int:
+        """오늘 user 채팅 토큰 수 - 일별 집계 단건 조회 (메시지 전체 로딩 없음)"""
+        with self._session() as db:
+            today = get_kst_now().date()
+            return ChatActivityRepository(db).get_token_total(user_id, today)
 
     
     def get_today_chats_by_role(self, user_id: int, role: str):
         """특정 role의 오늘 채팅 데이터 조회"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             today = get_kst_now().date()
             chats = db.query(ChatMessage).filter(
                 ChatMessage.user_id == user_id,
@@ -55,13 +125,10 @@ class TodayChatMessageRepository:
                 ChatMessage.timestamp >= today
             ).order_by(ChatMessage.timestamp.asc()).all()
             return chats
-        finally:
-            db.close()
     
     def get_today_all_chats_formatted(self, user_id: int):
         """오늘의 모든 채팅을 role 구분하여 포맷팅"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             today = get_kst_now().date()
             chats = db.query(ChatMessage).filter(
                 ChatMessage.user_id == user_id,
@@ -73,13 +140,10 @@ class TodayChatMessageRepository:
                 formatted_chats.append(f"{chat.role}: {chat.message}")
             
             return formatted_chats
-        finally:
-            db.close()
     
     def get_today_user_chat_content_and_tokens(self, user_id: int) -> tuple[str, int]:
         """오늘 날짜의 user 채팅 내용을 합치고 토큰 수 계산"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             today = get_kst_now().date()
             # user role만 조회
             user_chats = db.query(ChatMessage).filter(
@@ -95,15 +159,12 @@ class TodayChatMessageRepository:
             total_tokens = sum(len(chat.message.split()) for chat in user_chats)
             
             return combined_content, total_tokens
-        finally:
-            db.close()
     
 
     
     def check_today_diary(self, user_id: int) -> bool:
         """오늘 생성된 일기가 있는지 확인"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             today = get_kst_now().date()
             existing_diary = (
                 db.query(DiaryReport)
@@ -114,13 +175,10 @@ class TodayChatMessageRepository:
                 .first()
             )
             return existing_diary is not None
-        finally:
-            db.close()
     
     def get_today_chat_count(self, user_id: int) -> int:
         """오늘 채팅 수 조회"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             today = get_kst_now().date()
             chat_count = (
                 db.query(ChatMessage)
@@ -131,15 +189,12 @@ class TodayChatMessageRepository:
                 .count()
             )
             return chat_count
-        finally:
-            db.close()
 
 
 
     def check_today_diary_by_source(self, user_id: int, source_type: str) -> bool:
         """특정 source_type의 오늘 일기 존재 여부 확인"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             today = get_kst_now().date()
             existing_diary = (
                 db.query(DiaryReport)
@@ -151,13 +206,10 @@ class TodayChatMessageRepository:
                 .first()
             )
             return existing_diary is not None
-        finally:
-            db.close()
     
     def get_user_diaries(self, user_id: int):
         """사용자의 모든 일기 조회 (최신순)"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             diaries = (
                 db.query(DiaryReport)
                 .filter(DiaryReport.user_id == user_id)
@@ -165,13 +217,10 @@ class TodayChatMessageRepository:
                 .all()
             )
             return diaries
-        finally:
-            db.close() 
 
     def today_session_user_chats_formatted(self, user_id: int, session_id: str):
         """특정 세션의 user 채팅만 포맷팅"""
-        db = next(get_db())
-        try:
+        with self._session() as db:
             user_chats = db.query(ChatMessage).filter(
                 ChatMessage.user_id == user_id,
                 ChatMessage.session_id == session_id,
@@ -183,9 +232,3 @@ class TodayChatMessageRepository:
                 formatted_chats.append(chat.message)  # role 제거, 메시지만 추가
             
             return formatted_chats
-        finally:
-            db.close()
-
-
-
-
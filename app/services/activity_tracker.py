@@ -0,0 +1,70 @@
+# app/services/activity_tracker.py
+"""
+유저 활동(dirty set) 추적
+- save_user_message가 메시지 저장 시 유저를 dirty set에 추가
+- Celery 주기 체크는 직전 tick 이후 활동한 유저만 꺼내서(pop) 평가
+- 체크 종류(diary / encourage)마다 독립 set → 한쪽이 꺼내가도 다른 쪽은 그대로
+"""
+import logging
+import os
+from datetime import date
+from typing import Iterable, List
+
+from app.services.notification_publisher import get_redis as _redis
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KINDS = ("diary", "encourage")
+# 예외로 실패한 유저의 하루 최대 재등록 횟수 (넘으면 새 채팅/전체 스윕 때만 재평가)
+DIRTY_MAX_REQUEUE = int(os.getenv("DIRTY_MAX_REQUEUE", "3"))
+
+
+def dirty_key(kind: str) -> str:
+    return f"dirty_users:{kind}"
+
+
+def mark_user_active(user_id: int) -> None:
+    """메시지 저장 직후 호출 - 실패해도 채팅 흐름은 막지 않음 (정합성은 전체 스윕이 보정)"""
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for kind in DIRTY_KINDS:
+            pipe.sadd(dirty_key(kind), user_id)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"dirty set 기록 실패: user_id={user_id}, error={e}")
+
+
+def pop_dirty_users(kind: str) -> List[int]:
+    """해당 kind의 dirty 유저를 원자적으로 꺼내고 비움 (MULTI: SMEMBERS + DEL)"""
+    pipe = _redis().pipeline(transaction=True)
+    pipe.smembers(dirty_key(kind))
+    pipe.delete(dirty_key(kind))
+    members, _ = pipe.execute()
+    return sorted(int(m) for m in members)
+
+
+def requeue_users(kind: str, user_ids: Iterable[int]) -> None:
+    """
+    평가 실패 유저를 다음 tick에 다시 보도록 되돌려 놓음
+    - 유저별 당일 재등록 횟수를 Redis 해시(dirty_requeue:{kind}:{날짜}, 2일 TTL)로 세고
+      DIRTY_MAX_REQUEUE를 넘으면 재등록하지 않음 → 계속 실패하는 유저가 매 tick 재시도되지 않게
+    """
+    ids = list(user_ids)
+    if not ids:
+        return
+    try:
+        r = _redis()
+        attempts_key = f"dirty_requeue:{kind}:{date.today().isoformat()}"
+        pipe = r.pipeline(transaction=False)
+        for uid in ids:
+            pipe.hincrby(attempts_key, uid, 1)
+        pipe.expire(attempts_key, 2 * 24 * 3600)
+        counts = pipe.execute()[:len(ids)]
+        retry = [uid for uid, n in zip(ids, counts) if n <= DIRTY_MAX_REQUEUE]
+        gave_up = [uid for uid, n in zip(ids, counts) if n > DIRTY_MAX_REQUEUE]
+        if retry:
+            r.sadd(dirty_key(kind), *retry)
+        if gave_up:
+            logger.warning(f"재등록 한도 초과({DIRTY_MAX_REQUEUE}회/일): kind={kind}, user_ids={gave_up}")
+    except Exception as e:
+        logger.warning(f"dirty set 재등록 실패: kind={kind}, user_ids={ids}, error={e}")
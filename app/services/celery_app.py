@@ -9,8 +9,8 @@ from app.models.db.user_model import User
 from app.models.db.study_model import DiaryAnalysisReport, EncouragementReport
 from app.services.diary_analysis_service import DiaryAnalysisService
 from app.services.encourage_diary_service import EncourageDiaryService
-from app.config.settings import settings
-import redis
+from app.services.activity_tracker import pop_dirty_users, requeue_users
+from app.services.notification_publisher import publish, publish_many
 import json
 from dotenv import load_dotenv
 from datetime import datetime, date
@@ -21,16 +21,9 @@ load_dotenv()
 # 🔥 모델 로딩 순서 보장 - 외래키 의존성을 위해 순서 중요!
 from app.models.db.session_log import SessionLog  # 1. 먼저 로드
 from app.models.db.session_summary import SessionSummary, GPTSessionSummary  # 2. 그 다음 로드
+from app.models.db.chat_activity_model import DailyChatActivity
 
 
-# Redis 클라이언트 설정
-print(f"🔗 Celery Redis 연결 시도: {settings.redis_host}:{settings.redis_port}")
-redis_client = redis.Redis(
-    host=settings.redis_host,
-    port=settings.redis_port,
-    db=settings.redis_db
-)
-
 # 1) 브로커 URL은 이미 환경변수에서 읽어옵니다.
 celery = Celery("matabus")
 
@@ -74,25 +67,41 @@ def session_summarize_task(self, user_id: int, session_id: str):
         
 
 # 3) 일기 생성 조건 체크 Task
+def _target_user_ids(db, kind: str, full_sweep: bool):
+    """
+    평가 대상 유저
+    - 기본: 직전 tick 이후 메시지를 보낸 유저(dirty set)만
+    - full_sweep: 전체 유저 (저빈도 정합성 보정용)
+    """
+    if full_sweep:
+        # dirty set도 비워서 직후 tick에서 중복 평가하지 않도록
+        # Redis 장애 시에도 스윕은 계속 (이 스윕이 바로 dirty set 누락/장애 대비용)
+        try:
+            pop_dirty_users(kind)
+        except Exception as e:
+            logger.error(f"❌ dirty set 비우기 실패 (전체 스윕은 계속): kind={kind}, error={e}")
+        return [uid for (uid,) in db.query(User.id).all()]
+    return pop_dirty_users(kind)
+
+
 @celery.task
-def check_diary_conditions_periodic():
-    """일기 생성 조건 확인 (5분마다 실행)"""
-    logger.info("▶ 일기 생성 조건 체크 시작")
+def check_diary_conditions_periodic(full_sweep: bool = False):
+    """일기 생성 조건 확인 (5분마다: 활동 유저만 / 1시간마다: 전체 스윕)"""
+    logger.info(f"▶ 일기 생성 조건 체크 시작 (full_sweep={full_sweep})")
+    db = None
+    failed = []
     try:
         db = next(get_db())
-        # 모든 활성 유저 조회
-        users = db.query(User).all()
+        user_ids = _target_user_ids(db, "diary", full_sweep)
+        logger.info(f"ℹ️ 일기 조건 평가 대상: {len(user_ids)}명")
 
-        for user in users:
+        for user_id in user_ids:
             try:
-                # Repository를 사용하여 조건 체크
-                chat_repo = TodayChatMessageRepository()
-
-                # 1. 오늘 사용자 채팅 토큰수 확인
-                formatted_chats, total_tokens = chat_repo.diary_get_today_user_chat_and_tokens(user.id)
+                # Repository를 사용하여 조건 체크 (태스크 세션 공유)
+                chat_repo = TodayChatMessageRepository(db)
 
-                # 2. 오늘 AI 생성 여부 확인 (source_type='ai')
-                today_ai_diary = chat_repo.check_today_diary_by_source(user.id, 'ai')
+                # 오늘 AI 생성 여부(source_type='ai') + 오늘 사용자 채팅 토큰수 - SQL 1회
+                today_ai_diary, total_tokens = chat_repo.get_diary_eligibility(user_id, 'ai')
 
             
                 # AI 생성 조건 체크
@@ -102,37 +111,43 @@ def check_diary_conditions_periodic():
                     # Redis에 알림 발행
                     message = {
                         "type": "diary_available",
-                        "user_id": user.id,
+                        "user_id": user_id,
                         "message": "오늘의 일기를 생성할 수 있습니다!"
                       
                     }
                     
-                    channel = f"user_{user.id}_diary"
+                    channel = f"user_{user_id}_diary"
                     message_json = json.dumps(message)
                     
                     print(f"📤 Redis 발행 시도: channel={channel}, message={message_json}")
                     
                     try:
-                        result = redis_client.publish(channel, message_json)
+                        result = publish(channel, message_json)
                         print(f"✅ Redis 발행 성공: channel={channel}, result={result} (구독자 수)")
-                        logger.info(f"✅ 일기 생성 알림 발행: user_id={user.id}, 토큰수={total_tokens}")
+                        logger.info(f"✅ 일기 생성 알림 발행: user_id={user_id}, 토큰수={total_tokens}")
                     except Exception as e:
                         print(f"❌ Redis 발행 실패: {e}")
-                        logger.error(f"❌ Redis 발행 실패: user_id={user.id}, error={e}")
+                        logger.error(f"❌ Redis 발행 실패: user_id={user_id}, error={e}")
                         
                 else:
                     if today_ai_diary:
-                        logger.info(f"ℹ️ 이미 오늘 AI 일기 생성됨: user_id={user.id}")
+                        logger.info(f"ℹ️ 이미 오늘 AI 일기 생성됨: user_id={user_id}")
                     else:
-                        logger.info(f"ℹ️ 토큰수 부족: user_id={user.id}, 토큰수={total_tokens}")
+                        logger.info(f"ℹ️ 토큰수 부족: user_id={user_id}, 토큰수={total_tokens}")
 
             except Exception as e:
-                logger.error(f"❌ 유저 {user.id} 일기 조건 체크 실패: {e}")
+                failed.append(user_id)
+                logger.error(f"❌ 유저 {user_id} 일기 조건 체크 실패: {e}")
+                # 세션을 유저들이 공유 → 실패한 트랜잭션이 다음 유저 조회를 막지 않도록
+                db.rollback()
 
     except Exception as e:
         logger.error(f"❌ 일기 조건 체크 실패: {e}")
     finally:
-        db.close()
+        # 실패한 유저는 다음 tick에 다시 평가
+        requeue_users("diary", failed)
+        if db:
+            db.close()
 # def check_diary_conditions_periodic():
 #     """일기 생성 조건 확인 (5분마다 실행)"""
 #     logger.info("▶ 일기 생성 조건 체크 시작")
@@ -258,26 +273,28 @@ def daily_reset_notifications():
 
     try:
         db = next(get_db())
-        # 모든 사용자 조회
-        users = db.query(User).all()
-
-        for user in users:
-            try:
-                channel = f"user_{user.id}_diary"
-                reset_message = {
+        # 모든 사용자 id만 조회
+        user_ids = [uid for (uid,) in db.query(User.id).all()]
+
+        # 파이프라인 배치 발행 (유저마다 왕복하지 않음)
+        items = [
+            (
+                f"user_{user_id}_diary",
+                {
                     "type": "diary_reset",
-                    "user_id": user.id,
+                    "user_id": user_id,
                     "message": "새로운 하루가 시작되었습니다!",
                     "priority": "high"
-                }
-                
-                message_json = json.dumps(reset_message)
-                result = redis_client.publish(channel, message_json)
-                
-                logger.info(f"✅ 사용자 {user.id} 알림 리셋 완료 - 구독자 수: {result}")
-                
-            except Exception as e:
-                logger.error(f"❌ 사용자 {user.id} 알림 리셋 실패: {e}")
+                },
+            )
+            for user_id in user_ids
+        ]
+        try:
+            results = publish_many(items)
+            delivered = sum(1 for r in results if r)
+            logger.info(f"✅ 알림 리셋 발행: {len(results)}명 (구독 중 {delivered}명)")
+        except Exception as e:
+            logger.error(f"❌ 알림 리셋 배치 발행 실패: {e}")
 
     except Exception as e:
         logger.error(f"❌ 자정 리셋 실패: {e}")
@@ -287,15 +304,17 @@ def daily_reset_notifications():
     logger.info("✅ 자정 알림 리셋 완료")
 
 @celery.task
-def check_encouragement_conditions_periodic():
-    """격려 메시지 생성 조건 확인 (5분마다 실행)"""
-    logger.info("▶ 격려 메시지 생성 조건 체크 시작")
+def check_encouragement_conditions_periodic(full_sweep: bool = False):
+    """격려 메시지 생성 조건 확인 (5분마다: 활동 유저만 / 1시간마다: 전체 스윕)"""
+    logger.info(f"▶ 격려 메시지 생성 조건 체크 시작 (full_sweep={full_sweep})")
+    db = None
+    failed = []
     try:
         db = next(get_db())
-        # 모든 활성 유저 조회
-        users = db.query(User).all()
+        user_ids = _target_user_ids(db, "encourage", full_sweep)
+        logger.info(f"ℹ️ 격려 조건 평가 대상: {len(user_ids)}명")
 
-        for user in users:
+        for user_id in user_ids:
             try:
                 # # 1. 현재 시간이 23시 이후인지 확인
                 # now = datetime.now()
@@ -306,39 +325,46 @@ def check_encouragement_conditions_periodic():
                 # 2. 오늘 날짜로 encouragement_report 조회
                 today = date.today()
                 existing_encouragement = db.query(EncouragementReport).filter(
-                    EncouragementReport.user_id == user.id,
+                    EncouragementReport.user_id == user_id,
                     func.date(EncouragementReport.timestamp) == today
                 ).first()
 
                 if existing_encouragement:
-                    logger.info(f"ℹ️ 이미 오늘 격려 메시지 생성됨: user_id={user.id}")
+                    logger.info(f"ℹ️ 이미 오늘 격려 메시지 생성됨: user_id={user_id}")
                     continue
 
                 # 3. Repository에서 user token 확인 (100 이상인지)
-                chat_repo = TodayChatMessageRepository()
-                combined_content, total_tokens = chat_repo.get_today_user_chat_content_and_tokens(user.id)
+                chat_repo = TodayChatMessageRepository(db)
+                total_tokens = chat_repo.get_today_user_token_total(user_id)
 
                 if total_tokens < 100:
-                    logger.info(f"❌ 토큰 수 부족: user_id={user.id}, tokens={total_tokens}")
+                    logger.info(f"❌ 토큰 수 부족: user_id={user_id}, tokens={total_tokens}")
                     continue
 
                 # 4. 모든 조건 만족 시 서비스 호출
-                logger.info(f"✅ 격려 메시지 생성 조건 만족: user_id={user.id}, tokens={total_tokens}")
+                logger.info(f"✅ 격려 메시지 생성 조건 만족: user_id={user_id}, tokens={total_tokens}")
                 service = EncourageDiaryService(db)
-                result = service.create_encouragement(user.id)
+                result = service.create_encouragement(user_id)
                 
                 if result:
-                    logger.info(f"✅ 격려 메시지 생성 완료: user_id={user.id}")
+                    logger.info(f"✅ 격려 메시지 생성 완료: user_id={user_id}")
                 else:
-                    logger.error(f"❌ 격려 메시지 생성 실패: user_id={user.id}")
+                    # 예외 없이 결과만 없는 경우는 재등록하지 않음 (매 tick 유료 GPT 재호출 방지)
+                    # → 유저가 다시 채팅하거나 전체 스윕 때 재평가
+                    logger.error(f"❌ 격려 메시지 생성 실패: user_id={user_id}")
 
             except Exception as e:
-                logger.error(f"❌ 유저 {user.id} 격려 조건 체크 실패: {e}")
+                failed.append(user_id)
+                logger.error(f"❌ 유저 {user_id} 격려 조건 체크 실패: {e}")
+                # 세션을 유저들이 공유 → 실패한 트랜잭션이 다음 유저 조회를 막지 않도록
+                db.rollback()
 
     except Exception as e:
         logger.error(f"❌ 격려 조건 체크 실패: {e}")
     finally:
-        db.close()
+        requeue_users("encourage", failed)
+        if db:
+            db.close()
 
 # 6) 스케줄 설정
 celery.conf.beat_schedule = {
@@ -350,6 +376,17 @@ celery.conf.beat_schedule = {
         'task': 'app.services.celery_app.check_encouragement_conditions_periodic',
         'schedule': 300.0,  # 5분마다
     },
+    # 전체 유저 정합성 보정 스윕 (dirty set 누락/Redis 장애 대비) - 저빈도
+    'reconcile-diary-conditions': {
+        'task': 'app.services.celery_app.check_diary_conditions_periodic',
+        'schedule': 3600.0,  # 1시간마다
+        'kwargs': {'full_sweep': True},
+    },
+    'reconcile-encouragement-conditions': {
+        'task': 'app.services.celery_app.check_encouragement_conditions_periodic',
+        'schedule': 3600.0,  # 1시간마다
+        'kwargs': {'full_sweep': True},
+    },
     # 'daily-diary-analysis': {
     #     'task': 'app.services.celery_app.daily_diary_analysis',
     #     'schedule': 300.0,  # 매일 23:00 정확히
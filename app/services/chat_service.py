@@ -1,6 +1,8 @@
 from app.models.db.chat_message_model import ChatMessage
 from sqlalchemy.orm import Session
 from datetime import datetime
+from app.services.activity_tracker import mark_user_active
+from app.repositories.chat_activity_repository import ChatActivityRepository
 
 
 # 유저 메시지 저장 및 turn 계산
@@ -24,8 +26,13 @@ def save_user_message(db: Session, user_id: int, message: str, session_id: str)
     )
 
     db.add(new_msg)
+    # 일별 활동 집계도 같은 트랜잭션에서 증가 (조건 체크는 이 집계만 읽음)
+    ChatActivityRepository(db).record_user_message(user_id, message, new_msg.timestamp)
     db.commit()
 
+    # Celery 주기 체크가 이 유저만 평가하도록 dirty set에 기록
+    mark_user_active(user_id)
+
     print(f"🕒 현재 저장된 메시지 timestamp: {new_msg.timestamp}")
     print(f"📨 session_id: {session_id} / turn: {new_turn}")
 
@@ -42,14 +49,17 @@ def save_gpt_response(
     session_id: str,        # 추가
 ):
     try:
-        db.add(ChatMessage(
+        new_msg = ChatMessage(
             user_id=user_id,
             role="assistant",
             message=message,
             turn=turn,
             session_id=session_id,  # 모델의 컬럼으로 지정
             timestamp=datetime.now()  # 시스템 로컬 시간 사용 (KST)
-        ))
+        )
+        db.add(new_msg)
+        # 자정을 넘긴 응답처럼 assistant 메시지만 있는 날짜도 /chat/list 달력에 잡히도록
+        ChatActivityRepository(db).touch_day(user_id, new_msg.timestamp)
         db.commit()
         print(f"✅ GPT 응답 저장 완료 - user_id: {user_id}, turn: {turn}")
     except Exception as e:
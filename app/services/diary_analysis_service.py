@@ -11,7 +11,7 @@ from app.tasks.diary_analysis_event import check_weekly_analysis_after_diary_sav
 class DiaryAnalysisService:
     def __init__(self, db: Session):
         self.db = db
-        self.today_chat_repo = TodayChatMessageRepository()
+        self.today_chat_repo = TodayChatMessageRepository(db)
     
     def analyze_user_diary(self, user_id: int):
         """사용자 다이어리 분석 (조건 체크 없이, 이미 조건 체크 celrey_app.py에서 끝냄 )"""
@@ -7,33 +7,30 @@ from app.repositories.today_chat_message_repository import TodayChatMessageRepos
 from app.models.schemas.study_schema import DiaryResponse
 from app.clients.gpt_api import GPTClient
 from app.core.connection import get_db
-from app.config.settings import settings
+from app.services.notification_publisher import apublish
+from app.core.db_offload import run_db
+import asyncio
 import json
-import redis
 
 class DiaryService:
     def __init__(self):
         self.prompt_service = DiaryPromptService()
         self.chat_repository = TodayChatMessageRepository()
         self.gpt_client = GPTClient()
-        self.redis_client = redis.Redis(
-            host=settings.redis_host,
-            port=settings.redis_port,
-            db=settings.redis_db
-        )
 
     async def check_diary_conditions(self, user_id: int):
-        """일기 생성 조건 체크 - 라우터와 동일한 로직"""
+        """일기 생성 조건 체크 - 라우터와 동일한 로직 (DB 조회는 이벤트 루프 밖에서)"""
+        return await run_db(self._check_diary_conditions, user_id)
+
+    def _check_diary_conditions(self, user_id: int):
         try:
-            # 오늘 AI 생성 여부 확인 (source_type='ai')
-            today_ai_diary = self.chat_repository.check_today_diary_by_source(user_id, 'ai')
+            # 오늘 AI 생성 여부(source_type='ai') + 오늘 사용자 채팅 토큰수 - SQL 1회
+            today_ai_diary, total_tokens = self.chat_repository.get_diary_eligibility(user_id, 'ai')
             if today_ai_diary:
                 return {
                     "available": False
                 }
             
-            # 오늘 사용자 채팅 토큰수 확인
-            formatted_chats, total_tokens = self.chat_repository.diary_get_today_user_chat_and_tokens(user_id)
             min_tokens = 55  # 최소 토큰수 설정
             if total_tokens < min_tokens:
                 return {
@@ -57,7 +54,9 @@ class DiaryService:
         db = next(get_db())
         try:
             # 1. 오늘 사용자 채팅 데이터 가져오기
-            formatted_chats, total_tokens = self.chat_repository.diary_get_today_user_chat_and_tokens(user_id)
+            formatted_chats, total_tokens = await run_db(
+                self.chat_repository.diary_get_today_user_chat_and_tokens, user_id
+            )
             
             # 2. 프롬프트 생성
             prompt = self.prompt_service.generate_diary_prompt(formatted_chats)
@@ -76,7 +75,7 @@ class DiaryService:
                 timestamp=datetime.now()  # 시스템 로컬 시간 사용 (KST)
             )
             db.add(diary_report)
-            db.commit()
+            await run_db(db.commit)
             
             print(f"✅ AI 일기 생성 완료 및 DB 저장: user_id={user_id}")
             
@@ -94,12 +93,11 @@ class DiaryService:
             print(f"📤 diary_unavailable Redis 발행 시도: channel={channel}, message={message_json}")
             
             try:
-                result = self.redis_client.publish(channel, message_json)
+                result = await apublish(channel, message_json)
                 print(f"✅ diary_unavailable Redis 발행 성공: channel={channel}, result={result} (구독자 수)")
                 
-                # 발행 성공 후 잠시 대기 (중복 발송 방지)
-                import time
-                time.sleep(0.1)
+                # 발행 성공 후 잠시 대기 (중복 발송 방지) - 이벤트 루프는 막지 않음
+                await asyncio.sleep(0.1)
                 
             except Exception as e:
                 print(f"❌ diary_unavailable Redis 발행 실패: {e}")
@@ -123,7 +121,7 @@ class DiaryService:
                 timestamp=datetime.now()  # 시스템 로컬 시간 사용 (KST)
             )
             db.add(diary_report)
-            db.commit()
+            await run_db(db.commit)
             return diary_report
         except Exception as e:
             db.rollback()
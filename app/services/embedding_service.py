@@ -5,6 +5,11 @@ from datetime import datetime
 from typing import Any, Dict, List, Tuple, Optional
 
 from app.services.vector_db_service import VectorDBService
+from app.services.vector_write_coalescer import (
+    DURABLE_TIMEOUT,
+    VectorWriteCoalescer,
+    get_vector_write_coalescer,
+)
 from app.models.db.session_summary import GPTSessionSummary
 from app.core.connection import get_db
 
@@ -22,13 +27,19 @@ class EmbeddingService:
       - "key_sentence"  : 핵심 문장 1~2개
       - "keywords_all"  : 키워드 전체 문자열
       - "keyword" (×N)  : 개별 키워드
+    Dense 쓰기는 프로세스 공용 write-behind 코얼레서로 모아서 반영
+    (vector_service만 직접 주입하면 코얼레서 없이 동기 반영)
     """
     def __init__(
         self,
         vector_service: Optional[VectorDBService] = None,
-        sparse_service: Optional[SparseIndexService] = None
+        sparse_service: Optional[SparseIndexService] = None,
+        write_coalescer: Optional[VectorWriteCoalescer] = None,
     ):
-        self.vdb = vector_service or VectorDBService()
+        if write_coalescer is None and vector_service is None:
+            write_coalescer = get_vector_write_coalescer()
+        self.writer = write_coalescer
+        self.vdb = vector_service or write_coalescer.backend
         self.sparse = sparse_service or SparseIndexService()
 
     # ---------- Public ----------
@@ -90,31 +101,50 @@ class EmbeddingService:
                 meta = {**base_meta, "type": "keyword", "keyword": k, "doc_id": did}
                 upserts.append((k, meta, did))
 
-            # 5) Dense + Sparse 동시 업서트
-            ids: List[str] = []
-            for text, meta, doc_id in upserts:
-                # Dense(Chroma)
-                self.vdb.upsert_document(text=text, metadata=meta, doc_id=doc_id, persist=False)
-                # Sparse(FTS5)
-                self.sparse.upsert_document(text=text, metadata=meta)
-                ids.append(doc_id)
-
-            # Dense persist
-            try:
-                self.vdb.vectorstore.persist()
-            except Exception:
-                pass
+            # 5) Dense 벌크 업서트
+            #    코얼레서: 다른 세션 쓰기와 한 창으로 묶여 임베딩/Chroma 쓰기/persist 1회
+            #    result()는 persist까지 끝난 뒤 반환 → 성공 보고는 그대로 내구성 보장
+            texts = [u[0] for u in upserts]
+            metas = [u[1] for u in upserts]
+            ids: List[str] = [u[2] for u in upserts]
+            if self.writer is not None:
+                self.writer.upsert(texts, metas, ids).result(timeout=DURABLE_TIMEOUT)
+            else:
+                self.vdb.upsert_documents(texts, metas, doc_ids=ids, persist=True)
+
+            # 6) Sparse(FTS5) 벌크 업서트: 한 트랜잭션(커밋 1회), 유저 코퍼스 버전도 함께 증가
+            #    (Dense가 먼저 반영된 뒤라 버전이 바뀌는 시점엔 두 인덱스 모두 최신)
+            self.sparse.bulk_upsert(texts, metas)
 
             logger.info(f"✅ 임베딩 완료: user_id={user_id}, session_id={session_id}, count={len(ids)}")
             return {"ok": True, "count": len(ids), "ids": ids}
 
         except Exception as e:
             logger.exception("❌ 임베딩 실패")
+            # Dense만 반영됐을 수 있으므로 검색 결과 캐시는 보수적으로 무효화
+            try:
+                self.sparse.bump_corpus_version(user_id)
+            except Exception:
+                logger.warning("코퍼스 버전 갱신 실패", exc_info=True)
             return {"ok": False, "reason": "exception", "error": str(e)}
         finally:
             if db:
                 db.close()
 
+    def delete_session_embeddings(self, user_id: int, session_id: str) -> Dict[str, Any]:
+        """세션 문서를 Dense → Sparse 순으로 삭제 (Sparse 커밋 때 코퍼스 버전 증가 → 캐시 무효)"""
+        try:
+            if self.writer is not None:
+                self.writer.delete_session(user_id, session_id).result(timeout=DURABLE_TIMEOUT)
+            else:
+                self.vdb.delete_by_session(user_id, session_id)
+            self.sparse.delete_by_session(user_id, session_id)
+            logger.info(f"🗑️ 세션 임베딩 삭제: user_id={user_id}, session_id={session_id}")
+            return {"ok": True}
+        except Exception as e:
+            logger.exception("❌ 세션 임베딩 삭제 실패")
+            return {"ok": False, "reason": "exception", "error": str(e)}
+
     # ---------- Helpers ----------
     def _as_list(self, keywords_json_or_list) -> List[str]:
         try:
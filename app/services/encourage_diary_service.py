@@ -5,8 +5,7 @@ from app.models.db.study_model import EncouragementReport
 from app.models.db.user_model import User
 from app.clients.gpt_api import call_gpt
 from datetime import datetime
-import redis
-from app.config.settings import settings
+from app.services.notification_publisher import publish
 from app.prompt.encourage_diary_prompt import encourage_diary_prompt
 
 
@@ -15,12 +14,7 @@ from app.prompt.encourage_diary_prompt import encourage_diary_prompt
 class EncourageDiaryService:
     def __init__(self, db: Session):
         self.db = db
-        self.today_chat_repo = TodayChatMessageRepository()
-        self.redis_client = redis.Redis(
-            host=settings.redis_host,
-            port=settings.redis_port,
-            db=settings.redis_db
-        )
+        self.today_chat_repo = TodayChatMessageRepository(db)
     
     def create_encouragement(self, user_id: int):
         """사용자 격려 메시지 생성"""
@@ -104,7 +98,7 @@ class EncourageDiaryService:
                 message_json = json.dumps(message)
                 
                 print(f"📤 [DEBUG] Redis 발행 시도: channel={channel}, message={message_json}")
-                result = self.redis_client.publish(channel, message_json)
+                result = publish(channel, message_json)
                 print(f"✅ [DEBUG] Redis 발행 성공: channel={channel}, result={result} (구독자 수)")
                 
             except Exception as e:
@@ -1,16 +1,69 @@
 # app/services/hybrid_memory_service.py
 from __future__ import annotations
+import asyncio
 import logging
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 from app.services.sparse_service import SparseIndexService
-from app.services.vector_db_service import VectorDBService
+from app.services.vector_db_service import VectorDBService, get_vector_db_service
 
 logger = logging.getLogger(__name__)
 
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "2048"))
+
+
+class RetrievalResultCache:
+    """
+    hybrid_retrieve 결과 LRU
+    - 키: (user_id, 정규화 쿼리, top_k, 오늘 날짜) → 날짜가 바뀌면 시간감쇠가 달라지므로 자연 만료
+    - 값: (코퍼스 버전, 결과). 조회 시 현재 버전과 다르면 stale로 보고 폐기
+      (버전은 Sparse DB에 있어 다른 프로세스의 색인 변경도 반영)
+    """
+
+    def __init__(self, max_items: int = RETRIEVAL_CACHE_SIZE):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[tuple, Tuple[int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, key: tuple, version: int) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self._stats["misses"] += 1
+                return None
+            if item[0] != version:
+                del self._items[key]
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self._stats["hits"] += 1
+        # 호출 측이 결과를 수정해도 캐시는 그대로
+        return [dict(r) for r in item[1]]
+
+    def put(self, key: tuple, version: int, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._items[key] = (version, [dict(r) for r in rows])
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            hit_rate = self._stats["hits"] / total if total else 0.0
+            return {**self._stats, "size": len(self._items), "hit_rate": round(hit_rate, 4)}
+
 
 @dataclass
 class DocAgg:
@@ -45,6 +98,13 @@ class HybridMemoryService:
         · High: n_hits >= 3
         · Middle: n_hits == 2
         · Low: n_hits == 1
+    - 병렬 검색(parallel=True):
+        · Sparse/Dense 두 레그를 전용 스레드풀에서 동시에 실행
+        · 레그별 타임아웃 초과 시 해당 모달리티는 비우고 나머지만으로 결합
+    - 결과 캐시(cache_size > 0):
+        · 같은 유저의 같은 (전처리된) 쿼리는 검색/결합 없이 반환
+        · 유저 코퍼스 버전(세션 색인/삭제 시 증가)이 바뀌면 무효
+        · 레그 실패/타임아웃으로 강등된 결과는 저장하지 않음
     """
 
     _TOKEN_SPLIT_RE = re.compile(r"[\s\u3000]+")  # 공백류
@@ -57,12 +117,28 @@ class HybridMemoryService:
         rrf_k: int = 60,
         sparse_k: int = 200,
         dense_k: int = 50,
+        parallel: bool = True,
+        sparse_timeout: float = 1.0,   # 초
+        dense_timeout: float = 2.5,    # 초 (임베딩 + Chroma)
+        max_workers: int = 8,
+        cache_size: int = RETRIEVAL_CACHE_SIZE,
     ):
         self.sparse = sparse or SparseIndexService()
-        self.dense = dense or VectorDBService()
+        self.dense = dense or get_vector_db_service()
         self.RRF_K = rrf_k
         self.SPARSE_K = sparse_k
         self.DENSE_K = dense_k
+        self.parallel = parallel
+        self.SPARSE_TIMEOUT = sparse_timeout
+        self.DENSE_TIMEOUT = dense_timeout
+        # 두 레그 전용 풀 (bounded) - 타임아웃 난 레그가 풀을 잠식해도 상한이 있음
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hyb")
+        self.cache = RetrievalResultCache(cache_size) if cache_size > 0 else None
+
+    def close(self) -> None:
+        """하위 인덱스 리소스 정리"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.sparse.close()
 
     # ---------------------- Public API ----------------------
     def hybrid_retrieve(
@@ -90,6 +166,21 @@ class HybridMemoryService:
         ]
         """
         q = (user_query or "").strip()
+
+        # 0) 결과 캐시: 버전은 검색 전에 읽음 → 검색 중 색인이 바뀌면 이 결과는 이전 버전으로 저장되어 재사용 안 됨
+        cache_key, version = None, 0
+        if self.cache is not None:
+            try:
+                version = self.sparse.corpus_version(user_id)
+                cache_key = (user_id, " ".join(self._TOKEN_SPLIT_RE.split(q)), top_k, date.today())
+            except Exception:
+                logger.exception("HYB_ERROR corpus_version_failed")
+            if cache_key is not None:
+                cached = self.cache.get(cache_key, version)
+                if cached is not None:
+                    logger.info(f"HYB_CACHE_HIT user_id={user_id} version={version} n={len(cached)}")
+                    return cached
+
         token_cnt = self._count_tokens(q)
         w_idx, w_type = self._choose_weights(token_cnt)
         logger.info(
@@ -98,10 +189,20 @@ class HybridMemoryService:
         )
 
         # 1) 인덱스별 검색
-        sparse_hits = self._search_sparse(q, user_id=user_id)
-        dense_hits = self._search_dense(q, user_id=user_id)
+        t0 = time.perf_counter()
+        # degraded: 이 호출에서 실패/타임아웃한 레그가 있으면 True (강등 결과는 캐시하지 않음)
+        if self.parallel:
+            sparse_hits, dense_hits, degraded = self._search_parallel(q, user_id=user_id)
+        else:
+            sparse_hits, sparse_failed = self._search_sparse(q, user_id=user_id)
+            dense_hits, dense_failed = self._search_dense(q, user_id=user_id)
+            degraded = sparse_failed or dense_failed
+        fetch_ms = (time.perf_counter() - t0) * 1000
 
-        logger.info(f"HYB_FETCH sparse_n={len(sparse_hits)} dense_n={len(dense_hits)}")
+        logger.info(
+            f"HYB_FETCH sparse_n={len(sparse_hits)} dense_n={len(dense_hits)} "
+            f"parallel={self.parallel} degraded={degraded} fetch_ms={fetch_ms:.1f}"
+        )
 
         # 2) Weighted RRF 결합(고유조합 카운팅 포함)
         fused = self._weighted_rrf_aggregate(
@@ -133,10 +234,58 @@ class HybridMemoryService:
                 "modalities": sorted(list(d.modalities)),
             })
         logger.info(f"HYB_TOP doc_ids={[x['doc_id'] for x in out]}")
+        if cache_key is not None and not degraded:
+            self.cache.put(cache_key, version, out)
         return out
 
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats() if self.cache is not None else {"enabled": False}
+
+    async def ahybrid_retrieve(
+        self,
+        user_query: str,
+        user_id: int,
+        yymmdd: str,
+        top_k: int = 12,
+    ) -> List[Dict[str, Any]]:
+        """async 경로용: 이벤트 루프를 막지 않도록 워커 스레드에서 hybrid_retrieve 실행"""
+        return await asyncio.to_thread(
+            self.hybrid_retrieve, user_query, user_id, yymmdd, top_k
+        )
+
+    # ---------------------- Parallel fetch ----------------------
+    def _search_parallel(
+        self, q: str, *, user_id: int
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], bool]:
+        """
+        Sparse/Dense 동시 실행. 전체 지연 = max(두 레그), 각 레그는 자기 타임아웃으로 상한.
+        타임아웃 레그는 빈 결과로 강등(단일 모달리티 결합). 실행 중 스레드는 끝까지 돌고 결과만 버림.
+        반환: (sparse_hits, dense_hits, degraded) - degraded는 이 호출 한정 (공유 인스턴스 상태 없음)
+        """
+        t0 = time.perf_counter()
+        f_sparse = self._executor.submit(self._search_sparse, q, user_id=user_id)
+        f_dense = self._executor.submit(self._search_dense, q, user_id=user_id)
+
+        sparse_hits, sparse_failed = self._collect_leg(f_sparse, "sparse", self.SPARSE_TIMEOUT, t0)
+        dense_hits, dense_failed = self._collect_leg(f_dense, "dense", self.DENSE_TIMEOUT, t0)
+        return sparse_hits, dense_hits, sparse_failed or dense_failed
+
+    def _collect_leg(self, fut, name: str, timeout: float, t0: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """(hits, failed) - 레그 안에서 난 예외(_search_*가 잡은 것)와 타임아웃 모두 failed"""
+        # 타임아웃은 두 레그 공통 시작 시점(t0) 기준 → 먼저 기다린 레그 시간이 이중 합산되지 않음
+        remaining = max(0.0, timeout - (time.perf_counter() - t0))
+        try:
+            return fut.result(timeout=remaining)
+        except FutureTimeout:
+            fut.cancel()
+            logger.warning(f"HYB_TIMEOUT leg={name} timeout_sec={timeout} → degrade to single modality")
+        except Exception:
+            logger.exception(f"HYB_ERROR {name}_leg_failed")
+        return [], True
+
     # ---------------------- Retrieval ----------------------
-    def _search_sparse(self, q: str, *, user_id: int) -> List[Dict[str, Any]]:
+    def _search_sparse(self, q: str, *, user_id: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """(hits, failed) - 실패 시 빈 결과로 강등"""
         hits: List[Dict[str, Any]] = []
         try:
             raw = self.sparse.search(q, top_k=self.SPARSE_K, user_id=user_id)
@@ -158,9 +307,11 @@ class HybridMemoryService:
                 })
         except Exception:
             logger.exception("HYB_ERROR sparse_search_failed")
-        return hits
+            return [], True
+        return hits, False
 
-    def _search_dense(self, q: str, *, user_id: int) -> List[Dict[str, Any]]:
+    def _search_dense(self, q: str, *, user_id: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """(hits, failed) - 실패 시 빈 결과로 강등"""
         hits: List[Dict[str, Any]] = []
         try:
             raw = self.dense.search_similar(
@@ -186,7 +337,8 @@ class HybridMemoryService:
                 })
         except Exception:
             logger.exception("HYB_ERROR dense_search_failed")
-        return hits
+            return [], True
+        return hits, False
 
     # ---------------------- Fusion & Scoring ----------------------
     def _weighted_rrf_aggregate(
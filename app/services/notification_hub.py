@@ -0,0 +1,264 @@
+# app/services/notification_hub.py
+"""
+프로세스당 단일 Redis pub/sub 리스너
+- 기존: WebSocket 연결마다 pubsub() + 5개 채널 subscribe → 온라인 유저 수만큼 Redis 연결 점유
+- 변경: 워커 프로세스마다 psubscribe("user_*") 한 번 → user_id로 등록된 sink(큐)에 분배
+- sink는 put_nowait(item)만 있으면 됨 (asyncio.Queue 등). item = (suffix, raw_data)
+- 리스너는 첫 register 시 지연 시작, 연결 오류 시 백오프 후 재구독
+
+부하 테스트 (로컬 Redis 대역):
+    python -m app.services.notification_hub --users 10000 --messages 50000
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PATTERN = "user_*"
+CHANNEL_SUFFIXES = ("diary", "plant", "report", "wrapup", "encourage")
+
+
+def parse_channel(channel) -> Optional[Tuple[int, str]]:
+    """'user_12_diary' → (12, 'diary'). 형식이 다르면 None"""
+    if isinstance(channel, bytes):
+        channel = channel.decode("utf-8")
+    parts = channel.split("_", 2)
+    if len(parts) != 3 or parts[0] != "user" or not parts[1].isdigit():
+        return None
+    return int(parts[1]), parts[2]
+
+
+class NotificationHub:
+    def __init__(
+        self,
+        redis_factory: Optional[Callable[[], Any]] = None,
+        pattern: str = CHANNEL_PATTERN,
+    ):
+        # 기본값: 발행과 같은 공유 async 풀 (psubscribe 연결 1개만 점유)
+        self._redis_factory = redis_factory
+        self.pattern = pattern
+        self._sinks: Dict[int, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+        self.stats = {
+            "received": 0,
+            "dispatched": 0,
+            "no_listener": 0,
+            "dropped": 0,
+            "ignored": 0,
+            "errors": 0,
+            "reconnects": 0,
+        }
+
+    # ---------- 등록 ----------
+    def register(self, user_id: int, sink) -> None:
+        self._sinks[user_id] = sink
+        self.ensure_started()
+
+    def unregister(self, user_id: int, sink=None) -> None:
+        """sink를 주면 같은 sink일 때만 해제 (재연결로 교체된 sink 보호)"""
+        if sink is None or self._sinks.get(user_id) is sink:
+            self._sinks.pop(user_id, None)
+
+    @property
+    def listeners(self) -> int:
+        return len(self._sinks)
+
+    # ---------- 수명주기 ----------
+    def ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._subscribed = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def wait_subscribed(self, timeout: float = 5.0) -> None:
+        await asyncio.wait_for(self._subscribed.wait(), timeout)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        if self._redis_factory is None:
+            from app.services.notification_publisher import get_async_redis
+            self._redis_factory = get_async_redis
+        backoff = 0.5
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis_factory().pubsub()
+                await pubsub.psubscribe(self.pattern)
+                logger.info(f"notification hub subscribed: pattern={self.pattern}")
+                async for message in pubsub.listen():
+                    mtype = message["type"]
+                    if mtype == "psubscribe":
+                        self._subscribed.set()
+                        backoff = 0.5
+                    elif mtype == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["reconnects"] += 1
+                self._subscribed.clear()
+                logger.warning(f"notification hub listener error, retry in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    # ---------- 분배 ----------
+    def _dispatch(self, channel, data) -> None:
+        self.stats["received"] += 1
+        parsed = parse_channel(channel)
+        if parsed is None or parsed[1] not in CHANNEL_SUFFIXES:
+            self.stats["ignored"] += 1
+            return
+        user_id, suffix = parsed
+        sink = self._sinks.get(user_id)
+        if sink is None:
+            self.stats["no_listener"] += 1
+            return
+        try:
+            sink.put_nowait((suffix, data))
+            self.stats["dispatched"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning(f"notification dropped (queue full): user_id={user_id}, suffix={suffix}")
+        except Exception as e:
+            # 메시지 1건/유저 1명의 오류로 공용 구독을 끊지 않음 (끊으면 워커의 모든 유저 알림이 재연결까지 멈춤)
+            self.stats["errors"] += 1
+            logger.exception(f"notification dispatch error: user_id={user_id}, suffix={suffix}: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "pattern": self.pattern,
+            "listeners": self.listeners,
+            **self.stats,
+        }
+
+
+# 전역 인스턴스 (프로세스당 1개)
+notification_hub = NotificationHub()
+
+
+if __name__ == "__main__":
+    import argparse
+    import fnmatch
+    import json
+    import random
+    import statistics
+
+    class _LocalPubSub:
+        def __init__(self, broker: "_LocalRedis"):
+            self._broker = broker
+            self._queue: asyncio.Queue = asyncio.Queue()
+            self._patterns = []
+
+        async def psubscribe(self, pattern: str):
+            self._patterns.append(pattern)
+            self._broker.subscribers.append(self)
+            await self._queue.put({"type": "psubscribe", "pattern": pattern, "channel": pattern.encode(), "data": 1})
+
+        def _deliver(self, channel: str, data: bytes) -> int:
+            for p in self._patterns:
+                if fnmatch.fnmatchcase(channel, p):
+                    self._queue.put_nowait({"type": "pmessage", "pattern": p.encode(), "channel": channel.encode(), "data": data})
+                    return 1
+            return 0
+
+        async def listen(self):
+            while True:
+                yield await self._queue.get()
+
+        async def close(self):
+            if self in self._broker.subscribers:
+                self._broker.subscribers.remove(self)
+
+    class _LocalRedis:
+        """Redis pub/sub 대역 - pubsub() 호출 수 = 점유 연결 수"""
+
+        def __init__(self):
+            self.subscribers = []
+            self.connections = 0
+
+        def __call__(self):
+            return self
+
+        def pubsub(self):
+            self.connections += 1
+            return _LocalPubSub(self)
+
+        async def publish(self, channel: str, data) -> int:
+            if isinstance(data, str):
+                data = data.encode()
+            return sum(s._deliver(channel, data) for s in list(self.subscribers))
+
+    async def _load_test(n_users: int, n_messages: int, online_ratio: float) -> None:
+        broker = _LocalRedis()
+        hub = NotificationHub(redis_factory=broker)
+        latencies = []
+        received = 0
+        done = asyncio.Event()
+        online = random.Random(3).sample(range(1, n_users + 1), int(n_users * online_ratio))
+
+        class _Sink:
+            def put_nowait(self, item):
+                nonlocal received
+                _, data = item
+                latencies.append((time.perf_counter() - json.loads(data)["t"]) * 1000)
+                received += 1
+                if received >= expected:
+                    done.set()
+
+        sink = _Sink()
+        for uid in online:
+            hub.register(uid, sink)
+        await hub.wait_subscribed()
+
+        rng = random.Random(5)
+        online_set = set(online)
+        targets = [rng.randint(1, n_users) for _ in range(n_messages)]
+        expected = sum(1 for t in targets if t in online_set)
+
+        t0 = time.perf_counter()
+        for i, uid in enumerate(targets):
+            suffix = CHANNEL_SUFFIXES[i % len(CHANNEL_SUFFIXES)]
+            await broker.publish(f"user_{uid}_{suffix}", json.dumps({"type": "diary_available", "t": time.perf_counter()}))
+            if i % 1000 == 0:
+                await asyncio.sleep(0)
+        if expected:
+            await asyncio.wait_for(done.wait(), 30)
+        elapsed = time.perf_counter() - t0
+        await hub.stop()
+
+        latencies.sort()
+        print({
+            "online_users": len(online),
+            "messages": n_messages,
+            "delivered": received,
+            "redis_connections": broker.connections,
+            "per_connection_design_connections": len(online),
+            "throughput_msg_s": round(n_messages / elapsed),
+            "dispatch_p50_ms": round(statistics.median(latencies), 3) if latencies else None,
+            "dispatch_p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 3) if latencies else None,
+            "hub": hub.stats,
+        })
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--online-ratio", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(_load_test(args.users, args.messages, args.online_ratio))
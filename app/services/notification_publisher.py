@@ -0,0 +1,172 @@
+# app/services/notification_publisher.py
+"""
+Redis 알림 발행 단일 모듈
+- 프로세스 공유 커넥션 풀 (요청/인스턴스마다 TCP 연결을 새로 열지 않음)
+  · BlockingConnectionPool: 발행이 몰려 풀이 다 차면 에러 대신 최대 REDIS_POOL_TIMEOUT초 대기
+- publish      : sync 경로 (Celery 등)
+- apublish     : FastAPI async 경로 (이벤트 루프 비차단)
+- publish_many : Celery 팬아웃용 파이프라인 배치 발행 (RTT 1회)
+- 발행 지연/건수/실패 메트릭
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config.settings import settings
+
+Message = Union[Dict[str, Any], str, bytes]
+
+_MAX_CONNECTIONS = 50
+_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+
+_sync_pool: Optional[redis.BlockingConnectionPool] = None
+_async_pool: Optional[aioredis.BlockingConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """공유 풀 기반 sync 클라이언트 (객체 생성은 저렴, 연결은 풀에서 재사용)"""
+    global _sync_pool
+    if _sync_pool is None:
+        with _pool_lock:
+            if _sync_pool is None:
+                _sync_pool = redis.BlockingConnectionPool(
+                    host=settings.redis_host,
+                    port=settings.redis_port,
+                    db=settings.redis_db,
+                    max_connections=_MAX_CONNECTIONS,
+                    timeout=_POOL_TIMEOUT,
+                )
+    return redis.Redis(connection_pool=_sync_pool)
+
+
+def get_async_redis() -> aioredis.Redis:
+    """공유 풀 기반 async 클라이언트 (uvicorn 워커의 이벤트 루프에서 사용)"""
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = aioredis.BlockingConnectionPool(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=settings.redis_db,
+            max_connections=_MAX_CONNECTIONS,
+            timeout=_POOL_TIMEOUT,
+        )
+    return aioredis.Redis(connection_pool=_async_pool)
+
+
+async def aclose_pools() -> None:
+    """shutdown 시 async 풀 정리"""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.disconnect()
+        _async_pool = None
+
+
+# ---------- 메트릭 ----------
+class PublishMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.batches = 0
+
+    def observe(self, elapsed_ms: float, n: int = 1, ok: bool = True, batch: bool = False) -> None:
+        with self._lock:
+            if ok:
+                self.count += n
+            else:
+                self.errors += n
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            if batch:
+                self.batches += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            calls = self.count + self.errors
+            return {
+                "published": self.count,
+                "errors": self.errors,
+                "batches": self.batches,
+                "avg_ms": round(self.total_ms / calls, 3) if calls else 0.0,
+                "max_ms": round(self.max_ms, 3),
+            }
+
+
+metrics = PublishMetrics()
+
+
+def publish_metrics() -> Dict[str, float]:
+    return metrics.snapshot()
+
+
+def _encode(message: Message) -> Union[str, bytes]:
+    if isinstance(message, (str, bytes)):
+        return message
+    return json.dumps(message)
+
+
+# ---------- 발행 ----------
+def publish(channel: str, message: Message) -> int:
+    """sync 발행. 반환: 수신 구독자 수"""
+    t0 = time.perf_counter()
+    try:
+        result = get_redis().publish(channel, _encode(message))
+    except Exception:
+        metrics.observe((time.perf_counter() - t0) * 1000, ok=False)
+        raise
+    metrics.observe((time.perf_counter() - t0) * 1000)
+    return result
+
+
+async def apublish(channel: str, message: Message) -> int:
+    """async 발행 (FastAPI 경로). 반환: 수신 구독자 수"""
+    t0 = time.perf_counter()
+    try:
+        result = await get_async_redis().publish(channel, _encode(message))
+    except Exception:
+        metrics.observe((time.perf_counter() - t0) * 1000, ok=False)
+        raise
+    metrics.observe((time.perf_counter() - t0) * 1000)
+    return result
+
+
+def publish_many(items: Iterable[Tuple[str, Message]], chunk_size: int = 500) -> List[int]:
+    """
+    파이프라인 배치 발행 (트랜잭션 없음) - 유저 N명 팬아웃을 RTT N회 → N/chunk_size회로
+    반환: 각 메시지의 수신 구독자 수
+    """
+    results: List[int] = []
+    batch: List[Tuple[str, Message]] = []
+
+    def flush():
+        if not batch:
+            return
+        t0 = time.perf_counter()
+        pipe = get_redis().pipeline(transaction=False)
+        for channel, message in batch:
+            pipe.publish(channel, _encode(message))
+        try:
+            results.extend(pipe.execute())
+        except Exception:
+            metrics.observe((time.perf_counter() - t0) * 1000, n=len(batch), ok=False, batch=True)
+            raise
+        metrics.observe((time.perf_counter() - t0) * 1000, n=len(batch), batch=True)
+        batch.clear()
+
+    for item in items:
+        batch.append(item)
+        if len(batch) >= chunk_size:
+            flush()
+    flush()
+    return results
@@ -0,0 +1,249 @@
+# app/services/notification_routes.py
+"""
+알림 라우팅 테이블 (채널 suffix + 메시지 type → 프론트 알림)
+- 라우트마다 JSON 텍스트를 미리 직렬화해 두고, 동적 필드가 없는 메시지는 그대로 재사용
+  → 메시지당 dict 생성/json.dumps 없음, 수신 연결 전체가 같은 텍스트를 공유
+- type으로 갈리지 않는 채널(plant/report/wrapup)은 Redis 메시지를 파싱하지 않음
+- 프론트(mypage_edit.js 등)가 event.data를 JSON.parse 하므로 text 프레임으로 전송
+
+마이크로벤치 (기존 if/elif + dumps 대비 메시지당 분배 비용):
+    python -m app.services.notification_routes --messages 200000 --recipients 3
+"""
+import json
+from typing import Any, Dict, Optional, Tuple
+
+
+class Notification:
+    """직렬화가 끝난 알림 1건 (Outbox 병합 키용 type/target 포함)"""
+    __slots__ = ("type", "target", "text")
+
+    def __init__(self, type: str, target: str, text: str):
+        self.type = type
+        self.target = target
+        self.text = text
+
+
+class Route:
+    """
+    template: 프론트로 보낼 payload (키 순서 유지)
+    dynamic : Redis 메시지에 있으면 template 값을 덮어쓰는 필드
+    동적 값 조합별 직렬화 결과도 최대 MAX_VARIANTS개까지 재사용 (발행 측 문구는 대부분 고정)
+    """
+    __slots__ = ("template", "dynamic", "default", "_variants")
+
+    MAX_VARIANTS = 256
+
+    def __init__(self, template: Dict[str, Any], dynamic: Tuple[str, ...] = ()):
+        self.template = template
+        self.dynamic = dynamic
+        self.default = Notification(template["type"], template["target"], json.dumps(template))
+        self._variants: Dict[tuple, Notification] = {}
+
+    def render(self, data: Dict[str, Any]) -> Notification:
+        if not any(k in data for k in self.dynamic):
+            return self.default
+        values = tuple(data.get(k, self.template[k]) for k in self.dynamic)
+        try:
+            cached = self._variants.get(values)
+        except TypeError:  # dict/list 등 해시 불가 값
+            cached, values = None, None
+        if cached is not None:
+            return cached
+        payload = dict(self.template)
+        payload.update(zip(self.dynamic, (data.get(k, self.template[k]) for k in self.dynamic)))
+        note = Notification(self.default.type, self.default.target, json.dumps(payload))
+        if values is not None and len(self._variants) < self.MAX_VARIANTS:
+            self._variants[values] = note
+        return note
+
+
+# (suffix, 메시지 type) → Route. type 키가 None이면 해당 채널의 기본 라우트
+ROUTES: Dict[Tuple[str, Optional[str]], Route] = {
+    ("diary", "diary_unavailable"): Route({
+        "type": "diary_unavailable",
+        "target": "blink-study-overlay-monitor",
+        "message": "일기 생성이 완료되었습니다!",
+        "priority": "normal",
+        "reason": "",
+    }, dynamic=("priority", "reason")),
+    ("diary", "diary_reset"): Route({
+        "type": "diary_reset",
+        "target": "global-notification-manager",
+        "message": "새로운 하루가 시작되었습니다!",
+        "priority": "high",
+    }, dynamic=("message", "priority")),
+    ("diary", None): Route({
+        "type": "diary_available",
+        "target": "blink-study-overlay-monitor",
+        "message": "일기 생성이 가능합니다!",
+    }, dynamic=("message",)),
+    ("plant", None): Route({
+        "type": "plant_generation",
+        "target": "garden-section",
+        "message": "새로운 식물이 생성되었습니다!",
+    }),
+    ("report", None): Route({
+        "type": "seven_day_report",
+        "target": "study-section",
+        "message": "7일 감정 레포트가 완성되었습니다!",
+    }),
+    ("wrapup", None): Route({
+        "type": "daily_wrapup",
+        "target": "main-dashboard",
+        "message": "하루 마무리 시간입니다!",
+    }),
+    ("encourage", "encourage_unavailable"): Route({
+        "type": "encourage_unavailable",
+        "target": "letter-overlay-glow",
+        "message": "응원격려 확인함",
+    }),
+    ("encourage", None): Route({
+        "type": "encourage_available",
+        "target": "letter-overlay-glow",
+        "message": "오늘 하루도 수고했어요, 당신에게 편지가 왔어요",
+    }),
+}
+
+
+def _compile(routes: Dict[Tuple[str, Optional[str]], Route]):
+    by_suffix: Dict[str, Dict[Optional[str], Route]] = {}
+    for (suffix, mtype), route in routes.items():
+        by_suffix.setdefault(suffix, {})[mtype] = route
+    # type 분기도 동적 필드도 없는 채널 → 파싱 없이 고정 알림
+    static = {
+        suffix: table[None].default
+        for suffix, table in by_suffix.items()
+        if list(table) == [None] and not table[None].dynamic
+    }
+    return by_suffix, static
+
+
+_BY_SUFFIX, _STATIC = _compile(ROUTES)
+
+
+def resolve(suffix: str, raw) -> Optional[Notification]:
+    """
+    Redis 메시지 → Notification. 라우트가 없으면 None
+    raw가 JSON 객체가 아니면 ValueError (JSONDecodeError/UnicodeDecodeError 포함, 고정 알림 채널은 파싱하지 않음)
+    """
+    static = _STATIC.get(suffix)
+    if static is not None:
+        return static
+    table = _BY_SUFFIX.get(suffix)
+    if table is None:
+        return None
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError(f"JSON 객체가 아님: {type(data).__name__}")
+    mtype = data.get("type")
+    route = (table.get(mtype) if isinstance(mtype, str) else None) or table.get(None)
+    if route is None:
+        return None
+    return route.render(data)
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    def _legacy_payload(user_id: int, channel: str, raw: bytes) -> Optional[dict]:
+        """기존 방식 재현: 파싱 → 채널 문자열 비교 if/elif → dict 생성"""
+        data = json.loads(raw)
+        if channel == f"user_{user_id}_diary":
+            if data.get("type") == "diary_unavailable":
+                payload = {
+                    "type": "diary_unavailable",
+                    "target": "blink-study-overlay-monitor",
+                    "message": "일기 생성이 완료되었습니다!",
+                    "priority": data.get("priority", "normal"),
+                    "reason": data.get("reason", ""),
+                }
+            elif data.get("type") == "diary_reset":
+                payload = {
+                    "type": "diary_reset",
+                    "target": "global-notification-manager",
+                    "message": data.get("message", "새로운 하루가 시작되었습니다!"),
+                    "priority": data.get("priority", "high"),
+                }
+            else:
+                payload = {
+                    "type": "diary_available",
+                    "target": "blink-study-overlay-monitor",
+                    "message": data.get("message", "일기 생성이 가능합니다!"),
+                }
+        elif channel == f"user_{user_id}_plant":
+            payload = {"type": "plant_generation", "target": "garden-section", "message": "새로운 식물이 생성되었습니다!"}
+        elif channel == f"user_{user_id}_report":
+            payload = {"type": "seven_day_report", "target": "study-section", "message": "7일 감정 레포트가 완성되었습니다!"}
+        elif channel == f"user_{user_id}_wrapup":
+            payload = {"type": "daily_wrapup", "target": "main-dashboard", "message": "하루 마무리 시간입니다!"}
+        elif channel == f"user_{user_id}_encourage":
+            if data.get("type") == "encourage_unavailable":
+                payload = {"type": "encourage_unavailable", "target": "letter-overlay-glow", "message": "응원격려 확인함"}
+            else:
+                payload = {"type": "encourage_available", "target": "letter-overlay-glow", "message": "오늘 하루도 수고했어요, 당신에게 편지가 왔어요"}
+        else:
+            return None
+        return payload
+
+    def _legacy_dispatch(user_id: int, channel: str, raw: bytes, recipients: int) -> int:
+        """기존 방식: 수신 연결마다 json.dumps"""
+        payload = _legacy_payload(user_id, channel, raw)
+        if payload is None:
+            return 0
+        n = 0
+        for _ in range(recipients):
+            n += len(json.dumps(payload))
+        return n
+
+    def _table_dispatch(suffix: str, raw: bytes, recipients: int) -> int:
+        note = resolve(suffix, raw)
+        if note is None:
+            return 0
+        n = 0
+        for _ in range(recipients):
+            n += len(note.text)
+        return n
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--recipients", type=int, default=3)
+    args = parser.parse_args()
+
+    # 실제 발행 형태에 가까운 메시지 분포
+    samples = [
+        ("diary", json.dumps({"type": "diary_available", "target": "blink-study-overlay-monitor", "message": "일기 생성이 가능합니다!"})),
+        ("diary", json.dumps({"type": "diary_available", "user_id": 1, "message": "오늘의 일기를 생성할 수 있습니다!"})),
+        ("diary", json.dumps({"type": "diary_unavailable", "channel": "realtime", "priority": "high", "reason": "ai_diary_created"})),
+        ("diary", json.dumps({"type": "diary_reset", "user_id": 1, "message": "새로운 하루가 시작되었습니다!", "priority": "high"})),
+        ("encourage", json.dumps({"type": "encourage_availalbe", "target": "letter", "message": "오늘 하루도 수고했어요"})),
+        ("encourage", json.dumps({"type": "encourage_unavailable", "target": "letter-overlay-glow", "message": "응원격려 확인함"})),
+        ("report", json.dumps({"type": "seven_day_report", "target": "study-section", "user_id": 1})),
+        ("plant", json.dumps({"type": "plant_generation"})),
+    ]
+    rng = random.Random(1)
+    workload = [(rng.randint(1, 10000), *rng.choice(samples)) for _ in range(args.messages)]
+    workload = [(uid, suffix, raw.encode()) for uid, suffix, raw in workload]
+
+    # 결과 동일성 확인 (키 순서까지 같은 JSON 텍스트)
+    for uid, suffix, raw in workload[:1000]:
+        assert json.dumps(_legacy_payload(uid, f"user_{uid}_{suffix}", raw)) == resolve(suffix, raw).text
+
+    t0 = time.perf_counter()
+    for uid, suffix, raw in workload:
+        _legacy_dispatch(uid, f"user_{uid}_{suffix}", raw, args.recipients)
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for uid, suffix, raw in workload:
+        _table_dispatch(suffix, raw, args.recipients)
+    table_s = time.perf_counter() - t0
+
+    print({
+        "messages": args.messages,
+        "recipients": args.recipients,
+        "legacy_us_per_msg": round(legacy_s / args.messages * 1e6, 3),
+        "table_us_per_msg": round(table_s / args.messages * 1e6, 3),
+        "speedup": round(legacy_s / table_s, 2),
+    })
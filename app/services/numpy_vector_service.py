@@ -0,0 +1,987 @@
+# app/services/numpy_vector_service.py
+"""
+유저별 NumPy dense 인덱스 (VectorDBService 대체 백엔드, DENSE_BACKEND=numpy)
+- 유저 1명 = float32 행렬 1개 (행 = 문서, L2 정규화 저장) + 문서 목록(json)
+    {root}/{user_id}/docs.json        : ids/texts/metas/dim/현재 벡터 파일명 (커밋 지점)
+    {root}/{user_id}/vectors.{gen}.f32 : n × dim float32 (np.memmap으로 지연 로드)
+- 로드된 유저는 LRU로 최대 max_loaded_users명 유지 (콜드 유저는 내림, dirty면 먼저 저장)
+- 검색: 코사인 = 행렬·벡터 곱 1번 + argpartition top-k (공유 컬렉션 where 필터 없음)
+- 쓰기는 copy-on-write: 검색은 잠금 없이 스냅샷(view)을 읽음 (서비스 전역 락은 LRU dict 조작에만, 로드/재로드/저장은 유저별 샤드 락)
+- metric은 cosine만 지원, distance = 1 - similarity (Chroma cosine과 동일 규약)
+- 양자화 저장 (DENSE_NUMPY_QUANT)
+    fp32 : 기본
+    fp16 : vectors.{gen}.f16 만 저장 (메모리/디스크 1/2), 블록 단위로 fp32 변환해 채점
+    int8 : 벡터별 스케일(max|v|/127) 코드 codes.{gen}.i8 + scales.{gen}.f32 를 상주,
+           1차로 코드 전체를 스캔하고 상위 후보(top_k × RERANK, 최소 RERANK_MIN)만 재채점용 vectors.{gen}.f16 memmap으로 재채점
+           (상주 메모리 약 1/4, 디스크는 코드 1 + 재채점용 fp16 2바이트/차원이라 fp32 대비 약 3/4)
+           예전 fp32 재채점 파일(vectors.{gen}.f32)도 그대로 읽고, 다음 persist 때 fp16으로 다시 저장
+    저장된 모드와 설정이 다르면 로드 시 변환하고 다음 persist 때 새 모드로 저장
+
+벤치마크 (Chroma 공유 컬렉션 + where 필터 대비):
+    python -m app.services.numpy_vector_service bench --users 30 --docs-per-user 3000
+양자화 recall@k / 유저당 용량 (기존 numpy 인덱스 또는 Chroma 디렉터리의 실제 임베딩 사용):
+    python -m app.services.numpy_vector_service recall --index D:/chroma_db/dense_np/chat_system
+    python -m app.services.numpy_vector_service recall --chroma D:/chroma_db
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+DENSE_NUMPY_PATH = os.getenv("DENSE_NUMPY_PATH", "D:/chroma_db/dense_np")
+MAX_LOADED_USERS = int(os.getenv("DENSE_NUMPY_MAX_USERS", "256"))
+QUANT = os.getenv("DENSE_NUMPY_QUANT", "fp32").lower()
+RERANK = int(os.getenv("DENSE_NUMPY_RERANK", "4"))
+RERANK_MIN = 64
+
+_DOCS_FILE = "docs.json"
+
+
+def _sha1_16(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+# ---------- where 필터 (Chroma 문법의 부분집합) ----------
+_OPS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$in": lambda a, b: a in b,
+    "$nin": lambda a, b: a not in b,
+}
+
+
+def match_where(meta: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(match_where(meta, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(match_where(meta, c) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = meta.get(key)
+            for op, operand in cond.items():
+                fn = _OPS.get(op)
+                if fn is None:
+                    raise ValueError(f"지원하지 않는 where 연산자: {op}")
+                if not fn(value, operand):
+                    return False
+        elif meta.get(key) != cond:
+            return False
+    return True
+
+
+def _where_user_id(where: Optional[Dict[str, Any]]) -> Optional[int]:
+    """where에서 user_id 동등 조건 추출 (최상위 또는 $and 안)"""
+    if not where:
+        return None
+    cond = where.get("user_id")
+    if cond is not None:
+        if isinstance(cond, dict):
+            return cond.get("$eq")
+        return cond
+    for sub in where.get("$and", ()):
+        uid = _where_user_id(sub)
+        if uid is not None:
+            return uid
+    return None
+
+
+def _only_user_filter(where: Dict[str, Any]) -> bool:
+    return list(where) == ["user_id"]
+
+
+# ---------- 양자화 ----------
+QUANT_MODES = ("fp32", "fp16", "int8")
+_BLOCK = 4096  # fp16/int8 → fp32 변환 시 임시 메모리 상한 (행 단위 블록)
+
+
+def quantize_int8(matrix: np.ndarray):
+    """행(벡터)별 대칭 스케일: code = round(v / scale), scale = max|v| / 127"""
+    m = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(m).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(m / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _block_dot(matrix: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """fp32가 아닌 행렬 · q (블록 단위로 fp32 변환해 임시 메모리 제한)"""
+    if matrix.dtype == np.float32:
+        return matrix @ q
+    out = np.empty(len(matrix), dtype=np.float32)
+    for s in range(0, len(matrix), _BLOCK):
+        out[s:s + _BLOCK] = matrix[s:s + _BLOCK].astype(np.float32) @ q
+    return out
+
+
+# ---------- 유저 샤드 ----------
+class _View:
+    """
+    검색용 불변 스냅샷 (쓰기는 새 View로 교체)
+    - matrix: fp32(기본) 또는 fp16(fp16/int8 재채점용), 쓰기 직후 작업 사본은 fp32
+    - codes/scales: int8 모드의 1차 스캔용 (메모리 상주)
+    """
+    __slots__ = ("ids", "texts", "metas", "matrix", "codes", "scales", "index")
+
+    def __init__(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metas: List[Dict[str, Any]],
+        matrix: np.ndarray,
+        codes: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+    ):
+        self.ids = ids
+        self.texts = texts
+        self.metas = metas
+        self.matrix = matrix
+        self.codes = codes
+        self.scales = scales
+        self.index = {did: i for i, did in enumerate(ids)}
+
+
+_DATA_PREFIXES = ("vectors.", "codes.", "scales.")
+
+
+class _UserShard:
+    """
+    유저 1명의 인덱스. 여러 프로세스가 같은 디렉터리를 공유하므로:
+    - 읽기: refresh()가 docs.json 시그니처(inode/mtime/size)를 확인해 다른 프로세스의 커밋을 다시 로드
+    - 쓰기: 변경은 메모리에 바로 반영 + pending(연산 로그)에 기록
+            save()는 파일 락 → 디스크의 최신 세대를 읽어 pending을 재적용(병합) → 새 세대 기록
+            → 낡은 스냅샷 위에 덮어써서 다른 프로세스의 문서를 잃지 않음
+    """
+    __slots__ = ("user_id", "path", "quant", "dim", "view", "dirty", "gen", "files", "pending", "sig", "lock", "evicted")
+
+    def __init__(self, user_id: int, path: str, quant: str = "fp32"):
+        self.user_id = user_id
+        self.path = path
+        self.quant = quant
+        self.dim: Optional[int] = None
+        self.view = _View([], [], [], np.empty((0, 0), dtype=np.float32))
+        self.dirty = False
+        self.gen = 0
+        self.files: List[str] = []
+        self.pending: List[tuple] = []
+        self.sig = None
+        # 샤드 단위 락: refresh/변경/save 직렬화 (서비스 전역 락은 LRU dict 조작에만)
+        self.lock = threading.RLock()
+        self.evicted = False
+
+    # ---------- 디스크 ----------
+    def _memmap(self, name: str, dtype, n: int, cols: Optional[int] = None) -> np.ndarray:
+        shape = (n, cols) if cols else (n,)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode="r", shape=shape)
+
+    def _file_lock(self) -> FileLock:
+        return FileLock(os.path.join(self.path, ".lock"))
+
+    def _stat_sig(self):
+        try:
+            st = os.stat(os.path.join(self.path, _DOCS_FILE))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def load(self) -> None:
+        """디스크의 현재 세대로 교체 (pending 재적용은 호출 측)"""
+        self.sig = self._stat_sig()
+        docs_path = os.path.join(self.path, _DOCS_FILE)
+        if self.sig is None:
+            return
+        with open(docs_path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        self.dim = doc["dim"]
+        self.gen = doc["gen"]
+        stored = doc.get("quant", "fp32")
+        self.files = [doc[k] for k in ("vectors", "codes", "scales") if doc.get(k)]
+        self.dirty = False
+        n = len(doc["ids"])
+        if not n:
+            self.view = _View([], [], [], np.empty((0, self.dim or 0), dtype=np.float32))
+            return
+        dtype = np.float16 if doc["vectors"].endswith(".f16") else np.float32
+        matrix = self._memmap(doc["vectors"], dtype, n, self.dim)
+        codes = scales = None
+        if stored == "int8":
+            # 1차 스캔용 코드는 상주 (재채점용 벡터는 후보 행만 페이지 인)
+            codes = np.fromfile(os.path.join(self.path, doc["codes"]), dtype=np.int8).reshape(n, self.dim)
+            scales = np.fromfile(os.path.join(self.path, doc["scales"]), dtype=np.float32)
+        self.view = _View(doc["ids"], doc["texts"], doc["metas"], matrix, codes, scales)
+        if stored != self.quant:
+            self._requantize()
+            self.dirty = True  # 다음 persist 때 설정된 모드로 다시 저장
+        elif stored == "int8" and dtype == np.float32:
+            self.dirty = True  # 예전 fp32 재채점 파일 → 다음 persist 때 fp16으로
+
+    def _sync(self) -> bool:
+        """(파일 락 보유 상태) 다른 프로세스가 커밋했으면 다시 읽고 pending 재적용"""
+        sig = self._stat_sig()
+        if sig == self.sig:
+            return False
+        pending = self.pending
+        self.load()
+        for op in pending:
+            self._apply(op)
+        self.pending = pending
+        if pending:
+            self.dirty = True
+        return True
+
+    def refresh(self) -> bool:
+        """캐시 hit 시 호출: docs.json이 바뀌었을 때만 락을 잡고 다시 로드 (평소에는 stat 1번)"""
+        if self._stat_sig() == self.sig:
+            return False
+        with self._file_lock():
+            return self._sync()
+
+    def save(self) -> None:
+        """락 → 최신 세대와 병합 → 새 세대 파일들 → docs.json 원자 교체(커밋) → 쓰지 않는 세대 정리"""
+        os.makedirs(self.path, exist_ok=True)
+        with self._file_lock():
+            self._sync()
+            self._write()
+            self._sweep()
+
+    def _write(self) -> None:
+        view = self.view
+        self.gen += 1
+        n = len(view.ids)
+        doc = {"dim": self.dim, "gen": self.gen, "quant": self.quant, "vectors": None, "codes": None, "scales": None}
+        if n:
+            if self.quant in ("fp16", "int8"):
+                doc["vectors"] = f"vectors.{self.gen}.f16"
+                np.asarray(view.matrix, dtype=np.float16).tofile(os.path.join(self.path, doc["vectors"]))
+            else:
+                doc["vectors"] = f"vectors.{self.gen}.f32"
+                np.ascontiguousarray(view.matrix, dtype=np.float32).tofile(os.path.join(self.path, doc["vectors"]))
+            if self.quant == "int8":
+                doc["codes"] = f"codes.{self.gen}.i8"
+                doc["scales"] = f"scales.{self.gen}.f32"
+                view.codes.tofile(os.path.join(self.path, doc["codes"]))
+                view.scales.tofile(os.path.join(self.path, doc["scales"]))
+        doc.update({"ids": view.ids, "texts": view.texts, "metas": view.metas})
+        tmp = os.path.join(self.path, _DOCS_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.path, _DOCS_FILE))
+        self.sig = self._stat_sig()
+        self.files = [doc[k] for k in ("vectors", "codes", "scales") if doc[k]]
+        if n:
+            dtype = np.float16 if doc["vectors"].endswith(".f16") else np.float32
+            matrix = self._memmap(doc["vectors"], dtype, n, self.dim)
+            self.view = _View(view.ids, view.texts, view.metas, matrix, view.codes, view.scales)
+        self.pending = []
+        self.dirty = False
+
+    def _sweep(self) -> None:
+        """
+        (파일 락 보유 상태) 현재 세대가 아닌 데이터 파일 삭제
+        - Windows는 다른 프로세스/스냅샷이 memmap 중인 파일을 지울 수 없음(PermissionError) → 다음 save 때 재시도
+        """
+        keep = set(self.files)
+        for name in os.listdir(self.path):
+            if name.startswith(_DATA_PREFIXES) and name not in keep:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    def _requantize(self) -> None:
+        view = self.view
+        codes = scales = None
+        if self.quant == "int8" and len(view.ids):
+            codes, scales = quantize_int8(view.matrix)
+        self.view = _View(view.ids, view.texts, view.metas, view.matrix, codes, scales)
+
+    # ---------- 변경 (copy-on-write, 작업 사본은 fp32) ----------
+    def upsert(self, ids: List[str], vectors: np.ndarray, texts: List[str], metas: List[Dict[str, Any]]) -> None:
+        self._apply(("upsert", ids, vectors, texts, metas))
+        self.pending.append(("upsert", ids, vectors, texts, metas))
+        self.dirty = True
+
+    def delete(self, predicate) -> int:
+        removed = self._apply(("delete", predicate))
+        if removed:
+            self.pending.append(("delete", predicate))
+            self.dirty = True
+        return removed
+
+    def _apply(self, op: tuple) -> int:
+        if op[0] == "upsert":
+            self._upsert(*op[1:])
+            return len(op[1])
+        return self._delete(op[1])
+
+    def _upsert(self, ids: List[str], vectors: np.ndarray, texts: List[str], metas: List[Dict[str, Any]]) -> None:
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"임베딩 차원 불일치: {vectors.shape[1]} != {self.dim}")
+        view = self.view
+        matrix = np.array(view.matrix, dtype=np.float32, copy=True).reshape(len(view.ids), self.dim)
+        new_ids, new_texts, new_metas = list(view.ids), list(view.texts), list(view.metas)
+        append_rows = []
+        for j, did in enumerate(ids):
+            i = view.index.get(did)
+            if i is None:
+                new_ids.append(did)
+                new_texts.append(texts[j])
+                new_metas.append(metas[j])
+                append_rows.append(j)
+            else:
+                matrix[i] = vectors[j]
+                new_texts[i] = texts[j]
+                new_metas[i] = metas[j]
+        if append_rows:
+            matrix = np.vstack([matrix, vectors[append_rows]])
+        self.view = _View(new_ids, new_texts, new_metas, matrix)
+        self._requantize()
+
+    def _delete(self, predicate) -> int:
+        view = self.view
+        keep = [i for i in range(len(view.ids)) if not predicate(view.ids[i], view.metas[i])]
+        removed = len(view.ids) - len(keep)
+        if removed:
+            matrix = np.asarray(view.matrix)[keep] if keep else np.empty((0, self.dim or 0), dtype=np.float32)
+            self.view = _View(
+                [view.ids[i] for i in keep],
+                [view.texts[i] for i in keep],
+                [view.metas[i] for i in keep],
+                np.array(matrix, dtype=np.float32),
+            )
+            self._requantize()
+        return removed
+
+    @property
+    def nbytes(self) -> int:
+        """상주 메모리 기준 (int8 모드의 fp16 memmap은 재채점 후보 행만 페이지 인)"""
+        view = self.view
+        if view.codes is not None:
+            return int(view.codes.nbytes + view.scales.nbytes)
+        return int(view.matrix.nbytes)
+
+    @property
+    def disk_bytes(self) -> int:
+        total = 0
+        for name in self.files:
+            try:
+                total += os.path.getsize(os.path.join(self.path, name))
+            except OSError:
+                pass
+        return total
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k개 인덱스 (내림차순)"""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")][:k]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class NumpyVectorDBService:
+    """VectorDBService와 같은 인터페이스 (build_id/add/upsert/delete/persist/exists/search_similar/info)"""
+
+    def __init__(
+        self,
+        persist_directory: str = DENSE_NUMPY_PATH,
+        collection_name: str = "chat_system",
+        metric: str = "cosine",
+        *,
+        max_loaded_users: int = MAX_LOADED_USERS,
+        quant: str = QUANT,
+        rerank: int = RERANK,
+        embedding_client=None,
+    ):
+        self.metric = metric.lower().strip()
+        if self.metric != "cosine":
+            raise ValueError(f"NumpyVectorDBService는 cosine만 지원합니다: {self.metric}")
+        if quant not in QUANT_MODES:
+            raise ValueError(f"지원하지 않는 양자화 모드: {quant} ({'/'.join(QUANT_MODES)})")
+        self.quant = quant
+        self.rerank = max(1, rerank)
+        if embedding_client is None:
+            from app.clients.huggingface_client import HuggingFaceClient
+            embedding_client = HuggingFaceClient()
+        self.embedding_client = embedding_client
+        self.root = os.path.join(persist_directory, collection_name)
+        self.collection_name = collection_name
+        self.max_loaded_users = max_loaded_users
+        self._lock = threading.RLock()
+        self._shards: "OrderedDict[int, _UserShard]" = OrderedDict()
+        self._evicting: Dict[int, _UserShard] = {}  # 내려가며 저장 중인 샤드 (같은 유저 재로드가 기다림)
+        self.stats = {"hits": 0, "loads": 0, "reloads": 0, "evictions": 0}
+
+    # ---------- ID helpers ----------
+    def build_id(self, user_id: int, session_id: str, type_: str, text: str) -> str:
+        """공통 doc_id 규칙 (Dense/Sparse 동일)"""
+        return f"{user_id}::{session_id}::{type_}::{_sha1_16(text)}"
+
+    @staticmethod
+    def _user_of(doc_id: str, meta: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        if meta and meta.get("user_id") is not None:
+            return int(meta["user_id"])
+        head = doc_id.split("::", 1)[0]
+        return int(head) if head.isdigit() and "::" in doc_id else None
+
+    def _resolve_id(self, text: str, meta: Dict[str, Any]) -> str:
+        user_id = meta.get("user_id")
+        session_id = meta.get("session_id")
+        type_ = meta.get("type", "text")
+        return self.build_id(user_id, session_id, type_, text) if all([user_id, session_id]) else _sha1_16(text)
+
+    # ---------- 샤드 LRU ----------
+    def _shard(self, user_id: int) -> _UserShard:
+        """
+        전역 락은 LRU dict 조회/삽입에만. 디스크 로드/재로드는 샤드 락, 내린 샤드 저장은 락 밖에서
+        → 한 유저의 로드/저장(또는 다른 프로세스의 파일 락)이 다른 유저 검색을 막지 않음
+        """
+        evicted: List[_UserShard] = []
+        pending_cold = None
+        with self._lock:
+            shard = self._shards.get(user_id)
+            hit = shard is not None
+            if hit:
+                self._shards.move_to_end(user_id)
+                self.stats["hits"] += 1
+            else:
+                shard = _UserShard(user_id, os.path.join(self.root, str(user_id)), self.quant)
+                self.stats["loads"] += 1
+                self._shards[user_id] = shard
+                while len(self._shards) > self.max_loaded_users:
+                    _, cold = self._shards.popitem(last=False)
+                    self._evicting[cold.user_id] = cold
+                    evicted.append(cold)
+                    self.stats["evictions"] += 1
+                pending_cold = self._evicting.get(user_id)
+        if pending_cold is not None:
+            with pending_cold.lock:  # 같은 유저가 내려가며 저장 중이면 끝난 뒤 로드
+                pass
+        with shard.lock:
+            # 처음 로드 / 다른 프로세스(코얼레서/Celery 등)가 커밋한 세대가 있으면 다시 로드
+            if shard.refresh() and hit:
+                self.stats["reloads"] += 1
+        for cold in evicted:
+            self._save_evicted(cold)
+        return shard
+
+    def _save_evicted(self, cold: _UserShard) -> None:
+        with cold.lock:
+            cold.evicted = True  # 이후 이 객체로 오는 쓰기는 _locked_shard가 새 샤드로 다시 받음
+            try:
+                if cold.dirty:
+                    cold.save()
+            finally:
+                with self._lock:
+                    if self._evicting.get(cold.user_id) is cold:
+                        del self._evicting[cold.user_id]
+
+    @contextmanager
+    def _locked_shard(self, user_id: int):
+        """쓰기용: 샤드 락을 잡은 상태로 제공 (잡기 직전에 LRU에서 내려간 샤드면 다시 조회)"""
+        while True:
+            shard = self._shard(user_id)
+            with shard.lock:
+                if not shard.evicted:
+                    yield shard
+                    return
+
+    def _known_user_ids(self) -> List[int]:
+        on_disk = []
+        if os.path.isdir(self.root):
+            on_disk = [int(d) for d in os.listdir(self.root) if d.isdigit()]
+        with self._lock:
+            return sorted(set(on_disk) | set(self._shards))
+
+    # ---------- write ----------
+    def _write_rows(
+        self,
+        doc_ids: List[str],
+        vectors,
+        texts: List[str],
+        metas: List[Dict[str, Any]],
+        *,
+        persist: bool = True,
+    ) -> None:
+        """임베딩이 끝난 행을 유저별로 나눠 반영"""
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(doc_ids), -1))
+        groups: Dict[int, List[int]] = {}
+        for i, did in enumerate(doc_ids):
+            uid = self._user_of(did, metas[i])
+            if uid is None:
+                raise ValueError(f"user_id를 알 수 없는 문서: {did}")
+            groups.setdefault(uid, []).append(i)
+        for uid, rows in groups.items():
+            with self._locked_shard(uid) as shard:
+                shard.upsert(
+                    [doc_ids[i] for i in rows],
+                    vectors[rows],
+                    [texts[i] for i in rows],
+                    [metas[i] for i in rows],
+                )
+                if persist:
+                    shard.save()
+
+    def add_document(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        *,
+        doc_id: Optional[str] = None,
+        id_: Optional[str] = None,
+        persist: bool = True,
+    ) -> None:
+        self.upsert_document(text, metadata, doc_id=doc_id, persist=persist)
+
+    def add_documents(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        *,
+        doc_ids: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        persist: bool = True,
+    ) -> None:
+        metas = [dict(metadatas[i]) if metadatas else {} for i in range(len(texts))]
+        if doc_ids is None:
+            doc_ids = ids if ids is not None else [m.get("doc_id") or self._resolve_id(t, m) for t, m in zip(texts, metas)]
+        self.upsert_documents(texts, metas, doc_ids=doc_ids, persist=persist)
+
+    def upsert_document(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        *,
+        doc_id: Optional[str] = None,
+        id_: Optional[str] = None,
+        persist: bool = True,
+    ) -> None:
+        meta = dict(metadata or {})
+        doc_id = doc_id or meta.get("doc_id") or self._resolve_id(text, meta)
+        self.upsert_documents([text], [meta], doc_ids=[doc_id], persist=persist)
+
+    def upsert_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        *,
+        doc_ids: List[str],
+        persist: bool = True,
+    ) -> List[str]:
+        if not texts:
+            return []
+        if not (len(texts) == len(metadatas) == len(doc_ids)):
+            raise ValueError("texts/metadatas/doc_ids 길이가 다릅니다.")
+        latest: Dict[str, int] = {did: i for i, did in enumerate(doc_ids)}
+        keep = sorted(latest.values())
+        texts = [texts[i] for i in keep]
+        doc_ids = [doc_ids[i] for i in keep]
+        metas: List[Dict[str, Any]] = []
+        for i, did in zip(keep, doc_ids):
+            m = dict(metadatas[i] or {})
+            m["doc_id"] = did
+            metas.append(m)
+
+        embeddings = self.embedding_client.embed_many(texts)
+        self._write_rows(doc_ids, embeddings, texts, metas, persist=persist)
+        return list(doc_ids)
+
+    def delete_documents(self, doc_ids: List[str], *, persist: bool = True) -> None:
+        if not doc_ids:
+            return
+        groups: Dict[Optional[int], set] = {}
+        for did in doc_ids:
+            groups.setdefault(self._user_of(did), set()).add(did)
+        unknown = groups.pop(None, None)
+        targets = list(groups.items())
+        if unknown:
+            targets += [(uid, unknown) for uid in self._known_user_ids()]
+        for uid, ids in targets:
+            with self._locked_shard(uid) as shard:
+                if shard.delete(lambda did, _m, ids=ids: did in ids) and persist:
+                    shard.save()
+
+    def persist(self) -> None:
+        with self._lock:
+            shards = list(self._shards.values())
+        for shard in shards:
+            with shard.lock:
+                if shard.dirty and not shard.evicted:
+                    shard.save()
+
+    def close(self) -> None:
+        self.persist()
+
+    # ---------- 세션 단위 삭제 ----------
+    def delete_by_session(self, user_id: int, session_id: str, *, persist: bool = True) -> int:
+        try:
+            with self._locked_shard(user_id) as shard:
+                removed = shard.delete(lambda _did, m: m.get("session_id") == session_id)
+                if removed and persist:
+                    shard.save()
+            return 1
+        except Exception:
+            return 0
+
+    # ---------- 존재 확인 ----------
+    def exists(self, doc_id: str) -> bool:
+        uid = self._user_of(doc_id)
+        if uid is None:
+            return False
+        return doc_id in self._shard(uid).view.index
+
+    # ---------- read ----------
+    def search_similar(
+        self,
+        query: str,
+        top_k: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        *,
+        return_similarity: bool = False,
+        max_distance: Optional[float] = None,
+        min_similarity: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        vector = self.embedding_client.embed(query)
+        return self.search_by_vector(
+            vector, top_k, where,
+            return_similarity=return_similarity,
+            max_distance=max_distance,
+            min_similarity=min_similarity,
+        )
+
+    def search_by_vector(
+        self,
+        vector,
+        top_k: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        *,
+        return_similarity: bool = False,
+        max_distance: Optional[float] = None,
+        min_similarity: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        user_id = _where_user_id(where)
+        if user_id is None:
+            raise ValueError("NumpyVectorDBService 검색에는 where의 user_id 조건이 필요합니다.")
+        view = self._shard(int(user_id)).view  # 스냅샷 (이후 쓰기와 무관)
+        n = len(view.ids)
+        if n == 0 or top_k <= 0:
+            return []
+
+        q = np.asarray(vector, dtype=np.float32).ravel()
+        q = q / (np.linalg.norm(q) or 1.0)
+        if view.codes is not None:
+            # 1차: int8 코드 스캔 (코드·q × 스케일 = 근사 코사인)
+            scores = _block_dot(view.codes, q) * view.scales
+        else:
+            scores = _block_dot(view.matrix, q)
+
+        if not _only_user_filter(where):
+            mask = np.fromiter((match_where(m, where) for m in view.metas), dtype=bool, count=n)
+            if not mask.any():
+                return []
+            scores = np.where(mask, scores, -np.inf)
+            n = int(mask.sum())
+
+        k = min(top_k, n)
+        if view.codes is not None:
+            # 2차: 근사 상위 후보만 fp16 재채점 사본으로 (fp32 변환 후) 재채점
+            cand = np.sort(_top(scores, min(n, max(k * self.rerank, RERANK_MIN))))  # memmap 순차 접근
+            exact = np.asarray(view.matrix[cand], dtype=np.float32) @ q
+            order = np.argsort(-exact, kind="stable")[:k]
+            top, sims = cand[order], exact[order]
+        else:
+            top = _top(scores, k)
+            sims = scores[top]
+
+        out: List[Dict[str, Any]] = []
+        for i, sim in zip(top, sims):
+            sim = float(sim)
+            item = {
+                "text": view.texts[i],
+                "metadata": dict(view.metas[i]),
+                "distance": 1.0 - sim,
+            }
+            if return_similarity:
+                item["similarity"] = sim
+            out.append(item)
+
+        if max_distance is not None:
+            out = [x for x in out if x["distance"] <= max_distance]
+        if min_similarity is not None:
+            out = [x for x in out if x.get("similarity", 1.0 - x["distance"]) >= min_similarity]
+        return out
+
+    # ---------- utils ----------
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "metric": self.metric,
+                "collection_name": self.collection_name,
+                "backend": "numpy",
+                "loaded_users": len(self._shards),
+                "quant": self.quant,
+                "loaded_bytes": sum(s.nbytes for s in self._shards.values()),
+                **self.stats,
+            }
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import statistics
+    import tempfile
+
+    class _NoModel:
+        """벤치는 임베딩을 미리 만든 벡터로 대체 (모델 비용은 두 백엔드 공통이므로 제외)"""
+
+        def embed(self, text):
+            raise RuntimeError("bench uses search_by_vector")
+
+        embed_many = embed
+
+    def _corpus(rng: np.random.Generator, n_users: int, docs_per_user: int, dim: int):
+        """세션 × (summary + key_sentence + keywords_all + keyword×8) 형태의 유저별 코퍼스"""
+        per_session = 11
+        for uid in range(1, n_users + 1):
+            vecs = _normalize(rng.standard_normal((docs_per_user, dim), dtype=np.float32))
+            ids, metas, texts = [], [], []
+            for j in range(docs_per_user):
+                sid = f"250101_{j // per_session:03d}"
+                type_ = ("summary", "key_sentence", "keywords_all")[j % per_session] if j % per_session < 3 else "keyword"
+                did = f"{uid}::{sid}::{type_}::{j:016x}"
+                ids.append(did)
+                texts.append(f"doc {j}")
+                metas.append({"user_id": uid, "session_id": sid, "type": type_, "doc_id": did})
+            yield uid, ids, vecs, texts, metas
+
+    def _pct(lat: List[float]) -> Dict[str, float]:
+        lat = sorted(lat)
+        return {
+            "p50_ms": round(statistics.median(lat), 3),
+            "p99_ms": round(lat[min(len(lat) - 1, int(0.99 * len(lat)))], 3),
+        }
+
+    def bench(n_users: int, docs_per_user: int, n_queries: int, dim: int, top_k: int, max_loaded: int) -> None:
+        rng = np.random.default_rng(7)
+        tmpdir = tempfile.mkdtemp(prefix="dense_bench_")
+        try:
+            corpus = list(_corpus(rng, n_users, docs_per_user, dim))
+            queries = [
+                (random.Random(i).randint(1, n_users), _normalize(rng.standard_normal((1, dim), dtype=np.float32))[0])
+                for i in range(n_queries)
+            ]
+
+            svc = NumpyVectorDBService(tmpdir, max_loaded_users=max_loaded, embedding_client=_NoModel())
+            t0 = time.perf_counter()
+            for uid, ids, vecs, texts, metas in corpus:
+                svc._write_rows(ids, vecs, texts, metas, persist=True)
+            np_build = time.perf_counter() - t0
+
+            lat, np_results = [], []
+            for uid, q in queries:
+                t0 = time.perf_counter()
+                res = svc.search_by_vector(q, top_k, {"user_id": uid}, return_similarity=True)
+                lat.append((time.perf_counter() - t0) * 1000)
+                np_results.append([r["metadata"]["doc_id"] for r in res])
+
+            # 정확도 기준: 전수 내적
+            by_user = {uid: (ids, vecs) for uid, ids, vecs, _, _ in corpus}
+            exact = []
+            for uid, q in queries:
+                ids, vecs = by_user[uid]
+                exact.append([ids[i] for i in np.argsort(-(vecs @ q))[:top_k]])
+            np_recall = statistics.mean(len(set(a) & set(b)) / top_k for a, b in zip(np_results, exact))
+
+            report = {
+                "users": n_users,
+                "docs_per_user": docs_per_user,
+                "dim": dim,
+                "top_k": top_k,
+                "numpy": {
+                    "build_s": round(np_build, 2),
+                    **_pct(lat),
+                    "recall": round(np_recall, 4),
+                    **{k: v for k, v in svc.info().items() if k in ("loads", "evictions", "loaded_users")},
+                },
+            }
+
+            try:
+                import chromadb
+            except ImportError:
+                report["chroma"] = "chromadb 미설치 - 생략"
+            else:
+                client = chromadb.PersistentClient(path=os.path.join(tmpdir, "chroma"))
+                col = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+                t0 = time.perf_counter()
+                for uid, ids, vecs, texts, metas in corpus:
+                    for s in range(0, len(ids), 5000):
+                        col.add(
+                            ids=ids[s:s + 5000],
+                            embeddings=vecs[s:s + 5000].tolist(),
+                            documents=texts[s:s + 5000],
+                            metadatas=metas[s:s + 5000],
+                        )
+                ch_build = time.perf_counter() - t0
+                lat, ch_results = [], []
+                for uid, q in queries:
+                    t0 = time.perf_counter()
+                    res = col.query(query_embeddings=[q.tolist()], n_results=top_k, where={"user_id": uid})
+                    lat.append((time.perf_counter() - t0) * 1000)
+                    ch_results.append(res["ids"][0])
+                ch_recall = statistics.mean(len(set(a) & set(b)) / top_k for a, b in zip(ch_results, exact))
+                report["chroma"] = {"build_s": round(ch_build, 2), **_pct(lat), "recall": round(ch_recall, 4)}
+
+            print(report)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _load_index(root: str, max_users: int):
+        """기존 numpy 인덱스 ({root}/{user_id}/docs.json)에서 유저별 (ids, vecs, texts, metas)"""
+        for d in sorted((d for d in os.listdir(root) if d.isdigit()), key=int)[:max_users]:
+            shard = _UserShard(int(d), os.path.join(root, d))
+            shard.load()
+            view = shard.view
+            if view.ids:
+                yield int(d), view.ids, np.asarray(view.matrix, dtype=np.float32), view.texts, view.metas
+
+    def _load_chroma(path: str, collection: str, max_users: int):
+        """Chroma 컬렉션의 저장된 임베딩을 유저별로 묶음"""
+        import chromadb
+        col = chromadb.PersistentClient(path=path).get_collection(collection)
+        got = col.get(include=["embeddings", "metadatas", "documents"])
+        by_user: Dict[int, list] = {}
+        for did, emb, meta, text in zip(got["ids"], got["embeddings"], got["metadatas"], got["documents"]):
+            uid = (meta or {}).get("user_id")
+            if uid is None:
+                continue
+            m = dict(meta)
+            m.setdefault("doc_id", did)
+            by_user.setdefault(int(uid), []).append((did, emb, text or "", m))
+        for uid in sorted(by_user)[:max_users]:
+            rows = by_user[uid]
+            yield (
+                uid,
+                [r[0] for r in rows],
+                _normalize(np.asarray([r[1] for r in rows], dtype=np.float32)),
+                [r[2] for r in rows],
+                [r[3] for r in rows],
+            )
+
+    def recall(corpus, n_queries: int, modes: List[str], rerank: int) -> None:
+        """
+        모드별 recall@10/@50 (fp32 전수 검색 대비) + 유저당 상주/디스크 바이트
+        질의: 유저 문서 벡터에 잡음을 섞은 것 (실제 질의와 같은 임베딩 분포)
+        """
+        corpus = list(corpus)
+        if not corpus:
+            print("데이터 없음")
+            return
+        rng = np.random.default_rng(11)
+        queries = []
+        for qi in range(n_queries):
+            uid, ids, vecs, _, _ = corpus[qi % len(corpus)]
+            base = vecs[rng.integers(len(ids))]
+            queries.append((uid, _normalize((base + 0.5 * rng.standard_normal(base.shape, dtype=np.float32) / np.sqrt(len(base)))[None])[0]))
+        by_user = {uid: (ids, vecs) for uid, ids, vecs, _, _ in corpus}
+        exact = {}
+        for qi, (uid, q) in enumerate(queries):
+            ids, vecs = by_user[uid]
+            exact[qi] = [ids[i] for i in _top(vecs @ q, 50)]
+
+        tmpdir = tempfile.mkdtemp(prefix="dense_recall_")
+        report: Dict[str, Any] = {
+            "users": len(corpus),
+            "docs": sum(len(c[1]) for c in corpus),
+            "dim": int(corpus[0][2].shape[1]),
+        }
+        try:
+            for mode in modes:
+                path = os.path.join(tmpdir, mode)
+                svc = NumpyVectorDBService(path, quant=mode, rerank=rerank, embedding_client=_NoModel())
+                for uid, ids, vecs, texts, metas in corpus:
+                    svc._write_rows(ids, vecs, texts, metas, persist=True)
+                # 디스크에서 다시 열어 실제 서빙 경로(memmap/상주 코드)로 측정
+                svc = NumpyVectorDBService(path, quant=mode, rerank=rerank, max_loaded_users=len(corpus), embedding_client=_NoModel())
+                rec = {10: [], 50: []}
+                lat = []
+                for qi, (uid, q) in enumerate(queries):
+                    t0 = time.perf_counter()
+                    res = svc.search_by_vector(q, 50, {"user_id": uid})
+                    lat.append((time.perf_counter() - t0) * 1000)
+                    got = [r["metadata"]["doc_id"] for r in res]
+                    for k in rec:
+                        truth = exact[qi][:k]
+                        rec[k].append(len(set(got[:k]) & set(truth)) / len(truth))
+                shards = [svc._shard(uid) for uid, *_ in corpus]
+                report[mode] = {
+                    "recall@10": round(statistics.mean(rec[10]), 4),
+                    "recall@50": round(statistics.mean(rec[50]), 4),
+                    **_pct(lat),
+                    "resident_bytes_per_user": int(statistics.mean(s.nbytes for s in shards)),
+                    "disk_bytes_per_user": int(statistics.mean(s.disk_bytes for s in shards)),
+                }
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        print(report)
+
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_bench = sub.add_parser("bench")
+    p_bench.add_argument("--users", type=int, default=30)
+    p_bench.add_argument("--docs-per-user", type=int, default=3000)
+    p_bench.add_argument("--queries", type=int, default=300)
+    p_bench.add_argument("--dim", type=int, default=768)
+    p_bench.add_argument("--top-k", type=int, default=50)
+    p_bench.add_argument("--max-loaded", type=int, default=MAX_LOADED_USERS)
+    p_recall = sub.add_parser("recall")
+    p_recall.add_argument("--index", help="기존 numpy 인덱스 디렉터리 ({persist_directory}/{collection})")
+    p_recall.add_argument("--chroma", help="Chroma persist 디렉터리")
+    p_recall.add_argument("--collection", default="chat_system")
+    p_recall.add_argument("--max-users", type=int, default=50)
+    p_recall.add_argument("--queries", type=int, default=500)
+    p_recall.add_argument("--modes", default=",".join(QUANT_MODES))
+    p_recall.add_argument("--rerank", type=int, default=RERANK)
+    p_recall.add_argument("--users", type=int, default=10, help="합성 데이터 사용 시")
+    p_recall.add_argument("--docs-per-user", type=int, default=3000, help="합성 데이터 사용 시")
+    p_recall.add_argument("--dim", type=int, default=768, help="합성 데이터 사용 시")
+    args = parser.parse_args()
+    if args.cmd == "bench":
+        bench(args.users, args.docs_per_user, args.queries, args.dim, args.top_k, args.max_loaded)
+    else:
+        if args.index:
+            data = _load_index(args.index, args.max_users)
+        elif args.chroma:
+            data = _load_chroma(args.chroma, args.collection, args.max_users)
+        else:
+            data = _corpus(np.random.default_rng(7), args.users, args.docs_per_user, args.dim)
+        recall(data, args.queries, args.modes.split(","), args.rerank)
@@ -0,0 +1,116 @@
+# app/services/retrieval_runtime.py
+from __future__ import annotations
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.services.hybrid_memory_service import HybridMemoryService
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalRuntime:
+    """
+    워커(프로세스)당 1개만 존재하는 검색 스택 관리자
+    - startup에서 HybridMemoryService(Sparse + Dense + 임베딩 모델)를 한 번만 생성
+    - 더미 쿼리로 워밍업 → 첫 요청에서 모델 로딩/그래프 초기화 비용을 내지 않도록
+    - shutdown에서 sqlite 커넥션 등 정리
+    - ready 여부/상태를 노출 (헬스체크용)
+    """
+
+    _WARMUP_QUERY = "오늘 하루 어땠어"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hybrid: Optional[HybridMemoryService] = None
+        self._ready = False
+        self._started_at: Optional[float] = None
+        self._startup_sec: Optional[float] = None
+        self._warmup_sec: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    # ---------------------- Lifecycle ----------------------
+    def start(self, *, warmup: bool = True) -> HybridMemoryService:
+        """
+        검색 스택 생성 + 워밍업 (이미 떠 있으면 그대로 반환)
+        - 생성 실패 시 last_error를 남기고 ready=False 유지 후 예외 전파 (startup 훅은 잡아서 워커를 살려 둠)
+        """
+        with self._lock:
+            if self._hybrid is not None:
+                return self._hybrid
+
+            t0 = time.perf_counter()
+            try:
+                hybrid = HybridMemoryService()
+            except Exception as e:
+                self._last_error = str(e)
+                logger.exception("RUNTIME_ERROR retrieval_stack_init_failed")
+                raise
+            self._startup_sec = time.perf_counter() - t0
+            self._started_at = time.time()
+            self._last_error = None  # 이전 기동 실패 기록은 성공 시 지움
+            self._hybrid = hybrid
+            logger.info(f"RUNTIME_START init_sec={self._startup_sec:.2f}")
+
+            if warmup:
+                self._warmup(hybrid)
+
+            self._ready = True
+            return hybrid
+
+    def _warmup(self, hybrid: HybridMemoryService) -> None:
+        # user_id=0 은 실제 유저가 없으므로 결과는 비어 있고, 모델/인덱스만 데워짐
+        t0 = time.perf_counter()
+        try:
+            hybrid.hybrid_retrieve(user_query=self._WARMUP_QUERY, user_id=0, yymmdd="000000", top_k=1)
+        except Exception as e:
+            # 워밍업 실패는 치명적이지 않음 (첫 요청에서 다시 시도됨)
+            self._last_error = str(e)
+            logger.exception("RUNTIME_ERROR warmup_failed")
+        self._warmup_sec = time.perf_counter() - t0
+        logger.info(f"RUNTIME_WARMUP sec={self._warmup_sec:.2f}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            hybrid, self._hybrid = self._hybrid, None
+            self._ready = False
+        if hybrid is not None:
+            try:
+                hybrid.close()
+            except Exception:
+                logger.exception("RUNTIME_ERROR shutdown_failed")
+            logger.info("RUNTIME_SHUTDOWN")
+
+    # ---------------------- Access ----------------------
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def get(self) -> HybridMemoryService:
+        """
+        공유 HybridMemoryService 반환
+        - startup 훅을 거치지 않은 프로세스(스크립트/Celery 등)에서는 최초 호출 시 lazy 생성
+        """
+        hybrid = self._hybrid
+        if hybrid is not None:
+            return hybrid
+        return self.start()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self._ready,
+            "started_at": self._started_at,
+            "startup_sec": self._startup_sec,
+            "warmup_sec": self._warmup_sec,
+            "last_error": self._last_error,
+            "result_cache": self._hybrid.cache_stats() if self._hybrid is not None else None,
+        }
+
+
+# 전역 인스턴스 (워커당 1개)
+retrieval_runtime = RetrievalRuntime()
+
+
+def get_hybrid_memory_service() -> HybridMemoryService:
+    return retrieval_runtime.get()
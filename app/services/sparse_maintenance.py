@@ -0,0 +1,144 @@
+"""
+Sparse(FTS5) 인덱스 관리 도구
+
+    # 구 스키마(docs_fts) → 유저 rowid 구간 스키마(docs_fts_v2) 이관
+    python -m app.services.sparse_maintenance migrate --db D:/chroma_db/sparse_fts.db [--drop-legacy]
+
+    # 유저 수 증가에 따른 검색 지연 비교 (구: user_id 후필터 / 신: rowid 구간)
+    python -m app.services.sparse_maintenance bench --users 10,100,1000 --docs-per-user 60
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from app.services.sparse_service import LEGACY_FTS_TABLE, SparseIndexService
+
+_WORDS = [
+    "엄마", "건강검진", "병원", "회사", "동료", "갈등", "텀블러", "보온병", "여행", "제주도",
+    "시험", "공부", "운동", "헬스", "친구", "생일", "케이크", "야근", "프로젝트", "발표",
+    "강아지", "산책", "비", "우산", "커피", "카페", "영화", "드라마", "음악", "콘서트",
+]
+
+
+# trigram 토크나이저는 3글자 미만 질의를 매칭하지 않으므로 3글자 이상만 질의로 사용
+_QUERY_WORDS = [w for w in _WORDS if len(w) >= 3]
+
+
+def _fake_doc(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n_words))
+
+
+def migrate(db_path: str, drop_legacy: bool = False) -> int:
+    svc = SparseIndexService(db_path)  # 생성 시 자동 이관도 시도됨
+    try:
+        moved = svc.migrate_legacy(drop_legacy=drop_legacy)
+        return moved
+    finally:
+        svc.close()
+
+
+def _build_corpus(tmpdir: str, n_users: int, docs_per_user: int, seed: int = 7) -> str:
+    """같은 데이터를 구/신 스키마에 모두 적재"""
+    path = os.path.join(tmpdir, f"bench_{n_users}.db")
+    rng = random.Random(seed)
+
+    # 구 스키마 (원래 방식: user_id UNINDEXED + 후필터)
+    conn = sqlite3.connect(path)
+    conn.execute(f"""
+    CREATE VIRTUAL TABLE {LEGACY_FTS_TABLE} USING fts5(
+        text, type UNINDEXED, user_id UNINDEXED, session_id UNINDEXED,
+        doc_id UNINDEXED, meta_json UNINDEXED, tokenize='trigram'
+    );
+    """)
+    rows = []
+    for uid in range(1, n_users + 1):
+        for j in range(docs_per_user):
+            sid = f"250101_{j // 15:03d}"
+            rows.append((_fake_doc(rng, rng.randint(1, 30)), "keyword", uid, sid, f"{uid}::{sid}::kw::{j}", "{}"))
+    conn.executemany(
+        f"INSERT INTO {LEGACY_FTS_TABLE} (text, type, user_id, session_id, doc_id, meta_json) VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+    # 신 스키마 (생성 시 자동 이관)
+    SparseIndexService(path).close()
+    return path
+
+
+def _time_queries(conn: sqlite3.Connection, sql: str, param_sets: List[tuple]) -> Dict[str, float]:
+    lat = []
+    for params in param_sets:
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        lat.append((time.perf_counter() - t0) * 1000)
+    lat.sort()
+    return {
+        "p50_ms": round(statistics.median(lat), 3),
+        "p99_ms": round(lat[min(len(lat) - 1, int(0.99 * len(lat)))], 3),
+    }
+
+
+def bench(user_counts: List[int], docs_per_user: int, n_queries: int = 200) -> None:
+    legacy_sql = (
+        f"SELECT doc_id, bm25({LEGACY_FTS_TABLE}) AS score FROM {LEGACY_FTS_TABLE} "
+        f"WHERE {LEGACY_FTS_TABLE} MATCH ? AND user_id=? ORDER BY score LIMIT 200"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n_users in user_counts:
+            path = _build_corpus(tmpdir, n_users, docs_per_user)
+            rng = random.Random(11)
+            queries = [(rng.choice(_QUERY_WORDS), rng.randint(1, n_users)) for _ in range(n_queries)]
+
+            conn = sqlite3.connect(path)
+            legacy = _time_queries(conn, legacy_sql, queries)
+            expected = [[r[0] for r in conn.execute(legacy_sql, qp).fetchall()] for qp in queries[:20]]
+            conn.close()
+
+            svc = SparseIndexService(path)
+            lat = []
+            for q, uid in queries:
+                t0 = time.perf_counter()
+                svc.search(q, top_k=200, user_id=uid)
+                lat.append((time.perf_counter() - t0) * 1000)
+            # bm25 통계는 테이블 전체 기준 그대로 → 결과/순위 동일해야 함
+            got = [[r["doc_id"] for r in svc.search(q, top_k=200, user_id=uid)] for q, uid in queries[:20]]
+            svc.close()
+            same = all(sorted(a) == sorted(b) for a, b in zip(expected, got))
+            lat.sort()
+            print({
+                "users": n_users,
+                "rows": n_users * docs_per_user,
+                "same_results": same,
+                "legacy_postfilter": legacy,
+                "user_rowid_range": {
+                    "p50_ms": round(statistics.median(lat), 3),
+                    "p99_ms": round(lat[min(len(lat) - 1, int(0.99 * len(lat)))], 3),
+                },
+            })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_mig = sub.add_parser("migrate")
+    p_mig.add_argument("--db", default="D:/chroma_db/sparse_fts.db")
+    p_mig.add_argument("--drop-legacy", action="store_true")
+
+    p_bench = sub.add_parser("bench")
+    p_bench.add_argument("--users", default="10,100,1000")
+    p_bench.add_argument("--docs-per-user", type=int, default=60)
+    p_bench.add_argument("--queries", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.cmd == "migrate":
+        print(f"이관 완료: {migrate(args.db, drop_legacy=args.drop_legacy)} rows")
+    else:
+        bench([int(x) for x in args.users.split(",") if x.strip()], args.docs_per_user, args.queries)
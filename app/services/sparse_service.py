@@ -2,19 +2,50 @@
 import sqlite3
 import hashlib
 import json
+import logging
 import time
 import threading
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 # ✅ 전역 쓰기 락 (쓰기 구간 최소 보호)
 _SPARSE_WRITE_LOCK = threading.Lock()
 
+# 유저별 rowid 구간: rowid = (user_id << 32) | seq
+#  → MATCH + rowid BETWEEN 으로 FTS5가 해당 유저 구간만 seek, bm25도 그 행들만 계산
+_USER_SHIFT = 32
+_SEQ_MASK = (1 << _USER_SHIFT) - 1
+
+FTS_TABLE = "docs_fts_v2"
+MAP_TABLE = "docs_fts_v2_map"
+LEGACY_FTS_TABLE = "docs_fts"
+VERSION_TABLE = "corpus_versions"
+META_TABLE = "sparse_meta"
+_LEGACY_MIGRATED_KEY = "legacy_migrated"
+
+_INSERT_FTS_SQL = (
+    f"INSERT INTO {FTS_TABLE} (rowid, text, type, user_id, session_id, doc_id, meta_json) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_MAP_SQL = f"INSERT INTO {MAP_TABLE} (doc_id, rid, user_id, session_id) VALUES (?, ?, ?, ?)"
+
+
+def user_rowid_range(user_id: int) -> Tuple[int, int]:
+    lo = int(user_id) << _USER_SHIFT
+    return lo, lo + _SEQ_MASK
+
 
 class SparseIndexService:
     """
     SQLite FTS5 기반 BM25 Sparse 검색 서비스
     - summary / key_sentence / keywords_all / keyword 색인
     - 공통 doc_id를 별도 컬럼과 meta_json 모두에 저장하여 Dense와 동일 식별 체계 유지
+    - 유저 제한은 랭킹 전에: 유저마다 rowid 구간을 할당하고 검색 시 구간 조건으로 seek
+      (user_id 컬럼 후필터 → 전 유저 bm25 계산하던 문제 제거)
+    - doc_id/세션 → rowid 매핑은 일반 테이블(MAP_TABLE, 인덱스)로 관리 → 삭제도 풀스캔 없음
+    - 유저별 코퍼스 버전(VERSION_TABLE): 색인을 바꾸는 트랜잭션 안에서 함께 +1
+      → API/Celery 등 다른 프로세스의 검색 결과 캐시가 정확히 그 유저만 무효화
     """
 
     def __init__(self, db_path: str = "D:/chroma_db/sparse_fts.db"):
@@ -31,8 +62,8 @@ class SparseIndexService:
 
     def _init_schema(self):
         # trigram tokenizer: 한국어 대응(형태소 분석기 없이도 부분검색 유리)
-        self.conn.execute("""
-        CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+        self.conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
             text,               -- 색인 본문 (summary / key_sentence / keywords_all / keyword)
             type UNINDEXED,     -- summary / key_sentence / keywords_all / keyword
             user_id UNINDEXED,
@@ -42,13 +73,143 @@ class SparseIndexService:
             tokenize='trigram'
         );
         """)
+        self.conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MAP_TABLE} (
+            doc_id     TEXT PRIMARY KEY,
+            rid        INTEGER NOT NULL UNIQUE,   -- FTS rowid (유저 구간 내)
+            user_id    INTEGER NOT NULL,
+            session_id TEXT NOT NULL
+        );
+        """)
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{MAP_TABLE}_session ON {MAP_TABLE} (user_id, session_id);"
+        )
+        self.conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+        """)
+        self.conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {META_TABLE} (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        """)
         self.conn.commit()
 
+        # 구 스키마(docs_fts)가 있고 이관 기록이 없을 때만 1회 자동 이관
+        # (기록은 sparse_meta에 남김 → 이후 생성자는 읽기 1번으로 건너뜀, 코퍼스를 비워도 재이관 없음)
+        if self._has_table(LEGACY_FTS_TABLE) and not self._legacy_migrated():
+            migrated = self.migrate_legacy()
+            if migrated:
+                logger.info(f"SPARSE_MIGRATE legacy_rows={migrated} → {FTS_TABLE}")
+
+    def close(self) -> None:
+        """커넥션 정리 (워커 종료 시 호출)"""
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
     # ---------- ID 생성 (Dense와 동일 규칙) ----------
     def build_id(self, user_id: int, session_id: str, type_: str, text: str) -> str:
         sha1 = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
         return f"{user_id}::{session_id}::{type_}::{sha1}"
 
+    # ---------- 내부: 행 구성 / rowid 할당 / 삭제 ----------
+    def _to_row(self, text: str, metadata: Dict[str, Any]) -> tuple:
+        doc_id = metadata.get("doc_id")
+        if not doc_id:
+            doc_id = self.build_id(metadata["user_id"], metadata["session_id"], metadata["type"], text)
+            metadata = {**metadata, "doc_id": doc_id}
+        return (
+            text,
+            metadata.get("type"),
+            int(metadata["user_id"]),
+            str(metadata.get("session_id")),
+            doc_id,
+            json.dumps(metadata, ensure_ascii=False),
+        )
+
+    def _dedupe(self, rows: List[tuple]) -> List[tuple]:
+        # 같은 doc_id가 여러 번 오면 마지막 것만
+        latest: Dict[str, tuple] = {}
+        for r in rows:
+            latest[r[4]] = r
+        return list(latest.values())
+
+    def _next_seq(self, user_id: int) -> int:
+        lo, hi = user_rowid_range(user_id)
+        row = self.conn.execute(
+            f"SELECT max(rid) FROM {MAP_TABLE} WHERE rid BETWEEN ? AND ?", (lo, hi)
+        ).fetchone()
+        return ((row[0] & _SEQ_MASK) + 1) if row and row[0] is not None else 0
+
+    def _insert_rows(self, rows: List[tuple]) -> None:
+        """쓰기(BEGIN IMMEDIATE) 트랜잭션 안에서 호출. 유저별로 max(rid) 1회 조회 후 순번 할당."""
+        next_seq: Dict[int, int] = {}
+        fts_rows, map_rows = [], []
+        for text, type_, uid, sid, did, meta_json in rows:
+            if uid not in next_seq:
+                next_seq[uid] = self._next_seq(uid)
+            seq = next_seq[uid]
+            if seq > _SEQ_MASK:
+                raise OverflowError(f"user_id={uid} rowid 구간 소진")
+            next_seq[uid] = seq + 1
+            rid = (uid << _USER_SHIFT) | seq
+            fts_rows.append((rid, text, type_, uid, sid, did, meta_json))
+            map_rows.append((did, rid, uid, sid))
+        self.conn.executemany(_INSERT_FTS_SQL, fts_rows)
+        self.conn.executemany(_INSERT_MAP_SQL, map_rows)
+
+    def _delete_rids(self, rids: Iterable[int]) -> None:
+        params = [(r,) for r in rids]
+        if params:
+            self.conn.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid=?", params)
+            self.conn.executemany(f"DELETE FROM {MAP_TABLE} WHERE rid=?", params)
+
+    def _rids_for_doc_ids(self, doc_ids: List[str]) -> List[int]:
+        rids: List[int] = []
+        # sqlite 변수 개수 제한 대비 청크
+        for i in range(0, len(doc_ids), 500):
+            chunk = doc_ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rids.extend(
+                r[0] for r in self.conn.execute(
+                    f"SELECT rid FROM {MAP_TABLE} WHERE doc_id IN ({marks})", chunk
+                )
+            )
+        return rids
+
+    def _rids_for_session(self, user_id: int, session_id: str) -> List[int]:
+        return [
+            r[0] for r in self.conn.execute(
+                f"SELECT rid FROM {MAP_TABLE} WHERE user_id=? AND session_id=?",
+                (int(user_id), str(session_id)),
+            )
+        ]
+
+    def _bump_versions(self, user_ids: Iterable[int]) -> None:
+        """트랜잭션 안에서 호출 (커밋과 함께 보이도록)"""
+        params = [(int(u),) for u in set(user_ids)]
+        if params:
+            self.conn.executemany(
+                f"INSERT INTO {VERSION_TABLE} (user_id, version) VALUES (?, 1) "
+                "ON CONFLICT(user_id) DO UPDATE SET version = version + 1",
+                params,
+            )
+
+    def _legacy_migrated(self) -> bool:
+        return self.conn.execute(
+            f"SELECT 1 FROM {META_TABLE} WHERE key=?", (_LEGACY_MIGRATED_KEY,)
+        ).fetchone() is not None
+
+    def _has_table(self, name: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name=?", (name,)
+        ).fetchone() is not None
+
     # ---------- 문서 추가 ----------
     def add_document(
         self,
@@ -61,26 +222,7 @@ class SparseIndexService:
         metadata에는 반드시 다음 키가 있어야 함:
           - type, user_id, session_id, doc_id
         """
-        # doc_id 없으면 안전하게 생성해서 채워 넣음
-        doc_id = metadata.get("doc_id")
-        if not doc_id:
-            doc_id = self.build_id(metadata["user_id"], metadata["session_id"], metadata["type"], text)
-            metadata = {**metadata, "doc_id": doc_id}
-
-        self.conn.execute(
-            "INSERT INTO docs_fts (text, type, user_id, session_id, doc_id, meta_json) "
-            "VALUES (?, ?, ?, ?, ?, ?)",
-            (
-                text,
-                metadata.get("type"),
-                metadata.get("user_id"),
-                metadata.get("session_id"),
-                doc_id,
-                json.dumps(metadata, ensure_ascii=False),
-            ),
-        )
-        if persist:
-            self.conn.commit()
+        self.add_documents([text], [metadata], persist=persist)
 
     def add_documents(
         self,
@@ -89,10 +231,27 @@ class SparseIndexService:
         *,
         persist: bool = True
     ) -> None:
-        for t, m in zip(texts, metadatas):
-            self.add_document(t, m, persist=False)
-        if persist:
-            self.conn.commit()
+        """
+        같은 doc_id가 이미 있으면 교체 (구 스키마처럼 중복 추가가 실패하지 않게, doc_id PK라 행은 1개만 유지)
+        """
+        rows = self._dedupe([self._to_row(t, m) for t, m in zip(texts, metadatas)])
+        if not rows:
+            return
+        with _SPARSE_WRITE_LOCK:
+            # max(rid) 조회 전에 쓰기 락 확보 (_SPARSE_WRITE_LOCK은 프로세스 안에서만 유효
+            # → API 워커/Celery가 같은 rowid를 고르지 않도록). persist=False로 이어지는 호출은
+            # 앞선 호출이 연 IMMEDIATE 트랜잭션을 그대로 사용
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN IMMEDIATE;")
+            try:
+                self._delete_rids(self._rids_for_doc_ids([r[4] for r in rows]))
+                self._insert_rows(rows)
+                self._bump_versions(r[2] for r in rows)
+                if persist:
+                    self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
 
     # ---------- Upsert (doc_id 기준) ----------
     def upsert_document(self, text: str, metadata: Dict[str, Any]) -> None:
@@ -100,38 +259,58 @@ class SparseIndexService:
         동일 doc_id 행을 지우고 다시 넣는다.
         doc_id가 없으면 build_id로 생성 후 meta에 주입.
         """
-        doc_id = metadata.get("doc_id")
-        if not doc_id:
-            # doc_id 미제공 시 안전 생성
-            doc_id = self.build_id(metadata["user_id"], metadata["session_id"], metadata["type"], text)
-            metadata = {**metadata, "doc_id": doc_id}
+        self.bulk_upsert([text], [metadata])
 
-        # ✅ 짧은 쓰기 구간만 전역 락으로 보호
+    # ---------- 벌크 Upsert (단일 트랜잭션) ----------
+    def bulk_upsert(self, texts: List[str], metadatas: List[Dict[str, Any]]) -> int:
+        """
+        세션 문서 묶음을 한 트랜잭션으로 upsert
+        - 기존 rowid 조회(인덱스) → executemany DELETE 1회 + executemany INSERT 1회 + COMMIT(fsync) 1회
+        - 락 보유/쓰기 증폭이 키워드 수가 아니라 세션 수에 비례
+        """
+        rows = self._dedupe([self._to_row(t, m) for t, m in zip(texts, metadatas)])
+        if not rows:
+            return 0
         with _SPARSE_WRITE_LOCK:
-            # 짧은 트랜잭션으로 DELETE→INSERT 원자화
             # BEGIN IMMEDIATE는 바로 쓰기 락을 요청하므로 경합 시 busy_timeout 규칙대로 대기
             self.conn.execute("BEGIN IMMEDIATE;")
             try:
-                # 기존 삭제 (doc_id 단일 키)
-                self.conn.execute("DELETE FROM docs_fts WHERE doc_id=?", (doc_id,))
-                # 새로 추가 (persist=False로, 동일 트랜잭션 내에서 처리)
-                self.conn.execute(
-                    "INSERT INTO docs_fts (text, type, user_id, session_id, doc_id, meta_json) "
-                    "VALUES (?, ?, ?, ?, ?, ?)",
-                    (
-                        text,
-                        metadata.get("type"),
-                        metadata.get("user_id"),
-                        metadata.get("session_id"),
-                        doc_id,
-                        json.dumps(metadata, ensure_ascii=False),
-                    ),
-                )
+                self._delete_rids(self._rids_for_doc_ids([r[4] for r in rows]))
+                self._insert_rows(rows)
+                self._bump_versions(r[2] for r in rows)
                 self.conn.commit()
             except Exception:
                 # 실패 시 롤백 안전장치
                 self.conn.rollback()
                 raise
+        return len(rows)
+
+    def replace_session(
+        self,
+        user_id: int,
+        session_id: str,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+    ) -> int:
+        """
+        세션 문서 전체 교체 (재요약 시 이전 키워드 잔존 방지)
+        - 세션 DELETE 1회 + executemany INSERT 1회를 한 트랜잭션으로
+        """
+        rows = self._dedupe([self._to_row(t, m) for t, m in zip(texts, metadatas)])
+        with _SPARSE_WRITE_LOCK:
+            self.conn.execute("BEGIN IMMEDIATE;")
+            try:
+                self._delete_rids(self._rids_for_session(user_id, session_id))
+                # 다른 세션에 같은 doc_id가 남아 있을 가능성까지 정리
+                self._delete_rids(self._rids_for_doc_ids([r[4] for r in rows]))
+                if rows:
+                    self._insert_rows(rows)
+                self._bump_versions([user_id, *(r[2] for r in rows)])
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return len(rows)
 
     # ---------- 세션 단위 삭제 ----------
     def delete_by_session(self, user_id: int, session_id: str) -> None:
@@ -139,14 +318,77 @@ class SparseIndexService:
         with _SPARSE_WRITE_LOCK:
             self.conn.execute("BEGIN IMMEDIATE;")
             try:
+                self._delete_rids(self._rids_for_session(user_id, session_id))
+                self._bump_versions([user_id])
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    # ---------- 코퍼스 버전 ----------
+    def corpus_version(self, user_id: int) -> int:
+        """유저 색인이 바뀔 때마다 증가 (PK 조회 1회)"""
+        row = self.conn.execute(
+            f"SELECT version FROM {VERSION_TABLE} WHERE user_id=?", (int(user_id),)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump_corpus_version(self, user_id: int) -> None:
+        """Sparse 색인 밖의 변경(Dense 단독 쓰기 등)을 알릴 때"""
+        with _SPARSE_WRITE_LOCK:
+            self._bump_versions([user_id])
+            self.conn.commit()
+
+    # ---------- 구 스키마 이관 ----------
+    def migrate_legacy(self, *, drop_legacy: bool = False, batch_size: int = 5000) -> int:
+        """
+        docs_fts(user_id UNINDEXED 후필터 방식) → docs_fts_v2(유저 rowid 구간) 이관
+        - sparse_meta에 이관 기록이 없을 때만 수행, 성공하면 같은 트랜잭션에서 기록 (여러 프로세스가 동시에 떠도 1번만)
+        - 기록 이전 버전으로 이미 이관된 DB(신 스키마에 행 있음)는 기록만 남김
+        - 반환: 이관한 행 수
+        """
+        if not self._has_table(LEGACY_FTS_TABLE):
+            return 0
+        moved = 0
+        with _SPARSE_WRITE_LOCK:
+            self.conn.execute("BEGIN IMMEDIATE;")
+            try:
+                already = self._legacy_migrated() or self.conn.execute(
+                    f"SELECT 1 FROM {MAP_TABLE} LIMIT 1"
+                ).fetchone()
+                if not already:
+                    cur = self.conn.execute(
+                        f"SELECT text, type, user_id, session_id, doc_id, meta_json FROM {LEGACY_FTS_TABLE}"
+                    )
+                    while True:
+                        batch = cur.fetchmany(batch_size)
+                        if not batch:
+                            break
+                        rows = []
+                        for text, type_, uid, sid, did, meta_json in batch:
+                            try:
+                                uid = int(uid)
+                            except (TypeError, ValueError):
+                                logger.warning(f"SPARSE_MIGRATE skip non-int user_id={uid!r} doc_id={did}")
+                                continue
+                            rows.append((text, type_, uid, str(sid), did, meta_json))
+                        rows = self._dedupe(rows)
+                        # 구 테이블엔 doc_id 중복이 있을 수 있음 → 앞선 배치 것을 교체
+                        self._delete_rids(self._rids_for_doc_ids([r[4] for r in rows]))
+                        self._insert_rows(rows)
+                        self._bump_versions(r[2] for r in rows)
+                        moved += len(rows)
                 self.conn.execute(
-                    "DELETE FROM docs_fts WHERE user_id=? AND session_id=?",
-                    (user_id, session_id),
+                    f"INSERT OR IGNORE INTO {META_TABLE} (key, value) VALUES (?, ?)",
+                    (_LEGACY_MIGRATED_KEY, str(moved)),
                 )
+                if drop_legacy:
+                    self.conn.execute(f"DROP TABLE {LEGACY_FTS_TABLE}")
                 self.conn.commit()
             except Exception:
                 self.conn.rollback()
                 raise
+        return moved
 
     # ---------- 검색 ----------
     def search(
@@ -156,14 +398,16 @@ class SparseIndexService:
         user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         sql = (
-            "SELECT text, type, user_id, session_id, doc_id, meta_json, bm25(docs_fts) as score "
-            "FROM docs_fts WHERE docs_fts MATCH ?"
+            f"SELECT text, type, user_id, session_id, doc_id, meta_json, bm25({FTS_TABLE}) as score "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?"
         )
-        params = [query]
+        params: List[Any] = [query]
 
         if user_id is not None:
-            sql += " AND user_id=?"
-            params.append(user_id)
+            # rowid 구간 조건은 FTS5 커서가 직접 소비 → 다른 유저 행은 읽지도/랭킹하지도 않음
+            lo, hi = user_rowid_range(user_id)
+            sql += " AND rowid BETWEEN ? AND ?"
+            params.extend([lo, hi])
 
         sql += " ORDER BY score LIMIT ?"
         params.append(top_k)
@@ -5,6 +5,7 @@ from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
 from app.clients.huggingface_client import HuggingFaceClient
 import hashlib
+import os
 import time
 import threading
 from chromadb.errors import InternalError  # 재시도용
@@ -154,11 +155,74 @@ class VectorDBService:
             if persist:
                 self.vectorstore.persist()
 
+    def upsert_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        *,
+        doc_ids: List[str],
+        persist: bool = True,
+    ) -> List[str]:
+        """
+        벌크 업서트 (세션 단위 인덱싱용)
+        - 임베딩: embed_many 1회 (모델 forward 1번, 배치)
+        - 삭제: 기존 doc_id들 delete 1회
+        - 추가: Chroma add 1회 (쓰기 트랜잭션 1번)
+        """
+        if not texts:
+            return []
+        if not (len(texts) == len(metadatas) == len(doc_ids)):
+            raise ValueError("texts/metadatas/doc_ids 길이가 다릅니다.")
+
+        # 배치 내 중복 doc_id는 마지막 것만 (Chroma add는 중복 id를 거부)
+        latest: Dict[str, int] = {did: i for i, did in enumerate(doc_ids)}
+        keep = sorted(latest.values())
+        texts = [texts[i] for i in keep]
+        doc_ids = [doc_ids[i] for i in keep]
+        metas: List[Dict[str, Any]] = []
+        for i, did in zip(keep, doc_ids):
+            m = dict(metadatas[i] or {})
+            m["doc_id"] = did
+            metas.append(m)
+
+        # 모델 호출은 락 밖에서 (쓰기 락 보유 시간 최소화)
+        embeddings = self.embedding_client.embed_many(texts)
+
+        with _WRITE_LOCK:
+            try:
+                self.vectorstore._collection.delete(ids=list(doc_ids))
+            except Exception:
+                pass
+            self.vectorstore._collection.add(
+                ids=list(doc_ids),
+                embeddings=embeddings,
+                documents=list(texts),
+                metadatas=metas,
+            )
+            if persist:
+                self.vectorstore.persist()
+        return list(doc_ids)
+
+    def delete_documents(self, doc_ids: List[str], *, persist: bool = True) -> None:
+        if not doc_ids:
+            return
+        with _WRITE_LOCK:
+            self.vectorstore._collection.delete(ids=list(doc_ids))
+            if persist:
+                self.vectorstore.persist()
+
+    def persist(self) -> None:
+        """write-behind 코얼레서가 flush 창마다 1회 호출"""
+        with _WRITE_LOCK:
+            self.vectorstore.persist()
+
     # ---------- 세션 단위 삭제 ----------
-    def delete_by_session(self, user_id: int, session_id: str) -> int:
+    def delete_by_session(self, user_id: int, session_id: str, *, persist: bool = True) -> int:
         try:
-            self.vectorstore._collection.delete(where={"user_id": user_id, "session_id": session_id})
-            self.vectorstore.persist()
+            with _WRITE_LOCK:
+                self.vectorstore._collection.delete(where={"user_id": user_id, "session_id": session_id})
+                if persist:
+                    self.vectorstore.persist()
             return 1
         except Exception:
             return 0
@@ -231,3 +295,35 @@ class VectorDBService:
             "metric": self.metric,
             "collection_name": self.vectorstore._collection.name,  # type: ignore
         }
+
+
+def create_vector_db_service(**kwargs):
+    """
+    Dense 백엔드 선택 (env DENSE_BACKEND)
+    - chroma (기본): 공유 컬렉션 + where 필터
+    - numpy        : 유저별 memmap 행렬 (app/services/numpy_vector_service.py)
+    """
+    backend = os.getenv("DENSE_BACKEND", "chroma").lower().strip()
+    if backend == "numpy":
+        from app.services.numpy_vector_service import NumpyVectorDBService
+        return NumpyVectorDBService(**kwargs)
+    if backend != "chroma":
+        raise ValueError(f"Unsupported DENSE_BACKEND: {backend}")
+    return VectorDBService(**kwargs)
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def get_vector_db_service():
+    """
+    프로세스 공용 Dense 백엔드 (하이브리드 검색 / 쓰기 코얼레서가 같은 인스턴스 공유)
+    - 호출자마다 인스턴스를 만들면 numpy 샤드 캐시가 따로 놀아 서로의 쓰기를 못 봄
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_lock:
+            if _shared_service is None:
+                _shared_service = create_vector_db_service()
+    return _shared_service
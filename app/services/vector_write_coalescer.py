@@ -0,0 +1,218 @@
+# app/services/vector_write_coalescer.py
+"""
+Dense(Chroma) 쓰기 write-behind 코얼레서
+- 여러 세션의 upsert/delete를 bounded 큐에 모아 백그라운드 스레드 1개가 주기적으로 배치 반영
+  · flush 창(flush_interval) 또는 배치 크기(max_batch) 도달 시 반영
+  · 같은 doc_id에 대한 연속 쓰기는 마지막 것만 반영 (삭제 후 재업서트 등 포함)
+  · 임베딩도 창 단위로 한 번에 (embed_many 1회), persist는 창당 1회
+- 프로세스 안의 쓰기는 이 스레드 하나로 직렬화 → 전역 쓰기 락 경합 없음
+- 호출 측은 반환된 Future로 내구성 확인 (result() = 해당 창의 persist까지 완료)
+
+백엔드 요구 메서드: upsert_documents(texts, metas, doc_ids=, persist=False),
+                    delete_documents(ids, persist=False),
+                    delete_by_session(user_id, session_id, persist=False),
+                    persist()
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("VECTOR_FLUSH_INTERVAL", "0.2"))
+MAX_BATCH = int(os.getenv("VECTOR_FLUSH_MAX_BATCH", "512"))
+MAX_QUEUE = int(os.getenv("VECTOR_WRITE_QUEUE", "1000"))
+DURABLE_TIMEOUT = float(os.getenv("VECTOR_DURABLE_TIMEOUT", "60"))
+
+
+class WriteQueueFull(Exception):
+    pass
+
+
+class _Op:
+    __slots__ = ("kind", "texts", "metas", "ids", "where", "future")
+
+    def __init__(self, kind: str, *, texts=None, metas=None, ids=None, where=None):
+        self.kind = kind  # "upsert" | "delete" | "delete_session" | "flush"
+        self.texts = texts
+        self.metas = metas
+        self.ids = ids
+        self.where = where
+        self.future: Future = Future()
+
+    @property
+    def size(self) -> int:
+        return len(self.ids) if self.ids else 1
+
+
+class VectorWriteCoalescer:
+    def __init__(
+        self,
+        backend,
+        *,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_batch: int = MAX_BATCH,
+        max_queue: int = MAX_QUEUE,
+        enqueue_timeout: float = 5.0,
+    ):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.enqueue_timeout = enqueue_timeout
+        self._q: "queue.Queue[Optional[_Op]]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self.stats = {
+            "ops": 0,
+            "docs_upserted": 0,
+            "docs_deleted": 0,
+            "docs_coalesced": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "last_flush_ms": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="vector-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- 제출 API (Future 반환) ----------
+    def upsert(self, texts: List[str], metadatas: List[Dict[str, Any]], doc_ids: List[str]) -> Future:
+        if not (len(texts) == len(metadatas) == len(doc_ids)):
+            raise ValueError("texts/metadatas/doc_ids 길이가 다릅니다.")
+        return self._submit(_Op("upsert", texts=list(texts), metas=list(metadatas), ids=list(doc_ids)))
+
+    def delete(self, doc_ids: List[str]) -> Future:
+        return self._submit(_Op("delete", ids=list(doc_ids)))
+
+    def delete_session(self, user_id: int, session_id: str) -> Future:
+        return self._submit(_Op("delete_session", where=(user_id, session_id)))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """지금까지 제출된 쓰기가 모두 persist될 때까지 대기"""
+        self._submit(_Op("flush")).result(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join(timeout)
+
+    def _submit(self, op: _Op) -> Future:
+        if self._closed:
+            raise RuntimeError("VectorWriteCoalescer is closed")
+        try:
+            self._q.put(op, timeout=self.enqueue_timeout)
+        except queue.Full:
+            raise WriteQueueFull(f"vector write queue full ({self._q.maxsize})")
+        return op.future
+
+    def status(self) -> Dict[str, Any]:
+        return {"queue": self._q.qsize(), **self.stats}
+
+    # ---------- 백그라운드 ----------
+    def _run(self) -> None:
+        while True:
+            op = self._q.get()
+            if op is None:
+                return
+            batch = [op]
+            n = op.size
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            # 창이 끝나거나, 배치가 차거나, 명시적 flush가 오면 반영
+            while n < self.max_batch and op.kind != "flush":
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    op = self._q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if op is None:
+                    stop = True
+                    break
+                batch.append(op)
+                n += op.size
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[_Op]) -> None:
+        t0 = time.perf_counter()
+        try:
+            self._apply(batch)
+            self.backend.persist()
+        except Exception as e:
+            self.stats["flush_errors"] += 1
+            logger.exception("vector write flush 실패")
+            for op in batch:
+                if not op.future.done():
+                    op.future.set_exception(e)
+            return
+        self.stats["flushes"] += 1
+        self.stats["ops"] += len(batch)
+        self.stats["last_flush_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        for op in batch:
+            if not op.future.done():
+                op.future.set_result(True)
+
+    def _apply(self, batch: List[_Op]) -> None:
+        """
+        제출 순서를 지키며 병합:
+        - upsert/delete(doc_id)는 doc_id별 마지막 상태만 남김
+        - 세션 삭제(where)는 그 이전까지 모은 것을 먼저 반영한 뒤 실행 (순서 의존)
+        """
+        pending: Dict[str, Optional[tuple]] = {}  # doc_id → (text, meta) | None(삭제)
+
+        def drain():
+            if not pending:
+                return
+            deletes = [did for did, v in pending.items() if v is None]
+            upserts = [(did, v) for did, v in pending.items() if v is not None]
+            if deletes:
+                self.backend.delete_documents(deletes, persist=False)
+                self.stats["docs_deleted"] += len(deletes)
+            if upserts:
+                self.backend.upsert_documents(
+                    [v[0] for _, v in upserts],
+                    [v[1] for _, v in upserts],
+                    doc_ids=[did for did, _ in upserts],
+                    persist=False,
+                )
+                self.stats["docs_upserted"] += len(upserts)
+            pending.clear()
+
+        for op in batch:
+            if op.kind == "upsert":
+                for text, meta, did in zip(op.texts, op.metas, op.ids):
+                    if did in pending:
+                        self.stats["docs_coalesced"] += 1
+                    pending[did] = (text, meta)
+            elif op.kind == "delete":
+                for did in op.ids:
+                    if did in pending:
+                        self.stats["docs_coalesced"] += 1
+                    pending[did] = None
+            elif op.kind == "delete_session":
+                drain()
+                user_id, session_id = op.where
+                self.backend.delete_by_session(user_id, session_id, persist=False)
+        drain()
+
+
+_coalescer: Optional[VectorWriteCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+
+def get_vector_write_coalescer() -> VectorWriteCoalescer:
+    """프로세스 공용 코얼레서 (하이브리드 검색과 같은 Dense 백엔드 인스턴스 공유)"""
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                from app.services.vector_db_service import get_vector_db_service
+                _coalescer = VectorWriteCoalescer(get_vector_db_service())
+    return _coalescer
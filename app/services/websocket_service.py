@@ -1,34 +1,111 @@
 import asyncio
 import json
-import redis.asyncio as redis
+import time
 from fastapi import WebSocket
-from typing import Dict
-from app.config.settings import settings
+from typing import Dict, Optional, Set
+from app.services.notification_hub import notification_hub
+from app.services.notification_routes import Notification, resolve
+from app.services.ws_outbox import Outbox, OutboxClosed, SEND_TIMEOUT, outbox_metrics
+
+
+class _Connection:
+    """연결 1개의 상태 (소켓 + 송신 큐 + writer 태스크)"""
+    __slots__ = ("user_id", "websocket", "outbox", "writer")
+
+    def __init__(self, user_id: int, websocket: WebSocket, outbox: Outbox):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.outbox = outbox
+        self.writer: Optional[asyncio.Task] = None
+
+
+class _UserSink:
+    """허브 → 유저 어댑터: 라우팅 테이블로 한 번만 변환해 유저의 모든 연결 Outbox에 적재 (동기, 비차단)"""
+    __slots__ = ("service", "user_id", "connections")
+
+    def __init__(self, service: "WebSocketService", user_id: int, connections: Set[_Connection]):
+        self.service = service
+        self.user_id = user_id
+        self.connections = connections
+
+    def put_nowait(self, item):
+        suffix, raw = item
+        try:
+            note = resolve(suffix, raw)
+        except (ValueError, AttributeError, TypeError) as e:
+            # JSONDecodeError/UnicodeDecodeError(ValueError), 객체가 아닌 JSON 등 → 이 메시지만 버림
+            print(f"❌ 알림 메시지 해석 실패: {e}, 원본 메시지: {raw!r}")
+            return
+        if note is None:
+            print(f"❓ 알 수 없는 채널: user_{self.user_id}_{suffix}")
+            return
+        # 직렬화된 같은 알림을 연결별 writer가 각자 전송 → 기기/탭 간 전송이 동시에 진행됨
+        for conn in tuple(self.connections):
+            conn.outbox.put_nowait(note)
+
 
 class WebSocketService:
-    def __init__(self):
-        print(f"🔗 WebSocket Service Redis 연결 시도: {settings.redis_host}:{settings.redis_port}")
-        self.redis_client = redis.Redis(
-            host=settings.redis_host, 
-            port=settings.redis_port, 
-            db=settings.redis_db
-        )
-        self.active_connections: Dict[int, WebSocket] = {}
-        
-    async def connect(self, websocket: WebSocket, user_id: int):
-        """WebSocket 연결 수락"""
+    def __init__(self, hub=None):
+        # Redis 구독은 프로세스 공용 허브가 담당 (연결마다 pubsub를 만들지 않음)
+        self.hub = hub or notification_hub
+        # 유저당 여러 연결 (탭/기기별)
+        self.active_connections: Dict[int, Set[_Connection]] = {}
+        self._sinks: Dict[int, _UserSink] = {}
+
+    async def connect(self, websocket: WebSocket, user_id: int) -> _Connection:
+        """WebSocket 연결 수락 후 유저 연결 집합에 추가 (전송은 연결별 writer 태스크)"""
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-        print(f"✅ WebSocket 연결됨: user_id={user_id}")
-        
-        # Redis 구독 시작
-        await self.subscribe_to_notifications(user_id, websocket)
-        
-    async def disconnect(self, user_id: int):
-        """WebSocket 연결 해제"""
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-            print(f"❌ WebSocket 연결 해제: user_id={user_id}")
+        conn = _Connection(user_id, websocket, Outbox())
+
+        conns = self.active_connections.get(user_id)
+        if conns is None:
+            conns = self.active_connections[user_id] = set()
+            sink = self._sinks[user_id] = _UserSink(self, user_id, conns)
+            self.hub.register(user_id, sink)
+        conns.add(conn)
+        conn.writer = asyncio.create_task(self._writer(conn))
+        print(f"✅ WebSocket 연결됨: user_id={user_id}, 연결 수={len(conns)}")
+        return conn
+
+    def _find(self, user_id: int, websocket: WebSocket) -> Optional[_Connection]:
+        for conn in self.active_connections.get(user_id, ()):
+            if conn.websocket is websocket:
+                return conn
+        return None
+
+    def _remove(self, conn: _Connection):
+        """연결 1개 정리. 유저의 마지막 연결이면 허브 등록도 해제 (writer 자신이 호출하면 cancel하지 않음)"""
+        conn.outbox.close("released")
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+        conns = self.active_connections.get(conn.user_id)
+        if conns is None:
+            return
+        conns.discard(conn)
+        if not conns:
+            del self.active_connections[conn.user_id]
+            sink = self._sinks.pop(conn.user_id, None)
+            if sink is not None:
+                self.hub.unregister(conn.user_id, sink)
+
+    async def disconnect(self, user_id: int, websocket: Optional[WebSocket] = None):
+        """WebSocket 연결 해제 (websocket을 주면 해당 연결만, 아니면 유저의 모든 연결)"""
+        if websocket is not None:
+            conn = self._find(user_id, websocket)
+            targets = [conn] if conn is not None else []
+        else:
+            targets = list(self.active_connections.get(user_id, ()))
+        for conn in targets:
+            self._remove(conn)
+        if targets:
+            print(f"❌ WebSocket 연결 해제: user_id={user_id}, 남은 연결 수={len(self.active_connections.get(user_id, ()))}")
+
+    async def close_all(self, code: int = 1001):
+        """shutdown 시 모든 연결을 동시에 닫음"""
+        conns = [conn for group in self.active_connections.values() for conn in group]
+        for conn in conns:
+            self._remove(conn)
+        await asyncio.gather(*(conn.websocket.close(code=code) for conn in conns), return_exceptions=True)
             
     async def is_websocket_connected(self, websocket: WebSocket) -> bool:
         """WebSocket 연결 상태 확인"""
@@ -46,178 +123,83 @@ class WebSocketService:
         except Exception as e:
             print(f"⚠️ WebSocket 상태 확인 실패: {e}")
             return False
-            
-    async def handle_connection_error(self, websocket: WebSocket, user_id: int = None):
-        """연결 오류 처리"""
+
+    async def _close(self, conn: _Connection, code: int):
+        """소켓을 닫고 연결 정리 - 클라이언트가 close 이벤트를 받고 재연결하도록 (이미 끊긴 소켓이면 무시)"""
+        try:
+            await asyncio.wait_for(conn.websocket.close(code=code), SEND_TIMEOUT)
+        except Exception:
+            pass
+        self._remove(conn)
+
+    async def handle_connection_error(self, websocket: WebSocket, user_id: int = None, code: int = 1011):
+        """연결 오류 처리 (1011: 전송 오류, 1013: 전송 타임아웃/과부하 → 클라이언트 재연결)"""
         try:
-            print(f"🔌 WebSocket 연결 오류 처리 중...")
-            if user_id and user_id in self.active_connections:
-                del self.active_connections[user_id]
+            print(f"🔌 WebSocket 연결 오류 처리 중... (code={code})")
+            conn = self._find(user_id, websocket) if user_id else None
+            if conn is not None:
+                await self._close(conn, code)
                 print(f"🗑️ 연결 해제됨: user_id={user_id}")
         except Exception as e:
             print(f"❌ 연결 오류 처리 실패: {e}")
-            
-    async def subscribe_to_notifications(self, user_id: int, websocket: WebSocket):
-        """Redis 구독하여 알림 수신"""
+
+    async def _writer(self, conn: _Connection):
+        """Outbox를 비우며 순서대로 전송 (연결당 태스크 1개)"""
         try:
-            print(f"🔍 Redis 구독 시작 준비: user_id={user_id}")
-            pubsub = self.redis_client.pubsub()
-            
-            # 유저별 채널들 구독
-            channels = [
-                f"user_{user_id}_diary",      # 일기 알림
-                f"user_{user_id}_plant",      # 식물 생성 알림
-                f"user_{user_id}_report",     # 7일 레포트 알림
-                f"user_{user_id}_wrapup",     # 하루 마무리 알림
-                f"user_{user_id}_encourage"   # 격려 메시지 알림
-            ]
-            
-            print(f"📡 구독할 채널들: {channels}")
-            await pubsub.subscribe(*channels)
-            
-            print(f"🎯 Redis 구독 시작: user_id={user_id}")
-            
-            async for message in pubsub.listen():
-                print(f"📨 Redis 메시지 수신: {message}")
-                
-                if message['type'] == 'message':
-                    try:
-                        # 메시지 파싱
-                        data = json.loads(message['data'])
-                        channel = message['channel'].decode('utf-8')  # bytes를 str로 변환
-                        
-                        print(f"🔍 메시지 파싱 완료: channel={channel}, data={data}")
-                        
-                        # 채널별 메시지 처리
-                        if channel == f"user_{user_id}_diary":
-                            print(f"📝 일기 알림 처리: {data}")
-                            print(f"🔍 일기 알림 타입: {data.get('type')}")
-                            
-                            # WebSocket 연결 상태 재확인
-                            if not await self.is_websocket_connected(websocket):
-                                print(f"⚠️ WebSocket 연결 불안정 - 메시지 처리 건너뜀: {data.get('type')}")
-                                continue
-                            
-                            # diary_unavailable 처리 추가
-                            if data.get('type') == 'diary_unavailable':
-                                print(f"🛑 diary_unavailable 처리: {data}")
-                                await self.send_notification(websocket, {
-                                    "type": "diary_unavailable",
-                                    "target": "blink-study-overlay-monitor",
-                                    "message": "일기 생성이 완료되었습니다!",
-                                    "priority": data.get("priority", "normal"),
-                                    "reason": data.get("reason", "")
-                                }, user_id)
-
-
-                            # diary_reset 처리 추가
-                            elif data.get('type') == 'diary_reset':
-                                print(f"🕛 diary_reset 처리: {data}")
-                                await self.send_notification(websocket, {
-                                    "type": "diary_reset",
-                                    "target": "global-notification-manager",
-                                    "message": data.get("message", "새로운 하루가 시작되었습니다!"),
-                                    "priority": data.get("priority", "high")
-                                }, user_id)
-
-
-                            else:
-                                # 기존 diary_available 처리
-                                await self.send_notification(websocket, {
-                                    "type": "diary_available",
-                                    "target": "blink-study-overlay-monitor",
-                                    "message": data.get("message", "일기 생성이 가능합니다!")
-                                }, user_id)
-
-
-                        elif channel == f"user_{user_id}_plant":
-                            print(f"🌱 식물 알림 처리: {data}")
-                            await self.send_notification(websocket, {
-                                "type": "plant_generation",
-                                "target": "garden-section",
-                                "message": "새로운 식물이 생성되었습니다!"
-                            }, user_id)
-
-
-                        elif channel == f"user_{user_id}_report":
-                            print(f"📊 리포트 알림 처리: {data}")
-                            await self.send_notification(websocket, {
-                                "type": "seven_day_report",
-                                "target": "study-section",
-                                "message": "7일 감정 레포트가 완성되었습니다!"
-                            }, user_id)
-
-
-                        elif channel == f"user_{user_id}_wrapup":
-                            print(f"🌅 마무리 알림 처리: {data}")
-                            await self.send_notification(websocket, {
-                                "type": "daily_wrapup",
-                                "target": "main-dashboard",
-                                "message": "하루 마무리 시간입니다!"
-                            }, user_id)
-
-                        elif channel == f"user_{user_id}_encourage":
-                            print(f"💌 격려 메시지 알림 처리: {data}")
-                            
-                            # encourage_unavailable 처리 추가
-                            if data.get('type') == 'encourage_unavailable':
-                                print(f"🛑 encourage_unavailable 처리: {data}")
-                                await self.send_notification(websocket, {
-                                    "type": "encourage_unavailable",
-                                    "target": "letter-overlay-glow",
-                                    "message": "응원격려 확인함"
-                                }, user_id)
-                            else:
-                                # 기존 encourage_available 처리
-                                await self.send_notification(websocket, {
-                                    "type": "encourage_available",
-                                    "target": "letter-overlay-glow",
-                                    "message": "오늘 하루도 수고했어요, 당신에게 편지가 왔어요"
-                                }, user_id)
-                            
-                        else:
-                            print(f"❓ 알 수 없는 채널: {channel}")
-                            
-                    except json.JSONDecodeError as e:
-                        print(f"❌ JSON 파싱 실패: {e}, 원본 메시지: {message}")
-                    except Exception as e:
-                        print(f"❌ 메시지 처리 실패: {e}")
-                elif message['type'] == 'subscribe':
-                    print(f"✅ Redis 구독 성공: {message}")
-                elif message['type'] == 'unsubscribe':
-                    print(f"❌ Redis 구독 해제: {message}")
-                else:
-                    print(f"📡 Redis 메시지 타입: {message['type']}")
-                        
-        except Exception as e:
-            print(f"❌ Redis 구독 실패: {e}")
-        finally:
-            print(f"🔌 Redis 구독 종료: user_id={user_id}")
-            await pubsub.close()
-            
-    async def send_notification(self, websocket: WebSocket, data: dict, user_id: int = None):
-        """WebSocket으로 프론트에 알림 전송"""
+            while True:
+                payload, enqueued_at = await conn.outbox.get()
+                await self.send_notification(conn.websocket, payload, conn.user_id, enqueued_at)
+        except OutboxClosed as e:
+            if e.args and e.args[0] == "overflow":
+                # 큐가 넘칠 만큼 느린 클라이언트 → 연결 종료 (재연결 시 최신 상태부터)
+                print(f"🐢 송신 큐 초과로 연결 종료: user_id={conn.user_id}")
+                await self._close(conn, 1013)
+        except asyncio.CancelledError:
+            pass
+
+    async def send_notification(self, websocket: WebSocket, data, user_id: int = None, enqueued_at: float = None):
+        """WebSocket으로 프론트에 알림 전송 (data: Notification 또는 dict)"""
+        if isinstance(data, Notification):
+            mtype, text = data.type, data.text
+        else:
+            mtype, text = data["type"], json.dumps(data)
+        t0 = time.perf_counter()
+        wait_ms = (t0 - enqueued_at) * 1000 if enqueued_at else 0.0
         try:
             # WebSocket 연결 상태 확인
             if await self.is_websocket_connected(websocket):
-                await websocket.send_text(json.dumps(data))
-                print(f"📤 알림 전송 성공: {data['type']}")
+                await asyncio.wait_for(websocket.send_text(text), SEND_TIMEOUT)
+                outbox_metrics.observe_send(wait_ms, (time.perf_counter() - t0) * 1000)
             else:
-                print(f"⚠️ WebSocket 연결 상태 불량 - 메시지 전송 건너뜀: {data['type']}")
+                print(f"⚠️ WebSocket 연결 상태 불량 - 메시지 전송 건너뜀: {mtype}")
                 if user_id:
                     await self.handle_connection_error(websocket, user_id)
-                    
+
+        except asyncio.TimeoutError:
+            outbox_metrics.observe_send(wait_ms, (time.perf_counter() - t0) * 1000, ok=False)
+            print(f"⏱️ 알림 전송 타임아웃 - 연결 종료: {mtype}")
+            if user_id:
+                await self.handle_connection_error(websocket, user_id, code=1013)
+
         except Exception as e:
-            print(f"❌ 알림 전송 실패: {e}")
+            outbox_metrics.observe_send(wait_ms, (time.perf_counter() - t0) * 1000, ok=False)
+            print(f"❌ 알림 전송 실패: {e!r}")
             # WebSocket이 닫힌 상태에서 발생하는 특정 오류 처리
             if "Cannot call" in str(e) and "close message" in str(e):
-                print(f"🔄 WebSocket이 닫힌 상태 - 연결 재설정 필요: {data['type']}")
+                print(f"🔄 WebSocket이 닫힌 상태 - 연결 재설정 필요: {mtype}")
                 if user_id:
                     await self.handle_connection_error(websocket, user_id)
             else:
-                print(f"❌ 기타 WebSocket 오류: {e}")
+                print(f"❌ 기타 WebSocket 오류: {e!r}")
                 if user_id:
                     await self.handle_connection_error(websocket, user_id)
 
+    def status(self) -> dict:
+        return {
+            "users": len(self.active_connections),
+            "connections": sum(len(c) for c in self.active_connections.values()),
+            "outbox": outbox_metrics.snapshot(),
+        }
+
 # 전역 인스턴스
-websocket_service = WebSocketService() 
\ No newline at end of file
+websocket_service = WebSocketService()
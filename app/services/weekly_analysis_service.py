@@ -1,4 +1,7 @@
 import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
 from app.repositories.weekly_analysis_repository import WeeklyAnalysisRepository
 from app.clients.gpt_api import call_gpt
@@ -9,10 +12,16 @@ from app.prompt.weekly_analysis_prompts import (
 )
 from datetime import datetime
 
+# 감정/키워드 단계는 서로 독립 → 동시에 호출 (GPT 왕복 3회 → 2회)
+WEEKLY_PARALLEL = os.getenv("WEEKLY_ANALYSIS_PARALLEL", "1") == "1"
+
+
 class WeeklyAnalysisService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, parallel: bool = WEEKLY_PARALLEL):
         self.db = db
         self.weekly_repo = WeeklyAnalysisRepository(db)
+        self.parallel = parallel
+        self.stage_timings = {}  # 단계별 소요 시간 (ms), 마지막 실행 기준
     
     def analyze_weekly_data(self, user_id: int):
         """7일간 데이터로 주간 분석 실행"""
@@ -27,18 +36,21 @@ class WeeklyAnalysisService:
         # 2. 데이터 준비
         weekly_data = self._prepare_weekly_data(unused_reports)
         
-        # 3. 순차적 체인 분석 실행
+        # 3. 체인 분석 실행
         try:
-            # 3-1. 감정 변화 분석
-            emotion_result = self._analyze_emotion_trend(weekly_data)
-            
-            # 3-2. 키워드 패턴 분석
-            keyword_result = self._analyze_keyword_pattern(weekly_data)
+            self.stage_timings = {}
+            started = time.perf_counter()
+
+            # 3-1/3-2. 감정 변화 분석 + 키워드 패턴 분석 (parallel이면 동시에)
+            emotion_result, keyword_result = self._run_independent_stages(weekly_data)
             
-            # 3-3. 종합 분석
-            comprehensive_result = self._analyze_comprehensive(
+            # 3-3. 종합 분석 (두 결과가 모두 나오면 바로)
+            comprehensive_result = self._timed(
+                "comprehensive", self._analyze_comprehensive,
                 emotion_result, keyword_result, weekly_data
             )
+            self.stage_timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+            print(f"⏱️ 주간 분석 단계별 시간(ms): user_id={user_id}, parallel={self.parallel}, {self.stage_timings}")
             
             # 4. 결과 저장
             week_start = unused_reports[0].timestamp
@@ -64,6 +76,26 @@ class WeeklyAnalysisService:
             print(f"❌ 주간 분석 실패: {str(e)}")
             return None
     
+    def _timed(self, stage: str, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.stage_timings[stage] = round((time.perf_counter() - t0) * 1000, 1)
+
+    def _run_independent_stages(self, weekly_data):
+        """감정/키워드 단계 실행. 하나라도 실패하면 예외 전파 (종합 단계는 실행 안 함)"""
+        if not self.parallel:
+            emotion_result = self._timed("emotion_trend", self._analyze_emotion_trend, weekly_data)
+            keyword_result = self._timed("keyword_pattern", self._analyze_keyword_pattern, weekly_data)
+            return emotion_result, keyword_result
+
+        # call_gpt는 블로킹 → 스레드 2개로 동시에 (DB 세션은 이 스레드에서만 사용)
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="weekly") as pool:
+            f_emotion = pool.submit(self._timed, "emotion_trend", self._analyze_emotion_trend, weekly_data)
+            f_keyword = pool.submit(self._timed, "keyword_pattern", self._analyze_keyword_pattern, weekly_data)
+            return f_emotion.result(), f_keyword.result()
+
     def _prepare_weekly_data(self, weekly_reports):
         """주간 데이터 준비"""
         weekly_emotions = [report.emotions for report in weekly_reports]
@@ -0,0 +1,201 @@
+# app/services/ws_outbox.py
+"""
+WebSocket 연결별 송신 큐 (Outbox)
+- 허브(Redis 리스너)는 put_nowait로 넣기만 하고, 실제 send는 연결별 writer 태스크가 수행
+  → 느린 클라이언트 하나가 분배 루프/다른 유저를 막지 않음
+- 상한(maxsize)이 있는 큐 + 가득 찼을 때 정책
+    drop_oldest : 가장 오래된 알림을 버리고 새 알림 수용 (기본)
+    drop_new    : 새 알림을 버림
+    disconnect  : 연결을 닫음 (클라이언트는 재연결 후 최신 상태를 다시 받음)
+- 상태성 알림 병합(coalescing): 같은 target의 diary_available/unavailable 등은
+  대기 중인 이전 상태를 최신 상태로 교체 (큐 길이 증가 없음)
+- 큐 깊이/대기 시간/전송 지연 메트릭
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEW = "drop_new"
+DISCONNECT = "disconnect"
+POLICIES = (DROP_OLDEST, DROP_NEW, DISCONNECT)
+
+OUTBOX_SIZE = int(os.getenv("WS_OUTBOX_SIZE", "32"))
+OUTBOX_POLICY = os.getenv("WS_OUTBOX_POLICY", DROP_OLDEST)
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+
+# 최신 상태만 의미 있는 알림 타입 → 병합 그룹
+COALESCE_GROUPS = {
+    "diary_available": "diary_state",
+    "diary_unavailable": "diary_state",
+    "encourage_available": "encourage_state",
+    "encourage_unavailable": "encourage_state",
+}
+
+
+def coalesce_key(note) -> Optional[Tuple[str, Any]]:
+    """note: notification_routes.Notification (type/target 속성)"""
+    group = COALESCE_GROUPS.get(note.type)
+    if group is None:
+        return None
+    return group, note.target
+
+
+class OutboxClosed(Exception):
+    pass
+
+
+class OutboxMetrics:
+    """프로세스 전체 Outbox 합산 메트릭 (이벤트 루프 스레드에서만 갱신)"""
+
+    def __init__(self, window: int = 1024):
+        self._send_ms: Deque[float] = deque(maxlen=window)
+        self._wait_ms: Deque[float] = deque(maxlen=window)
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.overflow_disconnects = 0
+        self.sent = 0
+        self.send_errors = 0
+        self.depth = 0
+        self.max_depth = 0
+
+    def add_depth(self, delta: int, outbox_depth: int) -> None:
+        self.depth += delta
+        if outbox_depth > self.max_depth:
+            self.max_depth = outbox_depth
+
+    def observe_send(self, wait_ms: float, send_ms: float, ok: bool = True) -> None:
+        if ok:
+            self.sent += 1
+        else:
+            self.send_errors += 1
+        self._wait_ms.append(wait_ms)
+        self._send_ms.append(send_ms)
+
+    @staticmethod
+    def _pct(values, q: float) -> float:
+        if not values:
+            return 0.0
+        s = sorted(values)
+        return round(s[min(len(s) - 1, int(q * len(s)))], 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        send_ms, wait_ms = list(self._send_ms), list(self._wait_ms)
+        return {
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "overflow_disconnects": self.overflow_disconnects,
+            "sent": self.sent,
+            "send_errors": self.send_errors,
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "queue_wait_p50_ms": self._pct(wait_ms, 0.5),
+            "queue_wait_p99_ms": self._pct(wait_ms, 0.99),
+            "send_p50_ms": self._pct(send_ms, 0.5),
+            "send_p99_ms": self._pct(send_ms, 0.99),
+        }
+
+
+outbox_metrics = OutboxMetrics()
+
+
+class _Entry:
+    __slots__ = ("key", "payload", "enqueued_at")
+
+    def __init__(self, key, payload, enqueued_at):
+        self.key = key
+        self.payload = payload
+        self.enqueued_at = enqueued_at
+
+
+class Outbox:
+    """단일 이벤트 루프 전용 (허브 분배와 writer가 같은 루프에서 동작)"""
+
+    def __init__(
+        self,
+        maxsize: int = OUTBOX_SIZE,
+        policy: str = OUTBOX_POLICY,
+        metrics: OutboxMetrics = outbox_metrics,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown outbox policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.metrics = metrics
+        self._q: Deque[_Entry] = deque()
+        self._latest: Dict[Tuple[str, Any], _Entry] = {}
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.close_reason: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._q)
+
+    def put_nowait(self, payload) -> bool:
+        """반환: 수용 여부 (병합도 수용으로 봄)"""
+        if self.closed:
+            return False
+        now = time.perf_counter()
+        key = coalesce_key(payload)
+        if key is not None:
+            pending = self._latest.get(key)
+            if pending is not None:
+                pending.payload = payload
+                pending.enqueued_at = now
+                self.metrics.coalesced += 1
+                return True
+
+        if len(self._q) >= self.maxsize:
+            if self.policy == DROP_NEW:
+                self.metrics.dropped += 1
+                return False
+            if self.policy == DISCONNECT:
+                self.metrics.overflow_disconnects += 1
+                self.close("overflow")
+                return False
+            self._drop_oldest()
+
+        entry = _Entry(key, payload, now)
+        self._q.append(entry)
+        if key is not None:
+            self._latest[key] = entry
+        self.metrics.enqueued += 1
+        self.metrics.add_depth(1, len(self._q))
+        self._ready.set()
+        return True
+
+    def _drop_oldest(self) -> None:
+        entry = self._q.popleft()
+        if entry.key is not None:
+            self._latest.pop(entry.key, None)
+        self.metrics.dropped += 1
+        self.metrics.add_depth(-1, len(self._q))
+
+    async def get(self) -> Tuple[Any, float]:
+        """(payload, enqueued_at). 닫히면 OutboxClosed"""
+        while True:
+            if self.closed:
+                raise OutboxClosed(self.close_reason)
+            if self._q:
+                entry = self._q.popleft()
+                if entry.key is not None and self._latest.get(entry.key) is entry:
+                    del self._latest[entry.key]
+                self.metrics.add_depth(-1, len(self._q))
+                return entry.payload, entry.enqueued_at
+            self._ready.clear()
+            await self._ready.wait()
+
+    def close(self, reason: str = "closed") -> None:
+        """대기 알림 폐기 + writer 깨움"""
+        if self.closed:
+            return
+        self.closed = True
+        self.close_reason = reason
+        self.metrics.add_depth(-len(self._q), 0)
+        self._q.clear()
+        self._latest.clear()
+        self._ready.set()
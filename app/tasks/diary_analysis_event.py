@@ -3,16 +3,9 @@ from sqlalchemy.orm import sessionmaker
 from app.core.connection import engine
 from app.repositories.weekly_analysis_repository import WeeklyAnalysisRepository
 from app.services.weekly_analysis_service import WeeklyAnalysisService
-from app.config.settings import settings
-import redis
-import json
+from app.services.notification_publisher import publish
 
 SessionLocal = sessionmaker(bind=engine)
-redis_client = redis.Redis(
-    host=settings.redis_host, 
-    port=settings.redis_port, 
-    db=settings.redis_db
-)
 
 
 # diary_anaylsis report 7번 업뎃되면 weekly 실행하기 위한 이벤트 리스너 
@@ -44,7 +37,7 @@ def check_weekly_analysis_after_diary_save(user_id: int):
                     "message": "7일 감정 레포트가 완성되었습니다!",
                     "user_id": user_id
                 }
-                redis_client.publish(f"user_{user_id}_report", json.dumps(message))
+                publish(f"user_{user_id}_report", message)
                 
                 print(f"✅ 주간 분석 완료 및 알림 발행: user_id={user_id}")
             else:
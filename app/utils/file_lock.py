@@ -0,0 +1,44 @@
+# app/utils/file_lock.py
+"""
+프로세스 간 배타 락 (.lock 파일, POSIX flock / Windows msvcrt)
+- 같은 디렉터리를 여러 프로세스(uvicorn 워커, Celery 워커 등)가 함께 쓰는 구간 직렬화
+- 같은 스레드에서 중첩 획득하지 않음 (flock은 open마다 별개라 자기 자신과도 막힘)
+"""
+import os
+import time
+
+
+class FileLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._f = None
+
+    def __enter__(self) -> "FileLock":
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._f = open(self.path, "a+b")
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    self._f.seek(0)
+                    msvcrt.locking(self._f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK은 약 10초 재시도 후 실패 → 계속 대기
+                    time.sleep(0.05)
+        else:
+            import fcntl
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._f.seek(0)
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._f.close()
+            self._f = None